@@ -5,8 +5,8 @@ import os
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from database.db import DatabaseManager
-from models.sentimentpipeline import AIAnalyzer
+from utils.perf import begin_rerun, end_rerun
+from utils.session import init_session
 from utils.styles import get_custom_css, create_stat_card
 
 # Page configuration
@@ -17,12 +17,17 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize database and AI analyzer in session state
-if 'db' not in st.session_state:
-    st.session_state.db = DatabaseManager()
+# Hidden Performance page: open the app with ?perf=1
+if st.query_params.get("perf"):
+    from utils.perfpage import render_performance_page
+    render_performance_page()
+    st.stop()
 
-if 'ai_analyzer' not in st.session_state:
-    st.session_state.ai_analyzer = AIAnalyzer()
+begin_rerun("Home")
+
+# Initialize the database in session state; the home page needs no models,
+# so the analyzer is only loaded by the pages that use it
+init_session()
 
 # Apply custom CSS
 st.markdown(get_custom_css(), unsafe_allow_html=True)
@@ -63,8 +68,8 @@ with col3:
 
 st.divider()
 
-# Quick stats with styled cards
-stats = st.session_state.db.get_statistics()
+# Stats, streak, recent entries and this year's activity in one read
+stats = st.session_state.db.get_dashboard(recent=3)
 
 st.markdown("<h2 style='text-align: center; color: #1e3a8a; margin-bottom: 2rem;'>Your Journey at a Glance</h2>", unsafe_allow_html=True)
 
@@ -88,6 +93,15 @@ with col4:
     else:
         st.markdown(create_stat_card("Avg Sentiment", "N/A", "", "#94a3b8"), unsafe_allow_html=True)
 
+# This year's activity calendar
+if stats['total_entries'] > 0:
+    from utils.helper import create_calendar_heatmap
+    
+    st.plotly_chart(
+        create_calendar_heatmap(stats['year_activity'], stats['year']),
+        use_container_width=True
+    )
+
 st.divider()
 
 # Getting started guide
@@ -142,7 +156,7 @@ else:
     # Recent activity
     st.markdown("<h2 style='color: #1e3a8a; margin-bottom: 1.5rem;'>📖 Recent Activity</h2>", unsafe_allow_html=True)
     
-    recent_entries = st.session_state.db.get_all_entries(limit=3)
+    recent_entries = stats['recent_entries']
     
     if recent_entries:
         for entry in recent_entries:
@@ -195,20 +209,54 @@ with st.sidebar:
     
     # Export option
     st.markdown("### Export Data")
+    export_format = st.selectbox(
+        "Format",
+        ["markdown", "jsonl", "csv", "html"],
+        format_func=lambda f: {"markdown": "Markdown", "jsonl": "JSON Lines", "csv": "CSV", "html": "HTML"}[f]
+    )
+    export_gzip = st.checkbox("Compress (gzip)", value=False)
     if st.button("Export All Entries"):
-        from utils.helper import export_to_markdown
-        entries = st.session_state.db.get_all_entries()
+        from utils.exporter import export_entries
+        export = export_entries(st.session_state.db, export_format, compress=export_gzip)
         
-        if entries:
-            md_content = export_to_markdown(entries)
-            st.download_button(
-                label="Download Markdown",
-                data=md_content,
-                file_name=f"journal_export_{st.session_state.db.get_statistics()['total_entries']}_entries.md",
-                mime="text/markdown"
+        if export['entries']:
+            with open(export['path'], 'rb') as export_file:
+                st.download_button(
+                    label="Download Export",
+                    data=export_file,
+                    file_name=export['file_name'],
+                    mime=export['mime']
+                )
+            st.caption(
+                f"{export['entries']} entries · {export['file_bytes'] / 1024:,.1f} KB · "
+                f"{export['mb_per_s']:.1f} MB/s"
             )
         else:
             st.warning("No entries to export")
+        os.remove(export['path'])
+    
+    # Import option
+    st.markdown("### Import Data")
+    import_file = st.file_uploader(
+        "Markdown or JSON Lines export",
+        type=["md", "jsonl", "gz"],
+        help="Entries keep their dates, sentiment and themes. Entries you already have are skipped."
+    )
+    if import_file is not None and st.button("Import Entries"):
+        from utils.importer import import_entries
+        try:
+            st.session_state.import_result = import_entries(st.session_state.db, import_file)
+            st.rerun()
+        except (ValueError, UnicodeDecodeError, OSError) as e:
+            st.error(f"Could not import this file: {e}")
+    
+    if 'import_result' in st.session_state:
+        result = st.session_state.pop('import_result')
+        st.success(f"Imported {result['inserted']} entries")
+        st.caption(
+            f"{result['skipped']} duplicates skipped · {result['invalid']} invalid · "
+            f"{result['entries_per_s']:,.0f} entries/s"
+        )
     
     # Danger zone
     with st.expander("Danger Zone"):
@@ -221,6 +269,20 @@ with st.sidebar:
                 st.rerun()
             else:
                 st.error("Please type 'DELETE' to confirm")
+        
+        st.markdown("**Delete a date range**")
+        delete_range = st.date_input("Entries written between", value=(), key="delete_range")
+        if st.button("Delete Entries in Range"):
+            if confirm != "DELETE":
+                st.error("Please type 'DELETE' to confirm")
+            elif len(delete_range) != 2:
+                st.error("Pick a start and an end date")
+            else:
+                deleted = st.session_state.db.delete_entries(
+                    start_date=delete_range[0].isoformat(),
+                    end_date=f"{delete_range[1].isoformat()}T23:59:59.999999"
+                )
+                st.success(f"Deleted {deleted} entries")
     
     st.divider()
     
@@ -235,4 +297,6 @@ st.markdown(
     "<div style='text-align: center; color: #666;'>"
     "</div>",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+end_rerun()
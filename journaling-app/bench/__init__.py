@@ -0,0 +1 @@
+"""Runnable benchmarks and checks (``python -m bench.<name>``)"""
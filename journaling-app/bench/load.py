@@ -0,0 +1,322 @@
+"""Headless load test: many concurrent users on one journal database.
+
+Usage (from the journaling-app directory):
+
+    python -m bench.load [--users 1 2 4 8 16] [--duration 30] [--entries 10000]
+                         [--mix pastentries=3,insight=3,weeklysummary=2,save=1]
+                         [--think 0.2] [--analyzer fast|real] [--out load.json]
+
+Each simulated user is a separate process driving the real page scripts
+through Streamlit's AppTest (which cannot run two scripts at once in one
+process). A user keeps one session per page and picks the next action
+from ``--mix``: open Past Entries, Insights or Weekly Summary, or write
+and save an entry on New Entry. Page views start a fresh script session
+(AppTest cannot replay selectboxes that use ``format_func``); saves reuse
+one New Entry session per user. Users pause ``--think`` seconds on average
+between actions. All users share a copy of a synthetic journal
+(``bench.synthetic``), so SQLite locking is exercised for real.
+
+Lock contention is measured by opening every connection with no busy
+timeout and retrying SQLITE_BUSY in 1 ms steps, recording how long each
+statement or commit waited. For each user count the report gives
+throughput, p50/p95/p99 rerun latency per action, errors and lock waits.
+It also names the saturation point: the first user count where adding
+users stops raising throughput by at least 10%.
+
+Processes do not share the in-process caches (analytics frames, charts)
+the way sessions in one server do, so treat absolute numbers as a
+lower bound on per-rerun cost rather than a model of a single server.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date
+from typing import Dict, List
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = {
+    'pastentries': 'pages/pastentries.py',
+    'insight': 'pages/insight.py',
+    'weeklysummary': 'pages/weeklysummary.py',
+    'save': 'pages/newentry.py'
+}
+DEFAULT_MIX = 'pastentries=3,insight=3,weeklysummary=2,save=1'
+LOCK_TIMEOUT = 30.0
+SATURATION_GAIN = 1.10
+
+# Per-process lock wait record, filled by the connection classes below
+_lock_waits: List[float] = []
+_lock_timeouts = 0
+
+
+def _retry_busy(run):
+    """Run ``run()``, retrying while the database is locked"""
+    global _lock_timeouts
+    start = None
+    while True:
+        try:
+            result = run()
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            now = time.perf_counter()
+            if start is None:
+                start = now
+            elif now - start > LOCK_TIMEOUT:
+                _lock_waits.append(now - start)
+                _lock_timeouts += 1
+                raise
+            time.sleep(0.001)
+            continue
+        if start is not None:
+            _lock_waits.append(time.perf_counter() - start)
+        return result
+
+
+class _LockTimingCursor(sqlite3.Cursor):
+    def execute(self, *args):
+        return _retry_busy(lambda: super(_LockTimingCursor, self).execute(*args))
+
+    def executemany(self, *args):
+        return _retry_busy(lambda: super(_LockTimingCursor, self).executemany(*args))
+
+
+class LockTimingConnection(sqlite3.Connection):
+    """Connection that waits on locks itself so the waits can be measured"""
+
+    def __init__(self, *args, **kwargs):
+        kwargs['timeout'] = 0
+        super().__init__(*args, **kwargs)
+
+    def cursor(self, factory=_LockTimingCursor):
+        return super().cursor(factory)
+
+    def execute(self, *args):
+        return self.cursor().execute(*args)
+
+    def commit(self):
+        return _retry_busy(super().commit)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _latency(values: List[float]) -> Dict:
+    return {
+        'count': len(values),
+        'p50_ms': round(_percentile(values, 50), 2),
+        'p95_ms': round(_percentile(values, 95), 2),
+        'p99_ms': round(_percentile(values, 99), 2),
+        'mean_ms': round(statistics.mean(values), 2) if values else 0.0
+    }
+
+
+def _user(user: int, db_path: str, mix: Dict[str, int], think: float, analyzer_kind: str,
+          start, deadline_s: float, ready, results):
+    """One simulated user (runs in its own process)"""
+    from streamlit.testing.v1 import AppTest
+
+    from database.db import DatabaseManager
+    from .synthetic import FastAnalyzer, generate_entries
+
+    class Database(DatabaseManager):
+        connection_factory = LockTimingConnection
+
+    db = Database(db_path)
+    if analyzer_kind == 'real':
+        from models.sentimentpipeline import AIAnalyzer
+        analyzer = AIAnalyzer()
+    else:
+        analyzer = FastAnalyzer()
+    rng = random.Random(user)
+    actions = [name for name, weight in mix.items() for _ in range(weight)]
+    texts = generate_entries(1000, seed=1000 + user)
+    sessions = {}
+
+    def session(name):
+        if name != 'save' or name not in sessions:
+            at = AppTest.from_file(os.path.join(APP_DIR, PAGES[name]), default_timeout=120)
+            at.session_state['db'] = db
+            at.session_state['ai_analyzer'] = analyzer
+            sessions[name] = at
+        return sessions[name]
+
+    def act(name):
+        at = session(name)
+        if name == 'save':
+            if not at.text_area:
+                at.run()
+            at.text_area[0].input(next(texts)['content'])
+            next(b for b in at.button if b.label == "Save Entry").click()
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    # Warm the process (imports, first loads) before the clock starts
+    for name in mix:
+        if name != 'save':
+            act(name)
+    sessions.clear()
+    _lock_waits.clear()
+    ready.put(user)
+    start.wait()
+
+    deadline = time.perf_counter() + deadline_s
+    samples, errors = [], []
+    while time.perf_counter() < deadline:
+        name = rng.choice(actions)
+        began = time.perf_counter()
+        try:
+            act(name)
+            samples.append((name, (time.perf_counter() - began) * 1000))
+        except Exception as e:
+            errors.append((name, str(e)[:200]))
+            sessions.pop(name, None)
+        if think:
+            time.sleep(rng.expovariate(1 / think))
+
+    results.put({'user': user, 'samples': samples, 'errors': errors,
+                 'lock_waits': list(_lock_waits), 'lock_timeouts': _lock_timeouts})
+
+
+def run_level(users: int, db_path: str, mix: Dict[str, int], think: float,
+              analyzer: str, duration: float) -> Dict:
+    ctx = mp.get_context('spawn')
+    start, ready, results = ctx.Event(), ctx.Queue(), ctx.Queue()
+    procs = [
+        ctx.Process(target=_user, args=(u, db_path, mix, think, analyzer, start, duration, ready, results))
+        for u in range(users)
+    ]
+    for proc in procs:
+        proc.start()
+    for _ in procs:
+        ready.get()
+    began = time.perf_counter()
+    start.set()
+    outcomes = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - began
+    for proc in procs:
+        proc.join()
+
+    by_action: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    waits: List[float] = []
+    timeouts = 0
+    for outcome in outcomes:
+        for name, ms in outcome['samples']:
+            by_action.setdefault(name, []).append(ms)
+        for name, _ in outcome['errors']:
+            errors[name] = errors.get(name, 0) + 1
+        waits.extend(outcome['lock_waits'])
+        timeouts += outcome['lock_timeouts']
+    all_ms = [ms for values in by_action.values() for ms in values]
+    first_errors = [e for outcome in outcomes for e in outcome['errors']][:5]
+
+    return {
+        'users': users,
+        'seconds': round(elapsed, 2),
+        'actions': len(all_ms),
+        'throughput_per_s': round(len(all_ms) / elapsed, 2),
+        'latency': _latency(all_ms),
+        'by_action': {name: _latency(values) for name, values in sorted(by_action.items())},
+        'errors': errors,
+        'error_samples': first_errors,
+        'locks': {
+            'waits': len(waits),
+            'wait_s': round(sum(waits), 3),
+            'p95_wait_ms': round(_percentile(waits, 95) * 1000, 2),
+            'max_wait_ms': round(max(waits, default=0) * 1000, 2),
+            'timeouts': timeouts,
+            # Share of user time spent blocked on SQLite locks
+            'wait_share': round(sum(waits) / (users * elapsed), 4)
+        }
+    }
+
+
+def saturation_point(levels: List[Dict]):
+    """First user count after which throughput grows by less than 10%"""
+    for previous, current in zip(levels, levels[1:]):
+        if current['throughput_per_s'] < previous['throughput_per_s'] * SATURATION_GAIN:
+            return previous['users']
+    return None
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in PAGES:
+            raise argparse.ArgumentTypeError(f"unknown action {name!r} (choose from {', '.join(PAGES)})")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent users and find the saturation point")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=30, help="seconds per user count")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix(DEFAULT_MIX))
+    parser.add_argument("--think", type=float, default=0.2, help="mean pause between actions (s)")
+    parser.add_argument("--analyzer", choices=["fast", "real"], default="fast")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "journal_bench"))
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    from .suite import open_database
+
+    today = date.today()
+    source, _ = open_database(args.data_dir, args.entries, 3, args.seed, today)
+    levels = []
+    for users in args.users:
+        # Each level starts from the same journal (saves accumulate otherwise)
+        db_path = os.path.join(args.data_dir, f"load-{args.entries}.db")
+        shutil.copyfile(source.db_path, db_path)
+        level = run_level(users, db_path, args.mix, args.think, args.analyzer, args.duration)
+        levels.append(level)
+        locks = level['locks']
+        print(f"{users:3d} users  {level['throughput_per_s']:7.2f} actions/s  "
+              f"p50 {level['latency']['p50_ms']:8.1f}  p95 {level['latency']['p95_ms']:8.1f}  "
+              f"p99 {level['latency']['p99_ms']:8.1f} ms  lock waits {locks['waits']} "
+              f"({locks['wait_share']:.1%} of time, max {locks['max_wait_ms']:.0f} ms)  "
+              f"errors {sum(level['errors'].values())}")
+        for name, stats in level['by_action'].items():
+            print(f"      {name:14s} n={stats['count']:<5d} p50 {stats['p50_ms']:8.1f}  "
+                  f"p95 {stats['p95_ms']:8.1f}  p99 {stats['p99_ms']:8.1f} ms")
+        for name, message in level['error_samples']:
+            print(f"      error in {name}: {message}")
+
+    point = saturation_point(levels)
+    print(f"Saturation point: {point} users" if point else
+          "No saturation within the tested user counts")
+
+    if args.out:
+        report = {
+            'entries': args.entries,
+            'mix': args.mix,
+            'think_s': args.think,
+            'analyzer': args.analyzer,
+            'duration_s': args.duration,
+            'cpu_count': os.cpu_count(),
+            'saturation_users': point,
+            'levels': levels
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
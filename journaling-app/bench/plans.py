@@ -0,0 +1,256 @@
+"""Query plans for every statement DatabaseManager issues.
+
+Runs every DatabaseManager read (the ``bench.suite`` cases) and a write
+cycle against a synthetic journal, capturing each SQL statement through a
+trace callback. Each distinct statement is run through
+``EXPLAIN QUERY PLAN``; the plans are kept in the golden file
+``bench/query_plans.txt``, which ``tests/test_query_plans.py`` checks.
+After an intended schema or query change, regenerate it (from the
+journaling-app directory) and review its diff like any other code change:
+
+    python -m bench.plans [--entries 2000]
+
+Statements on the hot paths (listing, date range, stats, search and
+single-entry writes) must also use an index: no full scan of a table and
+no temporary B-tree for sorting or grouping. The exceptions are the few
+tables that are meant to be read whole (``WHOLE_TABLE_READS``).
+
+The journal ends on a fixed date so date-dependent statements (period
+lists, week starts) give the same plans on every run, and it is analyzed
+first (``database.maintenance.optimize``), as deployed journals are.
+"""
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from database.db import DatabaseManager
+from database.maintenance import optimize
+from database.migrations import schedule_backfill
+
+from .suite import db_cases, open_database
+from .synthetic import FastAnalyzer, generate_entries
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'query_plans.txt')
+DATA_DIR = os.path.join(tempfile.gettempdir(), "journal_bench")
+PLAN_DATE = date(2025, 6, 30)
+PLANNED = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+HOT_PATHS = {
+    'listing': ['get_all_entries', 'get_all_entries_limit_50', 'iter_entries', 'get_dashboard',
+                'get_analytics_rows', 'get_entries_pending_themes'],
+    'date range': ['get_entries_by_date_range_30d'],
+    'stats': ['get_statistics', 'get_dashboard', 'get_streak_info', 'get_activity_years',
+              'get_year_activity'],
+    'search': ['get_entry_by_id', 'get_term_timeline', 'semantic_search', 'get_related_entries'],
+    'period summaries': ['get_period_summary_30d', 'get_period_summary_365d',
+                         'get_period_comparison_week', 'get_period_comparison_month'],
+    'writes': ['add_entry', 'update_entry', 'set_entry_themes', 'delete_entry']
+}
+
+# Tables a hot path may scan in full, and why that is fine
+WHOLE_TABLE_READS = {
+    'daily_rollup': 'one row per day; stats and the calendar aggregate all of it',
+    'entry_embeddings': 'loaded once into the in-memory vector index'
+}
+
+_LITERAL = re.compile(r"[xX]?'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+_TUPLES = re.compile(r'\(\?, \.\.\.\)(?:\s*,\s*\(\?, \.\.\.\))+')
+
+
+def normalize(sql: str) -> str:
+    """Statement text with literals replaced by ``?`` and lists collapsed"""
+    sql = ' '.join(sql.split())
+    sql = _LITERAL.sub('?', sql)
+    sql = _LIST.sub('?, ...', sql)
+    return _TUPLES.sub('(?, ...), ...', sql)
+
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    """``EXPLAIN QUERY PLAN`` rows as indented lines, as the sqlite3 shell shows them"""
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in conn.execute('EXPLAIN QUERY PLAN ' + sql):
+        depth[node] = depth.get(parent, -1) + 1
+        # Subquery numbers and constant-row counts vary with list lengths
+        detail = re.sub(r'\b(SUBQUERY|SCAN) \d+\b', r'\1 N', detail)
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+
+def capture(db_path: str, today: date) -> List[Tuple[str, str]]:
+    """(case, sql) for every statement DatabaseManager issues over the workload"""
+    statements: List[Tuple[str, str]] = []
+    case = ['init']
+
+    class TracedConnection(sqlite3.Connection):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.set_trace_callback(lambda sql: statements.append((case[0], sql)))
+
+    class Database(DatabaseManager):
+        connection_factory = TracedConnection
+
+    db = Database(db_path)
+    case[0] = 'setup'
+    reads = db_cases(db, today)
+    for case[0], func in reads:
+        func()
+
+    def backfill():
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        db.daily.reset(cursor)
+        schedule_backfill(cursor, db.daily.name)
+        conn.commit()
+        conn.close()
+        return Database(db_path).run_backfills(batch_size=500, pause=0)
+
+    analyzer = FastAnalyzer()
+    text = "Plan check entry: long day at work, then dinner with family."
+    analysis = analyzer.analyze_entry(text)
+    pending = dict(analysis, themes=None)
+    writes = [
+        ('add_entry', lambda: db.add_entry(text, "", pending)),
+        ('get_entries_pending_themes', db.get_entries_pending_themes),
+        ('update_entry', lambda: db.update_entry(entry_id, text + " Slept well.", analysis)),
+        ('set_entry_themes', lambda: db.set_entry_themes(entry_id, [['family', 0.8]])),
+        ('delete_entry', lambda: db.delete_entry(entry_id)),
+        ('delete_entries_range', lambda: db.delete_entries(
+            start_date=(today - timedelta(days=60)).isoformat(),
+            end_date=(today - timedelta(days=30)).isoformat(), reclaim=False
+        )),
+        ('delete_entries_ids', lambda: db.delete_entries(
+            ids=[entry['id'] for entry in db.get_all_entries(limit=5)], reclaim=False
+        )),
+        ('import_entries', lambda: db.import_entries(generate_entries(20, seed=99, end=today))),
+        ('backfill_embeddings', lambda: db.backfill_embeddings(analyzer.embed_batch)),
+        ('run_backfills', backfill),
+        ('set_preference', lambda: db.set_preference('plan_check', '1')),
+        ('clear_all_entries', lambda: db.clear_all_entries(reclaim=False))
+    ]
+    for case[0], func in writes:
+        result = func()
+        if case[0] == 'add_entry':
+            entry_id = result
+    return statements
+
+
+def collect(statements: List[Tuple[str, str]], db_path: str) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Plans per case: distinct (normalized sql, plan lines), in first-seen order"""
+    conn = sqlite3.connect(db_path)
+    plans: Dict[str, List[Tuple[str, List[str]]]] = {}
+    for case, sql in statements:
+        if re.match(r'\s*CREATE\s+TEMP', sql, re.IGNORECASE):
+            # Statements may read temporary tables made on the fly
+            conn.execute(sql)
+            continue
+        if sql.lstrip().split(None, 1)[0].upper() not in PLANNED:
+            continue
+        entry = (normalize(sql), explain(conn, sql))
+        if entry not in plans.setdefault(case, []):
+            plans[case].append(entry)
+    conn.close()
+    return plans
+
+
+def render(plans: Dict[str, List[Tuple[str, List[str]]]]) -> List[str]:
+    """Golden file lines; each statement is listed under the first case that issued it"""
+    lines = [
+        '# EXPLAIN QUERY PLAN for every statement DatabaseManager issues.',
+        '# Generated by `python -m bench.plans`; review changes like code.',
+    ]
+    seen = set()
+    for case, entries in plans.items():
+        fresh = [entry for entry in entries if (entry[0], tuple(entry[1])) not in seen]
+        if not fresh:
+            continue
+        lines += ['', f'## {case}']
+        for sql, plan in fresh:
+            seen.add((sql, tuple(plan)))
+            lines.append(sql)
+            lines += ['    ' + line for line in plan]
+    return lines
+
+
+def read_golden(path: str = GOLDEN_PATH) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Plans per case from a golden file (the inverse of ``render``)"""
+    plans: Dict[str, List[Tuple[str, List[str]]]] = {}
+    case = None
+    with open(path) as f:
+        for line in f.read().splitlines():
+            if line.startswith('## '):
+                case = line[3:]
+                plans[case] = []
+            elif line.startswith('    '):
+                plans[case][-1][1].append(line[4:])
+            elif line and not line.startswith('#'):
+                plans[case].append((line, []))
+    return plans
+
+
+def plan_violations(plan: List[str]) -> List[str]:
+    """Plan lines that scan a table or sort in a temporary B-tree"""
+    # CTEs (the keys a summary looks up) are scanned as co-routines
+    routines = {line.split()[1] for line in plan if line.strip().startswith('CO-ROUTINE ')}
+    problems = []
+    for line in plan:
+        detail = line.strip()
+        scan = re.fullmatch(r'SCAN (\w+)', detail)
+        if 'USE TEMP B-TREE' in detail or (
+                scan and scan.group(1) not in WHOLE_TABLE_READS and scan.group(1) not in routines):
+            problems.append(detail)
+    return problems
+
+
+def violations(plans: Dict[str, List[Tuple[str, List[str]]]]) -> List[str]:
+    """Hot-path statements that scan a table or sort in a temporary B-tree"""
+    problems = []
+    for path, cases in HOT_PATHS.items():
+        for case in cases:
+            for sql, plan in plans.get(case, []):
+                for detail in plan_violations(plan):
+                    problems.append(f"{path} / {case}: {detail}\n    {sql}")
+    return problems
+
+
+def build_plans(data_dir: str = DATA_DIR, entries: int = 2000) -> Dict[str, List[Tuple[str, List[str]]]]:
+    """Capture and explain the workload against the synthetic plan journal"""
+    source, _ = open_database(data_dir, entries, 3, 7, PLAN_DATE)
+    db_path = os.path.join(data_dir, f"plans-{entries}.db")
+    shutil.copyfile(source.db_path, db_path)
+    # Plan with the statistics maintenance gives every journal
+    conn = sqlite3.connect(db_path)
+    optimize(conn)
+    conn.close()
+    return collect(capture(db_path, PLAN_DATE), db_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate bench/query_plans.txt")
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args(argv)
+
+    plans = build_plans(args.data_dir, args.entries)
+    with open(GOLDEN_PATH, 'w') as f:
+        f.write('\n'.join(render(plans)) + '\n')
+    statements = sum(len(entries) for entries in plans.values())
+    print(f"Wrote {GOLDEN_PATH}: {statements} plans over {len(plans)} cases")
+
+    problems = violations(plans)
+    if problems:
+        print(f"{len(problems)} hot-path statement(s) without index use:")
+        for problem in problems:
+            print(f"  {problem}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Measure per-session startup cost with and without the shared resources.
+
+Usage (from the journaling-app directory):
+
+    python -m bench.sessions [--db PATH] [--sessions 64] [--threads 8]
+
+Runs ``--sessions`` fresh Streamlit sessions (``AppTest``). Each session does what a page does on its first run: get a
+database manager and read the dashboard.
+
+- ``per_session``: the old behaviour, a new ``DatabaseManager`` per session
+  (``init_database`` DDL and a cold activity calendar every time).
+- ``shared``: ``utils.session.get_database``, created once per process.
+
+Then runs ``--threads`` writers and as many readers concurrently against
+the shared manager and
+checks that the in-memory calendar still matches the database. Exits
+non-zero if it does not.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from streamlit.testing.v1 import AppTest
+
+from database.db import DatabaseManager
+from utils.session import get_database
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _analysis(text: str) -> dict:
+    return {'word_count': len(text.split()), 'sentiment': {'label': 'POSITIVE', 'score': 0.9}, 'themes': []}
+
+
+def _session_script():
+    # Runs as a Streamlit script (AppTest), so cache_resource behaves as it
+    # does under ``streamlit run``
+    import time
+
+    import streamlit as st
+
+    from database.db import DatabaseManager
+    from utils.session import get_database
+
+    start = time.perf_counter()
+    if st.session_state.bench_mode == 'shared':
+        db = get_database(st.session_state.bench_db)
+    else:
+        db = DatabaseManager(st.session_state.bench_db)
+    opened = time.perf_counter()
+    db.get_dashboard(recent=3)
+    st.session_state.bench_ms = ((opened - start) * 1000, (time.perf_counter() - opened) * 1000)
+
+
+def measure_startup(mode: str, db_path: str, sessions: int) -> dict:
+    """Manager setup and first dashboard read of ``sessions`` fresh sessions"""
+    setup, first_read = [], []
+    # AppTest drives one script run at a time, so sessions start one after
+    # another here; check_consistency covers concurrent access
+    for _ in range(sessions):
+        at = AppTest.from_function(_session_script, default_timeout=60)
+        at.session_state.bench_mode = mode
+        at.session_state.bench_db = db_path
+        at.run()
+        setup_ms, read_ms = at.session_state.bench_ms
+        setup.append(setup_ms)
+        first_read.append(read_ms)
+    return {
+        'setup_ms': round(statistics.median(setup), 3),
+        'setup_p95_ms': round(_percentile(setup, 95), 3),
+        'first_read_ms': round(statistics.median(first_read), 3),
+        'first_read_p95_ms': round(_percentile(first_read, 95), 3)
+    }
+
+
+def check_consistency(db: DatabaseManager, writers: int, readers: int, writes: int) -> bool:
+    """Concurrent writes and reads; True if the shared calendar matches SQL"""
+    stop = threading.Event()
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(writes):
+                text = f"Session check {worker}-{i} with a few words"
+                entry_id = db.add_entry(text, "", _analysis(text))
+                if i % 3 == 0:
+                    db.delete_entry(entry_id)
+        except Exception as exc:
+            errors.append(exc)
+
+    def read():
+        while not stop.is_set():
+            try:
+                db.get_dashboard(recent=3)
+                db.get_streak_info()
+            except Exception as exc:
+                errors.append(exc)
+                return
+
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    for thread in reader_threads:
+        thread.start()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        list(pool.map(write, range(writers)))
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+
+    for exc in errors:
+        print(f"error: {exc!r}")
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*), COALESCE(SUM(word_count), 0) FROM entries')
+    expected = cursor.fetchone()
+    conn.close()
+
+    columns = db._activity_calendar().columns
+    actual = (int(columns['entries'].sum()), int(columns['words'].sum()))
+    print(f"entries/words: database={tuple(expected)} shared={actual}")
+    return not errors and tuple(expected) == actual
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-session startup cost with shared resources")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "journal_bench_sessions.db"))
+    parser.add_argument("--entries", type=int, default=5000, help="entries to seed the database with")
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=8, help="writers (and readers) in the consistency check")
+    parser.add_argument("--writes", type=int, default=30, help="writes per writer in the consistency check")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    seed = DatabaseManager(args.db)
+    start = date.today() - timedelta(days=args.entries // 2)
+    seed.import_entries(
+        {
+            'timestamp': datetime.combine(start + timedelta(days=i // 2), datetime.min.time()).isoformat(),
+            'content': f"Seed entry {i} about work, family and sleep",
+            'word_count': 8
+        }
+        for i in range(args.entries)
+    )
+
+    results = {
+        mode: measure_startup(mode, args.db, args.sessions)
+        for mode in ('per_session', 'shared')
+    }
+    for name, stats in results.items():
+        print(f"{name:12s} setup p50={stats['setup_ms']:8.3f} ms  p95={stats['setup_p95_ms']:8.3f} ms  "
+              f"first read p50={stats['first_read_ms']:8.3f} ms  p95={stats['first_read_p95_ms']:8.3f} ms")
+
+    ok = check_consistency(get_database(args.db), args.threads, args.threads, args.writes)
+    print("consistency: " + ("ok" if ok else "FAILED"))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""End-to-end benchmark suite over synthetic journals.
+
+Usage (from the journaling-app directory):
+
+    python -m bench.suite [--sizes 1000 10000 100000 1000000] [--repeat 5]
+                          [--out bench/results/suite.json] [--compare OLD.json]
+
+For each size a synthetic journal (``bench.synthetic``, fixed seed) is
+built once and cached under ``--data-dir``. Then:
+
+- ``db``: every DatabaseManager read, plus an add/update/themes/delete
+  write cycle. ``first_ms`` is the first call (cold in-memory stores).
+- ``helpers``: every chart and summary helper in ``utils``, fed what the
+  pages feed them.
+- ``pages``: each page script run through Streamlit's AppTest with
+  ``FastAnalyzer`` in place of the models. ``first_ms`` is a run with the
+  process caches cleared.
+
+Timings are medians (with min and p95) over ``--repeat`` runs, in ms. The
+JSON report can be diffed against an earlier one with ``--compare``.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from database.db import DatabaseManager
+from utils import analytics, exporter, helper
+from utils.figcache import figure_cache
+
+from .synthetic import FastAnalyzer, build_database
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ['app.py', 'pages/newentry.py', 'pages/pastentries.py', 'pages/insight.py', 'pages/weeklysummary.py']
+DEFAULT_SIZES = [1000, 10000]
+REGRESSION_THRESHOLD = 1.25
+
+Case = Tuple[str, Callable]
+
+
+def _rows(result):
+    if isinstance(result, (list, tuple)) or hasattr(result, 'shape'):
+        return len(result)
+    return None
+
+
+def time_case(func: Callable, repeat: int) -> Dict:
+    timings, rows = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+        rows = _rows(result)
+    ordered = sorted(timings)
+    return {
+        'first_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(ordered[0], 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'rows': rows
+    }
+
+
+def db_cases(db: DatabaseManager, today: date) -> List[Case]:
+    newest = db.get_all_entries(limit=1)[0]
+    entry_id = newest['id']
+    query = FastAnalyzer().embed(newest['content'])
+    month_ago = today - timedelta(days=30)
+    year_ago = today - timedelta(days=365)
+    return [
+        ('get_data_version', db.get_data_version),
+        ('get_statistics', db.get_statistics),
+        ('get_dashboard', lambda: db.get_dashboard(recent=3)),
+        ('get_streak_info', db.get_streak_info),
+        ('get_activity_years', db.get_activity_years),
+        ('get_year_activity', lambda: db.get_year_activity(today.year, 'mood')),
+        ('get_all_entries', db.get_all_entries),
+        ('get_all_entries_limit_50', lambda: db.get_all_entries(limit=50)),
+        ('iter_entries', lambda: sum(1 for _ in db.iter_entries())),
+        ('get_entry_by_id', lambda: db.get_entry_by_id(entry_id)),
+        ('get_entries_by_date_range_30d', lambda: db.get_entries_by_date_range(
+            month_ago.isoformat(), (today + timedelta(days=1)).isoformat())),
+        ('get_entries_pending_themes', db.get_entries_pending_themes),
+        ('get_period_summary_30d', lambda: db.get_period_summary(month_ago, today)),
+        ('get_period_summary_365d', lambda: db.get_period_summary(year_ago, today)),
+        ('get_period_comparison_week', lambda: db.get_period_comparison('week', today)),
+        ('get_period_comparison_month', lambda: db.get_period_comparison('month', today)),
+        ('get_theme_cooccurrence', db.get_theme_cooccurrence),
+        ('get_theme_sentiment', db.get_theme_sentiment),
+        ('get_theme_weekly_series', db.get_theme_weekly_series),
+        ('get_top_terms', db.get_top_terms),
+        ('get_top_terms_30d', lambda: db.get_top_terms(month_ago, today)),
+        ('get_new_terms_30d', lambda: db.get_new_terms(month_ago, today)),
+        ('get_vocabulary_growth', db.get_vocabulary_growth),
+        ('get_term_timeline', lambda: db.get_term_timeline('work')),
+        ('get_vocabulary_summary', db.get_vocabulary_summary),
+        ('get_analytics_rows', db.get_analytics_rows),
+        ('get_theme_rows', db.get_theme_rows),
+        ('count_missing_embeddings', db.count_missing_embeddings),
+        ('semantic_search', lambda: db.semantic_search(query, k=50)),
+        ('get_related_entries', lambda: db.get_related_entries(entry_id)),
+        ('get_preference', lambda: db.get_preference('bench', None))
+    ]
+
+
+def write_cycle(db: DatabaseManager, repeat: int) -> Dict[str, Dict]:
+    """Time add, update, set themes and delete on a throwaway entry"""
+    analyzer = FastAnalyzer()
+    timings = {'add_entry': [], 'update_entry': [], 'set_entry_themes': [], 'delete_entry': []}
+    for i in range(repeat):
+        text = f"Benchmark write {i}: long day at work, then dinner with family."
+        analysis = analyzer.analyze_entry(text)
+        steps = [
+            ('add_entry', lambda: db.add_entry(text, "", analysis)),
+            ('update_entry', lambda: db.update_entry(entry_id, text + " Slept well.", analysis)),
+            ('set_entry_themes', lambda: db.set_entry_themes(entry_id, [['family', 0.8]])),
+            ('delete_entry', lambda: db.delete_entry(entry_id))
+        ]
+        for name, step in steps:
+            start = time.perf_counter()
+            result = step()
+            timings[name].append((time.perf_counter() - start) * 1000)
+            if name == 'add_entry':
+                entry_id = result
+    return {
+        name: {
+            'first_ms': round(values[0], 3),
+            'median_ms': round(statistics.median(values), 3),
+            'min_ms': round(min(values), 3),
+            'p95_ms': round(sorted(values)[min(len(values) - 1, int(len(values) * 0.95))], 3),
+            'rows': None
+        }
+        for name, values in timings.items()
+    }
+
+
+def helper_cases(db: DatabaseManager, today: date, list_limit: int) -> List[Case]:
+    frame = analytics.load_analytics(db)
+    week = frame.since(7)
+    entries = db.get_all_entries(limit=list_limit)
+    summary = db.get_period_summary(today - timedelta(days=6), today)
+    cooccurrence = db.get_theme_cooccurrence()
+    weekly_series = db.get_theme_weekly_series()
+    theme_sentiment = db.get_theme_sentiment()
+    top_terms = db.get_top_terms()
+    growth = db.get_vocabulary_growth()
+    timeline = db.get_term_timeline('work')
+    calendar = db.get_year_activity(today.year)
+    ordered = frame.entries.sort_values('timestamp')
+    x = ordered['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    y = ordered['sentiment'].fillna(0).to_numpy()
+    export_path = os.path.join(tempfile.gettempdir(), 'journal_bench_export.jsonl')
+
+    def cold_analytics():
+        analytics._cache.clear()
+        return analytics.load_analytics(db)
+
+    return [
+        ('load_analytics_cold', cold_analytics),
+        ('load_analytics_warm', lambda: analytics.load_analytics(db)),
+        ('create_sentiment_timeline', lambda: helper.create_sentiment_timeline(frame)),
+        ('create_sentiment_timeline_raw', lambda: helper.create_sentiment_timeline(frame, mode='raw')),
+        ('create_theme_distribution', lambda: helper.create_theme_distribution(frame)),
+        ('create_writing_volume_chart', lambda: helper.create_writing_volume_chart(frame)),
+        ('create_theme_cooccurrence_heatmap', lambda: helper.create_theme_cooccurrence_heatmap(cooccurrence)),
+        ('create_theme_trend_heatmap', lambda: helper.create_theme_trend_heatmap(weekly_series)),
+        ('create_theme_sentiment_chart', lambda: helper.create_theme_sentiment_chart(theme_sentiment)),
+        ('create_top_terms_chart', lambda: helper.create_top_terms_chart(top_terms)),
+        ('create_vocabulary_growth_chart', lambda: helper.create_vocabulary_growth_chart(growth)),
+        ('create_term_timeline', lambda: helper.create_term_timeline(timeline, 'work')),
+        ('create_calendar_heatmap', lambda: helper.create_calendar_heatmap(calendar, today.year)),
+        ('lttb_indices', lambda: helper.lttb_indices(x, y, helper.TIMELINE_MAX_POINTS)),
+        ('generate_weekly_summary', lambda: helper.generate_weekly_summary(week)),
+        ('format_period_summary', lambda: helper.format_period_summary(summary)),
+        ('format_date', lambda: helper.format_date(entries[0]['timestamp'])),
+        ('get_streak_info', lambda: helper.get_streak_info(frame)),
+        ('export_to_markdown', lambda: helper.export_to_markdown(entries)),
+        ('export_entries_jsonl', lambda: exporter.export_entries(db, 'jsonl', path=export_path))
+    ]
+
+
+def page_timings(db: DatabaseManager, repeat: int) -> Dict[str, Dict]:
+    from streamlit.testing.v1 import AppTest
+
+    analyzer = FastAnalyzer()
+    results = {}
+    for page in PAGES:
+        timings, error = [], None
+        for i in range(repeat):
+            if i == 0:
+                analytics._cache.clear()
+                figure_cache.clear()
+            at = AppTest.from_file(os.path.join(APP_DIR, page), default_timeout=600)
+            at.session_state['db'] = db
+            at.session_state['ai_analyzer'] = analyzer
+            start = time.perf_counter()
+            at.run()
+            timings.append((time.perf_counter() - start) * 1000)
+            if at.exception:
+                error = at.exception[0].value
+                break
+        ordered = sorted(timings)
+        results[page] = {
+            'first_ms': round(timings[0], 3),
+            'median_ms': round(statistics.median(timings), 3),
+            'min_ms': round(ordered[0], 3),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+            'error': error
+        }
+    return results
+
+
+def open_database(data_dir: str, size: int, years: float, seed: int, today: date) -> Tuple[DatabaseManager, Dict]:
+    """Synthetic database for ``size`` entries, built on first use"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic-{size}-{seed}-{years:g}y-{today.isoformat()}.db")
+    if os.path.exists(path):
+        return DatabaseManager(path), {'cached': True}
+    tmp = path + '.partial'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    setup = build_database(DatabaseManager(tmp), size, years, seed, today)
+    os.replace(tmp, path)
+    return DatabaseManager(path), dict(setup, cached=False)
+
+
+def run_size(size: int, args, today: date) -> Dict:
+    db, setup = open_database(args.data_dir, size, args.years, args.seed, today)
+    print(f"\n== {size:,} entries ({'cached' if setup['cached'] else 'built'}: {db.db_path})")
+
+    results = {'setup': setup, 'db': {}, 'helpers': {}, 'pages': {}}
+    for group, cases in (('db', db_cases(db, today)), ('helpers', helper_cases(db, today, args.list_limit))):
+        for name, func in cases:
+            results[group][name] = stats = time_case(func, args.repeat)
+            print(f"  {group:8s} {name:36s} median {stats['median_ms']:10.2f} ms  first {stats['first_ms']:10.2f} ms")
+    for name, stats in write_cycle(db, args.repeat).items():
+        results['db'][name] = stats
+        print(f"  {'db':8s} {name:36s} median {stats['median_ms']:10.2f} ms")
+
+    if not args.skip_pages:
+        for page, stats in page_timings(db, args.repeat).items():
+            results['pages'][page] = stats
+            status = f"  ERROR {stats['error']}" if stats['error'] else ''
+            print(f"  {'pages':8s} {page:36s} median {stats['median_ms']:10.2f} ms  first {stats['first_ms']:10.2f} ms{status}")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=APP_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Cases whose median got slower than ``threshold`` x the baseline"""
+    regressions = []
+    for size, groups in report['sizes'].items():
+        for group in ('db', 'helpers', 'pages'):
+            for name, stats in groups.get(group, {}).items():
+                old = baseline.get('sizes', {}).get(size, {}).get(group, {}).get(name)
+                if not old or not old.get('median_ms'):
+                    continue
+                ratio = stats['median_ms'] / old['median_ms']
+                if ratio > threshold:
+                    regressions.append(f"{size} {group}.{name}: {old['median_ms']:.2f} -> "
+                                       f"{stats['median_ms']:.2f} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DB methods, helpers and pages on synthetic journals")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--list-limit", type=int, default=10000,
+                        help="entries passed to list-based helpers (export_to_markdown)")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "journal_bench"))
+    parser.add_argument("--out", default=None, help="report path (default: bench/results/suite-<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier report to check for regressions")
+    parser.add_argument("--skip-pages", action="store_true")
+    args = parser.parse_args(argv)
+
+    today = date.today()
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'params': {'seed': args.seed, 'years': args.years, 'repeat': args.repeat,
+                   'list_limit': args.list_limit, 'end_date': today.isoformat()},
+        'sizes': {}
+    }
+    for size in args.sizes:
+        report['sizes'][str(size)] = run_size(size, args, today)
+
+    out = args.out or os.path.join(APP_DIR, 'bench', 'results',
+                                   f"suite-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f))
+        print(f"{len(regressions)} regressions over {REGRESSION_THRESHOLD}x vs {args.compare}")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Deterministic synthetic journals for benchmarks and load tests.
+
+Usage (from the journaling-app directory):
+
+    python -m bench.synthetic OUT.db --entries 100000 [--years 3] [--seed 7]
+
+Entries are spread over ``--years`` ending today, with streaks and lapses
+in writing activity, evening-heavy timestamps, log-normal lengths, a
+slowly drifting mood, and zero to three themes whose popularity follows a
+Zipf curve and leans on the entry's sentiment. Text is drawn from a fixed
+vocabulary with a long Zipf tail so the term index sees realistic growth.
+The same seed, size and end date always produce the same journal.
+"""
+import argparse
+import hashlib
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from models.sentimentpipeline import AIAnalyzer, THEME_CATEGORIES
+
+EMBEDDING_DIM = 384
+
+COMMON_WORDS = '''
+day time felt feel feeling morning evening night week work home today tomorrow yesterday
+talked thought think walked made went came started finished tried wanted needed hope
+friend friends mom dad sister brother partner kids dog coffee lunch dinner breakfast
+meeting project deadline boss team email call office commute train bus car rain sun
+tired happy sad calm anxious excited grateful proud frustrated stressed relaxed worried
+sleep slept run walk gym yoga read book music movie show game cook cooked cleaned
+plan plans goal goals progress change changed better worse good bad great hard easy
+long short little big new old first last next quiet busy slow fast early late
+'''.split()
+
+# Words that lean towards each theme, so theme filters and term charts agree
+THEME_WORDS = {
+    "work stress": "deadline overtime manager review pressure inbox backlog presentation".split(),
+    "relationships": "date together argument partner trust conversation listened apology".split(),
+    "family": "parents grandma cousins visit holiday siblings kids birthday".split(),
+    "health": "doctor workout symptoms headache appointment diet stretching recovery".split(),
+    "creativity": "painting sketch writing poem guitar melody design draft".split(),
+    "personal growth": "habit journaling lesson mindset therapy reflection patience boundaries".split(),
+    "anxiety": "racing heart panic overthinking restless dread nervous spiral".split(),
+    "gratitude": "thankful blessed appreciate kindness gift lucky sunshine smile".split(),
+    "accomplishments": "finished promotion milestone launched passed award shipped completed".split(),
+    "challenges": "setback obstacle struggle failed mistake problem conflict stuck".split(),
+    "hobbies": "garden hiking photography knitting chess baking fishing puzzle".split(),
+    "social life": "party brunch drinks concert neighbors club gathering hangout".split(),
+}
+
+NEGATIVE_THEMES = {"work stress", "anxiety", "challenges"}
+
+PROMPTS = [
+    "What's one thing that made you smile today?",
+    "What challenged you today, and how did you respond?",
+    "What are you grateful for right now?",
+    "How are you feeling in this moment, and why?",
+    None
+]
+
+_SYLLABLES = "ka lo mi ren tos vel da ni pur sha te bo gri lan mo fe zu qui ar den".split()
+
+
+def _tail_words(count: int, rng: np.random.Generator) -> List[str]:
+    """Distinct made-up words for the long tail of the vocabulary"""
+    words = set()
+    while len(words) < count:
+        parts = rng.choice(_SYLLABLES, size=rng.integers(2, 5))
+        words.add(''.join(parts))
+    return sorted(words)
+
+
+def _activity_days(total_days: int, rng: np.random.Generator) -> np.ndarray:
+    """Relative chance of writing on each day: streaks, lapses and weekends"""
+    weights = np.empty(total_days)
+    active = True
+    for day in range(total_days):
+        # Streaks last ~3 weeks, lapses ~1 week
+        if rng.random() < (1 / 21 if active else 1 / 7):
+            active = not active
+        weights[day] = 1.0 if active else 0.08
+    weekday = (np.arange(total_days) + rng.integers(7)) % 7
+    weights *= np.where(weekday >= 5, 1.3, 1.0)
+    return weights / weights.sum()
+
+
+def generate_entries(n: int, years: float = 3, seed: int = 7,
+                     end: Optional[date] = None, vocabulary: int = 20000) -> Iterator[Dict]:
+    """Yield ``n`` analyzed entries, oldest first, ready for ``import_entries``"""
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    total_days = max(1, int(round(years * 365)))
+    first_day = end - timedelta(days=total_days - 1)
+
+    days = np.sort(rng.choice(total_days, size=n, p=_activity_days(total_days, rng)))
+    minutes = np.clip(rng.normal(21 * 60, 150, size=n), 6 * 60, 24 * 60 - 1).astype(int)
+    lengths = np.clip(rng.lognormal(np.log(120), 0.6, size=n), 5, 1500).astype(int)
+
+    # Mood drifts over months; the label follows it with noise
+    phase = rng.uniform(0, 2 * np.pi)
+    mood = 0.25 * np.sin(days / 90 * 2 * np.pi + phase) + rng.normal(0, 0.35, size=n)
+    positive = mood > -0.25
+    scores = np.clip(rng.beta(8, 2, size=n), 0.5, 0.9999)
+
+    tail = _tail_words(vocabulary, rng)
+    words = np.array(COMMON_WORDS + [w for ws in THEME_WORDS.values() for w in ws] + tail)
+    ranks = np.arange(1, len(words) + 1, dtype=float)
+    word_cdf = np.cumsum(1 / ranks ** 1.1)
+    word_cdf /= word_cdf[-1]
+
+    theme_p = 1 / np.arange(1, len(THEME_CATEGORIES) + 1) ** 0.8
+    theme_p /= theme_p.sum()
+    negative_boost = np.array([3.0 if t in NEGATIVE_THEMES else 1.0 for t in THEME_CATEGORIES])
+    theme_counts = rng.choice(4, size=n, p=[0.1, 0.35, 0.35, 0.2])
+
+    for i in range(n):
+        p = theme_p if positive[i] else theme_p * negative_boost / (theme_p * negative_boost).sum()
+        picked = rng.choice(len(THEME_CATEGORIES), size=theme_counts[i], replace=False, p=p)
+        themes = sorted(
+            ([THEME_CATEGORIES[t], round(float(rng.uniform(0.3, 0.95)), 4)] for t in picked),
+            key=lambda theme: -theme[1]
+        )
+
+        body = words[np.searchsorted(word_cdf, rng.random(lengths[i]))].tolist()
+        for theme, _ in themes:
+            hint = THEME_WORDS[theme]
+            for slot in rng.integers(0, lengths[i], size=max(1, lengths[i] // 25)):
+                body[slot] = hint[rng.integers(len(hint))]
+        sentences = []
+        for start in range(0, len(body), 12):
+            sentence = ' '.join(body[start:start + 12])
+            sentences.append(sentence[:1].upper() + sentence[1:] + '.')
+        # The index keeps content unique (import_entries skips duplicates)
+        content = ' '.join(sentences) + f" (#{seed}-{i})"
+
+        timestamp = datetime.combine(first_day + timedelta(days=int(days[i])), datetime.min.time())
+        timestamp += timedelta(minutes=int(minutes[i]), seconds=int(rng.integers(60)))
+        word_count = len(content.split())
+        yield {
+            'timestamp': timestamp.isoformat(),
+            'content': content,
+            'prompt': PROMPTS[rng.integers(len(PROMPTS))],
+            'word_count': word_count,
+            'token_count': int(word_count * 1.3),
+            'unique_words': len(set(body)),
+            'sentiment_label': 'POSITIVE' if positive[i] else 'NEGATIVE',
+            'sentiment_score': float(scores[i]),
+            'themes': themes
+        }
+
+
+def _vector(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class FastAnalyzer(AIAnalyzer):
+    """AIAnalyzer with the models replaced by instant deterministic stand-ins.
+
+    Keeps the real analysis flow (stages, deferral, prompts) so pages run
+    their normal data path without loading any model.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.tokenizer = _WhitespaceTokenizer()
+        self.sentiment_analyzer = self._sentiment
+        self.theme_classifier = self._themes
+        self.embedder = True
+
+    @staticmethod
+    def _sentiment(text: str) -> List[Dict]:
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=2).digest()
+        return [{'label': 'POSITIVE' if digest[0] % 3 else 'NEGATIVE', 'score': 0.5 + digest[1] / 512}]
+
+    @staticmethod
+    def _themes(text: str, labels: List[str], multi_label: bool = True) -> Dict:
+        text = text.lower()
+        scores = [min(0.95, 0.2 + 0.15 * sum(word in text for word in THEME_WORDS.get(label, [])))
+                  for label in labels]
+        order = sorted(range(len(labels)), key=lambda i: -scores[i])
+        return {'labels': [labels[i] for i in order], 'scores': [scores[i] for i in order]}
+
+    def embed_batch(self, texts: List[str]) -> Optional[np.ndarray]:
+        if not texts:
+            return None
+        return np.stack([_vector(text, self.dim) for text in texts])
+
+
+class _WhitespaceTokenizer:
+    def encode(self, text: str, add_special_tokens: bool = False) -> List[str]:
+        return text.split()
+
+
+def build_database(db, n: int, years: float = 3, seed: int = 7, end: Optional[date] = None,
+                   embeddings: bool = True, batch_size: int = 5000) -> Dict:
+    """Fill ``db`` (a DatabaseManager) with a synthetic journal; returns timings"""
+    start = time.perf_counter()
+    result = db.import_entries(generate_entries(n, years, seed, end), batch_size=batch_size)
+    imported = time.perf_counter() - start
+
+    indexed = 0
+    if embeddings:
+        analyzer = FastAnalyzer()
+        indexed = db.backfill_embeddings(analyzer.embed_batch, batch_size=1000)
+    return {
+        'entries': result['inserted'],
+        'import_s': round(imported, 3),
+        'embeddings': indexed,
+        'embed_s': round(time.perf_counter() - start - imported, 3)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic journal database")
+    parser.add_argument("out", help="database file to create")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="last day (default: today)")
+    parser.add_argument("--no-embeddings", action="store_true", help="leave the semantic index empty")
+    args = parser.parse_args(argv)
+
+    from database.db import DatabaseManager
+
+    if os.path.exists(args.out):
+        parser.error(f"{args.out} already exists")
+    stats = build_database(DatabaseManager(args.out), args.entries, args.years, args.seed,
+                           args.end, not args.no_embeddings)
+    print(f"{stats['entries']:,} entries in {stats['import_s']:.1f}s, "
+          f"{stats['embeddings']:,} embeddings in {stats['embed_s']:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
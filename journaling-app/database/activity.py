@@ -0,0 +1,293 @@
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .derived import DELETED_ENTRIES, DerivedStore
+
+
+def _day(entry: Dict) -> str:
+    # Matches SQLite's DATE(timestamp) for ISO timestamps
+    return entry['timestamp'][:10]
+
+
+def _sentiment(entry: Dict) -> float:
+    if not entry.get('sentiment_label') or entry.get('sentiment_score') is None:
+        return 0.0
+    score = entry['sentiment_score']
+    return score if entry['sentiment_label'] == 'POSITIVE' else -score
+
+
+def _calendar_delta(entry: Dict, sign: int) -> tuple:
+    """(entries, words, analyzed, sentiment_sum) that ``entry`` adds to its day"""
+    analyzed = entry.get('sentiment_label') in ('POSITIVE', 'NEGATIVE')
+    return sign, sign * (entry.get('word_count') or 0), sign * analyzed, sign * _sentiment(entry)
+
+
+# daily_rollup's columns for each day of the entries matching {where}
+_DAY_TOTALS = '''
+    SELECT DATE(timestamp) AS day, COUNT(*) AS entries,
+           COALESCE(SUM(word_count), 0) AS words,
+           COUNT(CASE WHEN sentiment_label = 'POSITIVE' THEN 1 END) AS positive,
+           COUNT(CASE WHEN sentiment_label = 'NEGATIVE' THEN 1 END) AS negative,
+           COALESCE(SUM(CASE
+               WHEN sentiment_label = 'POSITIVE' THEN sentiment_score
+               WHEN sentiment_label IS NOT NULL THEN -sentiment_score
+           END), 0) AS sentiment_sum
+    FROM entries
+    WHERE {where}
+    GROUP BY DATE(timestamp)
+'''
+
+# Per-day columns kept by ActivityCalendar
+CALENDAR_COLUMNS = {
+    'entries': np.int32,
+    'words': np.int32,
+    'analyzed': np.int32,
+    'sentiment_sum': np.float64
+}
+
+
+class ActivityCalendar:
+    """Per-day totals in dense arrays indexed by day ordinal.
+
+    ``counts`` (entries per day) doubles as the daily activity bitmap;
+    keeping counts rather than bits lets deletes be applied incrementally.
+    ``words``, ``analyzed`` and ``sentiment_sum`` back the calendar
+    heatmap. Streak figures are derived with NumPy run-length operations
+    once per change and cached, so each query afterwards is O(1).
+    """
+
+    def __init__(self):
+        self.origin = None  # date ordinal of index 0
+        self.columns = {name: np.zeros(0, dtype=dtype) for name, dtype in CALENDAR_COLUMNS.items()}
+        self._summary = None
+        self._lock = threading.RLock()
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.columns['entries']
+
+    def _grow(self, before: int, after: int):
+        self.columns = {
+            name: np.concatenate((
+                np.zeros(before, dtype=column.dtype), column, np.zeros(after, dtype=column.dtype)
+            ))
+            for name, column in self.columns.items()
+        }
+
+    def _slot(self, ordinal: int) -> int:
+        """Index for ``ordinal``, growing the arrays (amortized) if needed"""
+        if self.origin is None:
+            self.origin = ordinal
+            self._grow(0, 64)
+        size = len(self.counts)
+        if ordinal < self.origin:
+            grow = max(self.origin - ordinal, size)
+            self._grow(grow, 0)
+            self.origin -= grow
+            size += grow
+        index = ordinal - self.origin
+        if index >= size:
+            self._grow(0, max(index + 1 - size, size))
+        return index
+
+    def add(self, day: str, entries: int = 1, words: int = 0, analyzed: int = 0, sentiment_sum: float = 0.0):
+        """Record ``entries`` more (or fewer, if negative) entries on ``day``"""
+        with self._lock:
+            index = self._slot(date.fromisoformat(day).toordinal())
+            columns = self.columns
+            columns['entries'][index] = max(0, columns['entries'][index] + entries)
+            columns['words'][index] = max(0, columns['words'][index] + words)
+            columns['analyzed'][index] = max(0, columns['analyzed'][index] + analyzed)
+            columns['sentiment_sum'][index] += sentiment_sum
+            if columns['analyzed'][index] == 0:
+                columns['sentiment_sum'][index] = 0.0
+            self._summary = None
+
+    def _summarize(self) -> Dict:
+        active = self.counts > 0
+        total_days = int(np.count_nonzero(active))
+        if total_days == 0:
+            return {'current': 0, 'longest': 0, 'total_days': 0}
+
+        # Run starts/ends are where the padded bitmap flips 0->1 / 1->0
+        edges = np.diff(np.concatenate(([0], active.view(np.int8), [0])))
+        lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        return {
+            'current': int(lengths[-1]),  # run ending at the most recent active day
+            'longest': int(lengths.max()),
+            'total_days': total_days
+        }
+
+    def summary(self) -> Dict:
+        """Current streak, longest streak and total active days"""
+        with self._lock:
+            if self._summary is None:
+                self._summary = self._summarize()
+            return dict(self._summary)
+
+    def years(self) -> List[int]:
+        """Every year from the first to the last active day"""
+        with self._lock:
+            active = np.flatnonzero(self.counts > 0)
+            if not len(active):
+                return []
+            first = date.fromordinal(self.origin + int(active[0])).year
+            last = date.fromordinal(self.origin + int(active[-1])).year
+        return list(range(first, last + 1))
+
+    def _year_slice(self, name: str, year: int) -> np.ndarray:
+        start = date(year, 1, 1).toordinal()
+        end = date(year + 1, 1, 1).toordinal()
+        column = self.columns[name]
+        out = np.zeros(end - start, dtype=column.dtype)
+        if self.origin is None:
+            return out
+        lo = max(start, self.origin)
+        hi = min(end, self.origin + len(column))
+        if lo < hi:
+            out[lo - start:hi - start] = column[lo - self.origin:hi - self.origin]
+        return out
+
+    def year(self, year: int, metric: str = 'entries') -> np.ndarray:
+        """Values of ``metric`` for every day of ``year`` (index 0 = January 1).
+
+        ``metric`` is 'entries', 'words' or 'mood' (mean signed sentiment,
+        NaN on days without analyzed entries).
+        """
+        with self._lock:
+            if metric == 'mood':
+                analyzed = self._year_slice('analyzed', year)
+                total = self._year_slice('sentiment_sum', year)
+                mood = np.full(len(analyzed), np.nan)
+                np.divide(total, analyzed, out=mood, where=analyzed > 0)
+                return mood
+            if metric not in ('entries', 'words'):
+                raise ValueError(f"Unknown calendar metric: {metric}")
+            return self._year_slice(metric, year)
+
+
+class DailyRollupStore(DerivedStore):
+    """Per-day totals (entries, words, sentiment) plus the activity calendar.
+
+    The ``daily_rollup`` table is updated by delta on every write, so
+    statistics and streaks never need to scan ``entries``. The in-memory
+    calendar is loaded from it once and patched after each commit.
+    """
+
+    name = 'daily_rollup'
+    backfillable = True
+
+    def __init__(self):
+        self.calendar = ActivityCalendar()
+        self.version = None
+
+    def create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_rollup (
+                day TEXT PRIMARY KEY,
+                entries INTEGER NOT NULL DEFAULT 0,
+                words INTEGER NOT NULL DEFAULT 0,
+                positive INTEGER NOT NULL DEFAULT 0,
+                negative INTEGER NOT NULL DEFAULT 0,
+                sentiment_sum REAL NOT NULL DEFAULT 0
+            )
+        ''')
+
+    def _add(self, cursor, entry: Dict, sign: int):
+        label = entry.get('sentiment_label')
+        cursor.execute('''
+            INSERT INTO daily_rollup (day, entries, words, positive, negative, sentiment_sum)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                entries = entries + excluded.entries,
+                words = words + excluded.words,
+                positive = positive + excluded.positive,
+                negative = negative + excluded.negative,
+                sentiment_sum = sentiment_sum + excluded.sentiment_sum
+        ''', (
+            _day(entry),
+            sign,
+            sign * (entry.get('word_count') or 0),
+            sign * (label == 'POSITIVE'),
+            sign * (label == 'NEGATIVE'),
+            sign * _sentiment(entry)
+        ))
+
+    def apply(self, cursor, old, new):
+        if old is not None:
+            self._add(cursor, old, -1)
+        if new is not None:
+            self._add(cursor, new, 1)
+        if old is not None:
+            cursor.execute('DELETE FROM daily_rollup WHERE day = ? AND entries <= 0', (_day(old),))
+
+    def remove_entries(self, cursor):
+        # One delta per affected day, however many of its entries go
+        cursor.execute(f'''
+            UPDATE daily_rollup SET
+                entries = daily_rollup.entries - gone.entries,
+                words = daily_rollup.words - gone.words,
+                positive = daily_rollup.positive - gone.positive,
+                negative = daily_rollup.negative - gone.negative,
+                sentiment_sum = daily_rollup.sentiment_sum - gone.sentiment_sum
+            FROM ({_DAY_TOTALS.format(where=f'id IN (SELECT id FROM {DELETED_ENTRIES})')}) AS gone
+            WHERE daily_rollup.day = gone.day
+        ''')
+        cursor.execute(f'''
+            DELETE FROM daily_rollup
+            WHERE day IN (SELECT day FROM {DELETED_ENTRIES}) AND entries <= 0
+        ''')
+
+    def reset(self, cursor):
+        cursor.execute('DELETE FROM daily_rollup')
+
+    @staticmethod
+    def days(backfilled: Optional[int] = None) -> Tuple[str, Tuple]:
+        """Table expression (and its parameters) with ``daily_rollup``'s rows.
+
+        While the store's backfill runs (``backfilled`` is its cursor), the
+        entries it has not reached yet are added from ``entries``, so totals
+        and streaks are complete before the backfill finishes.
+        """
+        if backfilled is None:
+            return 'daily_rollup', ()
+        return f'''(
+            SELECT day, SUM(entries) AS entries, SUM(words) AS words, SUM(positive) AS positive,
+                   SUM(negative) AS negative, SUM(sentiment_sum) AS sentiment_sum
+            FROM (
+                SELECT day, entries, words, positive, negative, sentiment_sum FROM daily_rollup
+                UNION ALL
+                {_DAY_TOTALS.format(where='id > ?')}
+            )
+            GROUP BY day
+        )''', (backfilled,)
+
+    def on_committed(self, old, new, version_before, version_after):
+        if self.version != version_before:
+            self.invalidate()
+            return
+        if old is not None:
+            self.calendar.add(_day(old), *_calendar_delta(old, -1))
+        if new is not None:
+            self.calendar.add(_day(new), *_calendar_delta(new, 1))
+        self.version = version_after
+
+    def invalidate(self):
+        self.calendar = ActivityCalendar()
+        self.version = None
+
+    def load(self, conn, version: int, backfilled: Optional[int] = None):
+        calendar = ActivityCalendar()
+        cursor = conn.cursor()
+        days, params = self.days(backfilled)
+        cursor.execute(f'''
+            SELECT day, entries, words, positive + negative AS analyzed, sentiment_sum
+            FROM {days} WHERE entries > 0
+        ''', params)
+        for row in cursor.fetchall():
+            calendar.add(row['day'], row['entries'], row['words'], row['analyzed'], row['sentiment_sum'])
+        self.calendar = calendar
+        self.version = version
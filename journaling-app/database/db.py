@@ -1,86 +1,347 @@
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 import os
 
+from utils.metrics import ENTRIES_SAVED
+from utils.perf import span, timed
+
+from .activity import DailyRollupStore
+from .derived import DELETED_ENTRIES
+from .hashes import ContentHashStore, content_hash
+from .maintenance import reclaim_space
+from .migrations import advance_backfill, finish_backfill, migrate, pending_backfills
+from .rollups import PeriodRollupStore, period_bounds, week_start
+from .terms import TermIndexStore
+from .themes import ThemeStatsStore
+from .vectors import EmbeddingStore, encode_vector
+
 class DatabaseManager:
+    # sqlite3.Connection subclass used for every connection (bench.load
+    # swaps in one that measures lock waits)
+    connection_factory = sqlite3.Connection
+    
     def __init__(self, db_path: str = "database.db"):
         """Initialize database connection and create tables if they don't exist"""
         self.db_path = db_path
+        # One manager may be shared by every session in the process; this
+        # guards the derived stores' in-memory state (loads and patches)
+        self._lock = threading.RLock()
+        self.embeddings = EmbeddingStore()
+        self.daily = DailyRollupStore()
+        self.hashes = ContentHashStore()
+        self.periods = PeriodRollupStore()
+        self.theme_stats = ThemeStatsStore()
+        self.terms = TermIndexStore()
+        # Tables/indexes kept in step with every write to `entries`
+        self.derived_stores = [
+            self.embeddings, self.daily, self.hashes, self.periods, self.theme_stats, self.terms
+        ]
+        # (data version, count) of the last count_missing_embeddings
+        self._missing_embeddings: Optional[Tuple[int, int]] = None
         self.init_database()
     
     def get_connection(self):
         """Create a new database connection"""
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, factory=self.connection_factory)
         conn.row_factory = sqlite3.Row  # Return rows as dictionaries
         return conn
     
     def init_database(self):
-        """Create tables if they don't exist"""
+        """Apply schema migrations and set up the derived stores"""
         conn = self.get_connection()
+        # Creates the derived stores' tables too, and schedules their
+        # backfills on journals that already have entries
+        migrate(conn)
         cursor = conn.cursor()
-        
-        # Journal entries table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                content TEXT NOT NULL,
-                prompt TEXT,
-                word_count INTEGER,
-                token_count INTEGER,
-                unique_words INTEGER,
-                sentiment_label TEXT,
-                sentiment_score REAL,
-                themes TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # User preferences table
+        self._backfilling = bool(pending_backfills(cursor))
+        conn.commit()
+        conn.close()
+    
+    def _read_version(self, cursor) -> int:
+        cursor.execute("SELECT value FROM meta WHERE key = 'data_version'")
+        row = cursor.fetchone()
+        return int(row['value']) if row else 0
+    
+    def _bump_version(self, cursor) -> Tuple[int, int]:
+        """Increment the data version inside the current write transaction"""
+        before = self._read_version(cursor)
         cursor.execute('''
-            CREATE TABLE IF NOT EXISTS preferences (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL
-            )
-        ''')
-        
+            INSERT OR REPLACE INTO meta (key, value) VALUES ('data_version', ?)
+        ''', (str(before + 1),))
+        return before, before + 1
+    
+    @timed()
+    def get_data_version(self) -> int:
+        """Monotonic counter bumped by every write to entries"""
+        conn = self.get_connection()
+        version = self._read_version(conn.cursor())
+        conn.close()
+        return version
+    
+    def _fetch_entry(self, cursor, entry_id: int) -> Optional[Dict]:
+        cursor.execute('SELECT * FROM entries WHERE id = ?', (entry_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        entry = dict(row)
+        entry['themes'] = json.loads(entry['themes']) if entry['themes'] else []
+        return entry
+    
+    def _backfill_cursors(self, cursor) -> Dict[str, int]:
+        """Running backfills and their cursors (no query once all are done)"""
+        return pending_backfills(cursor) if self._backfilling else {}
+    
+    def _apply_stores(self, cursor, old: Optional[Dict], new: Optional[Dict], backfills: Dict[str, int]):
+        entry_id = (new or old)['id']
+        for store in self.derived_stores:
+            # Entries past a backfill's cursor are counted when it gets there
+            if entry_id > backfills.get(store.name, entry_id):
+                continue
+            store.apply(cursor, old, new)
+    
+    def _apply_derived(self, cursor, old: Optional[Dict], new: Optional[Dict]) -> Tuple[int, int]:
+        """Update derived stores for one entry change and bump the data version"""
+        self._apply_stores(cursor, old, new, self._backfill_cursors(cursor))
+        return self._bump_version(cursor)
+    
+    def _after_commit(self, old: Optional[Dict], new: Optional[Dict], versions: Tuple[int, int]):
+        with self._lock:
+            for store in self.derived_stores:
+                store.on_committed(old, new, *versions)
+    
+    def _invalidate_stores(self):
+        with self._lock:
+            for store in self.derived_stores:
+                store.invalidate()
+    
+    def _fresh(self, store):
+        """Return ``store`` with its in-memory state loaded at the current data version"""
+        conn = self.get_connection()
+        try:
+            # Version and rows must come from the same snapshot. The read
+            # lock is taken before the store lock, and nothing waits on
+            # SQLite while holding the store lock, so writers (which patch
+            # the stores after committing) cannot deadlock with readers.
+            conn.execute('BEGIN')
+            cursor = conn.cursor()
+            version = self._read_version(cursor)
+            backfilled = self._backfill_cursors(cursor).get(store.name)
+            with self._lock:
+                if store.version != version:
+                    store.load(conn, version, backfilled)
+        finally:
+            conn.rollback()
+            conn.close()
+        return store
+    
+    def _backfill_batch(self, name: str, batch_size: int) -> Tuple[int, bool]:
+        """Feed the next ``batch_size`` entries to store ``name``; (entries, finished)"""
+        store = next(store for store in self.derived_stores if store.name == name)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        last_id = pending_backfills(cursor).get(name)
+        if last_id is None:
+            conn.rollback()
+            conn.close()
+            return 0, True
+        
+        cursor.execute('SELECT * FROM entries WHERE id > ? ORDER BY id LIMIT ?', (last_id, batch_size))
+        rows = cursor.fetchall()
+        for row in rows:
+            entry = dict(row)
+            entry['themes'] = json.loads(entry['themes']) if entry['themes'] else []
+            store.apply(cursor, None, entry)
+        finished = len(rows) < batch_size
+        if finished:
+            finish_backfill(cursor, name)
+        else:
+            advance_backfill(cursor, name, rows[-1]['id'])
+        before, after = self._bump_version(cursor)
         conn.commit()
         conn.close()
+        
+        with self._lock:
+            # Only this store's rows changed; the others stay valid
+            for other in self.derived_stores:
+                if other is store:
+                    other.invalidate()
+                elif getattr(other, 'version', None) == before:
+                    other.version = after
+        return len(rows), finished
+    
+    @timed()
+    def run_backfills(self, batch_size: int = 200, pause: float = 0.05,
+                      max_seconds: Optional[float] = None) -> Dict[str, int]:
+        """Run pending backfills in short transactions; returns entries done per backfill.
+
+        Each batch holds the write lock only for ``batch_size`` entries and
+        records its progress, so entry writes interleave with the backfill
+        (``pause`` seconds between batches) and an interrupted run resumes
+        where it stopped. Stops early after ``max_seconds``.
+        """
+        deadline = None if max_seconds is None else time.monotonic() + max_seconds
+        conn = self.get_connection()
+        pending = pending_backfills(conn.cursor())
+        conn.close()
+        
+        done = {}
+        for name in pending:
+            done[name] = 0
+            while True:
+                count, finished = self._backfill_batch(name, batch_size)
+                done[name] += count
+                if finished or (deadline is not None and time.monotonic() > deadline):
+                    break
+                time.sleep(pause)
+            if not finished:
+                return done
+        
+        self._backfilling = False
+        return done
     
+    def start_backfills(self, **kwargs) -> Optional[threading.Thread]:
+        """Run pending backfills on a daemon thread (None if there are none)"""
+        if not self._backfilling:
+            return None
+        thread = threading.Thread(target=self.run_backfills, kwargs=kwargs,
+                                  name='journal-backfill', daemon=True)
+        thread.start()
+        return thread
+    
+    @timed()
     def add_entry(self, content: str, prompt: str, analysis: Dict) -> int:
         """Add a new journal entry"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         # Extract analysis data
-        sentiment = analysis.get('sentiment', {})
+        sentiment = analysis.get('sentiment') or {}
+        # None means theme detection was deferred; stored as NULL until it runs
         themes = analysis.get('themes', [])
         
+        new = {
+            'timestamp': datetime.now().isoformat(),
+            'content': content,
+            'prompt': prompt,
+            'word_count': analysis.get('word_count', 0),
+            'token_count': analysis.get('token_count', 0),
+            'unique_words': analysis.get('unique_words', 0),
+            'sentiment_label': sentiment.get('label'),
+            'sentiment_score': sentiment.get('score'),
+            'themes': themes,
+            'embedding': analysis.get('embedding')
+        }
+        
         cursor.execute('''
             INSERT INTO entries (
                 timestamp, content, prompt, word_count, token_count, 
                 unique_words, sentiment_label, sentiment_score, themes
             ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
-            datetime.now().isoformat(),
+            new['timestamp'],
             content,
             prompt,
-            analysis.get('word_count', 0),
-            analysis.get('token_count', 0),
-            analysis.get('unique_words', 0),
-            sentiment.get('label'),
-            sentiment.get('score'),
-            json.dumps(themes)
+            new['word_count'],
+            new['token_count'],
+            new['unique_words'],
+            new['sentiment_label'],
+            new['sentiment_score'],
+            json.dumps(themes) if themes is not None else None
         ))
         
         entry_id = cursor.lastrowid
+        new['id'] = entry_id
+        versions = self._apply_derived(cursor, None, new)
         conn.commit()
         conn.close()
         
+        self._after_commit(None, new, versions)
+        ENTRIES_SAVED.inc('editor')
         return entry_id
     
+    @timed()
+    def import_entries(self, records: Iterable[Dict], batch_size: int = 1000) -> Dict:
+        """Bulk-insert already-analyzed entries, skipping duplicate content.
+
+        ``records`` are entry dicts as produced by the exporter (timestamp,
+        content, prompt, metrics, sentiment and themes are kept as-is). Each
+        batch is one transaction; ``records`` is consumed lazily so memory
+        stays bounded by ``batch_size``.
+        """
+        inserted = skipped = 0
+        batch = []
+        # Hashes of entries the content_hashes backfill has not reached yet
+        # (read up to entry id ``unhashed_to``), which have no hash rows
+        unhashed = set()
+        unhashed_to = 0
+        
+        def flush():
+            nonlocal inserted, skipped, unhashed_to
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            # Cursors are read inside the write transaction, so no backfill
+            # batch runs in between
+            cursor.execute('BEGIN IMMEDIATE')
+            backfills = self._backfill_cursors(cursor)
+            hashed_to = backfills.get(self.hashes.name)
+            if hashed_to is not None:
+                cursor.execute('SELECT id, content FROM entries WHERE id > ? ORDER BY id',
+                               (max(hashed_to, unhashed_to),))
+                for row in cursor.fetchall():
+                    unhashed.add(content_hash(row['content']))
+                    unhashed_to = row['id']
+            for record in batch:
+                digest = content_hash(record['content'])
+                if digest in unhashed or ContentHashStore.exists(cursor, digest):
+                    skipped += 1
+                    continue
+                themes = record.get('themes')
+                cursor.execute('''
+                    INSERT INTO entries (
+                        timestamp, content, prompt, word_count, token_count,
+                        unique_words, sentiment_label, sentiment_score, themes
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    record['timestamp'],
+                    record['content'],
+                    record.get('prompt'),
+                    record.get('word_count'),
+                    record.get('token_count'),
+                    record.get('unique_words'),
+                    record.get('sentiment_label'),
+                    record.get('sentiment_score'),
+                    json.dumps(themes) if themes is not None else None
+                ))
+                new = dict(record, id=cursor.lastrowid, embedding=None)
+                self._apply_stores(cursor, None, new, backfills)
+                if hashed_to is not None:
+                    # Past the cursor, so no hash row was written for it either
+                    unhashed.add(digest)
+                inserted += 1
+            self._bump_version(cursor)
+            conn.commit()
+            conn.close()
+            batch.clear()
+        
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        
+        # Reload in-memory state lazily rather than patching it per entry
+        self._invalidate_stores()
+        
+        ENTRIES_SAVED.inc('import', amount=inserted)
+        return {'inserted': inserted, 'skipped': skipped}
+    
+    @timed()
     def get_all_entries(self, limit: Optional[int] = None) -> List[Dict]:
         """Retrieve all entries, optionally limited"""
         conn = self.get_connection()
@@ -95,17 +356,39 @@ class DatabaseManager:
         conn.close()
         
         entries = []
-        for row in rows:
-            entry = dict(row)
-            # Parse JSON themes back to list
-            if entry['themes']:
-                entry['themes'] = json.loads(entry['themes'])
-            else:
-                entry['themes'] = []
-            entries.append(entry)
+        with span('db.get_all_entries.decode') as info:
+            for row in rows:
+                entry = dict(row)
+                # Parse JSON themes back to list
+                if entry['themes']:
+                    entry['themes'] = json.loads(entry['themes'])
+                else:
+                    entry['themes'] = []
+                entries.append(entry)
+            info['rows'] = len(entries)
         
         return entries
     
+    def iter_entries(self, newest_first: bool = True, batch_size: int = 500) -> Iterator[Dict]:
+        """Stream entries in timestamp order without loading them all at once"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        order = 'DESC' if newest_first else 'ASC'
+        try:
+            cursor.execute(f'SELECT * FROM entries ORDER BY timestamp {order}')
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    entry = dict(row)
+                    entry['themes'] = json.loads(entry['themes']) if entry['themes'] else []
+                    yield entry
+        finally:
+            conn.close()
+    
+    @timed()
     def get_entry_by_id(self, entry_id: int) -> Optional[Dict]:
         """Get a specific entry by ID"""
         conn = self.get_connection()
@@ -122,6 +405,7 @@ class DatabaseManager:
             return entry
         return None
     
+    @timed()
     def get_entries_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
         """Get entries within a date range"""
         conn = self.get_connection()
@@ -145,14 +429,21 @@ class DatabaseManager:
         
         return entries
     
+    @timed()
     def update_entry(self, entry_id: int, content: str, analysis: Dict) -> bool:
         """Update an existing entry"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        sentiment = analysis.get('sentiment', {})
+        sentiment = analysis.get('sentiment') or {}
+        # None means theme detection was deferred; stored as NULL until it runs
         themes = analysis.get('themes', [])
         
+        old = self._fetch_entry(cursor, entry_id)
+        if old is None:
+            conn.close()
+            return False
+        
         cursor.execute('''
             UPDATE entries 
             SET content = ?, word_count = ?, token_count = ?, 
@@ -166,87 +457,516 @@ class DatabaseManager:
             analysis.get('unique_words', 0),
             sentiment.get('label'),
             sentiment.get('score'),
-            json.dumps(themes),
+            json.dumps(themes) if themes is not None else None,
             entry_id
         ))
         
         updated = cursor.rowcount > 0
+        new = dict(old)
+        new.update({
+            'content': content,
+            'word_count': analysis.get('word_count', 0),
+            'token_count': analysis.get('token_count', 0),
+            'unique_words': analysis.get('unique_words', 0),
+            'sentiment_label': sentiment.get('label'),
+            'sentiment_score': sentiment.get('score'),
+            'themes': themes,
+            'embedding': analysis.get('embedding')
+        })
+        versions = self._apply_derived(cursor, old, new)
         conn.commit()
         conn.close()
         
+        self._after_commit(old, new, versions)
         return updated
     
+    @timed()
+    def set_entry_themes(self, entry_id: int, themes: List) -> bool:
+        """Store themes for an entry (used when theme detection ran deferred)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        old = self._fetch_entry(cursor, entry_id)
+        if old is None:
+            conn.close()
+            return False
+        
+        cursor.execute('UPDATE entries SET themes = ? WHERE id = ?', (json.dumps(themes), entry_id))
+        new = dict(old, themes=themes)
+        versions = self._apply_derived(cursor, old, new)
+        conn.commit()
+        conn.close()
+        
+        self._after_commit(old, new, versions)
+        return True
+    
+    @timed()
+    def get_entries_pending_themes(self, limit: int = 50) -> List[Dict]:
+        """Entries whose theme detection was deferred and has not run yet"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, content FROM entries 
+            WHERE themes IS NULL 
+            ORDER BY id 
+            LIMIT ?
+        ''', (limit,))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    @timed()
     def delete_entry(self, entry_id: int) -> bool:
         """Delete an entry"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        old = self._fetch_entry(cursor, entry_id)
+        if old is None:
+            conn.close()
+            return False
+        
         cursor.execute('DELETE FROM entries WHERE id = ?', (entry_id,))
         deleted = cursor.rowcount > 0
+        versions = self._apply_derived(cursor, old, None)
+        conn.commit()
+        conn.close()
+        
+        self._after_commit(old, None, versions)
+        return deleted
+    
+    def _delete_batch(self, where: str, params: List, limit: int) -> int:
+        """Delete up to ``limit`` entries matching ``where`` in one transaction"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(f'''
+            CREATE TEMP TABLE IF NOT EXISTS {DELETED_ENTRIES} (
+                id INTEGER PRIMARY KEY,
+                day TEXT NOT NULL
+            )
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {DELETED_ENTRIES} (id, day)
+            SELECT id, DATE(timestamp) FROM entries WHERE {where} LIMIT ?
+        ''', params + [limit])
+        count = cursor.rowcount
+        if not count:
+            conn.rollback()
+            conn.close()
+            return 0
+        
+        backfills = self._backfill_cursors(cursor)
+        if backfills:
+            cursor.execute(f'SELECT id, day FROM {DELETED_ENTRIES}')
+            batch = [tuple(row) for row in cursor.fetchall()]
+        for store in self.derived_stores:
+            last_id = backfills.get(store.name)
+            if last_id is None:
+                store.remove_entries(cursor)
+                continue
+            # Entries past the backfill's cursor were never counted by this
+            # store, and once deleted the backfill will not reach them
+            cursor.execute(f'DELETE FROM {DELETED_ENTRIES} WHERE id > ?', (last_id,))
+            store.remove_entries(cursor)
+            cursor.executemany(f'INSERT OR IGNORE INTO {DELETED_ENTRIES} (id, day) VALUES (?, ?)', batch)
+        cursor.execute(f'DELETE FROM entries WHERE id IN (SELECT id FROM {DELETED_ENTRIES})')
+        self._bump_version(cursor)
         conn.commit()
         conn.close()
         
+        self._invalidate_stores()
+        return count
+    
+    @timed()
+    def delete_entries(self, ids: Optional[Iterable[int]] = None, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None, batch_size: int = 500, pause: float = 0.01,
+                       reclaim: bool = True) -> int:
+        """Delete entries by id and/or timestamp range; returns how many were deleted.
+
+        ``start_date`` and ``end_date`` bound ``timestamp`` as in
+        get_entries_by_date_range (either may be left open); with ``ids`` as
+        well, only listed entries in the range go. Entries are deleted in
+        batches of ``batch_size``, each a short write transaction in which
+        the derived stores are updated with a few set-based statements
+        (``remove_entries``), so other writes interleave with a large
+        delete (``pause`` seconds between batches). A store that is still
+        being backfilled only has the entries its backfill already passed
+        removed. Freed pages are then
+        returned to the file system in the background (``reclaim_space``).
+        """
+        if ids is None and start_date is None and end_date is None:
+            raise ValueError("No entries selected; use clear_all_entries to delete everything")
+        conditions, params = [], []
+        if start_date is not None:
+            conditions.append('timestamp >= ?')
+            params.append(start_date)
+        if end_date is not None:
+            conditions.append('timestamp <= ?')
+            params.append(end_date)
+        
+        deleted = 0
+        if ids is not None:
+            ids = sorted(set(ids))
+            for i in range(0, len(ids), batch_size):
+                chunk = ids[i:i + batch_size]
+                where = ' AND '.join([f"id IN ({','.join('?' * len(chunk))})"] + conditions)
+                if i:
+                    time.sleep(pause)
+                deleted += self._delete_batch(where, chunk + params, len(chunk))
+        else:
+            while True:
+                count = self._delete_batch(' AND '.join(conditions), params, batch_size)
+                deleted += count
+                if count < batch_size:
+                    break
+                time.sleep(pause)
+        
+        if deleted and reclaim:
+            reclaim_space(self)
         return deleted
     
+    def _totals(self, cursor, backfilled: Optional[int] = None) -> Dict:
+        """Entry, word and sentiment totals from the daily rollup (see DailyRollupStore.days)"""
+        days, params = self.daily.days(backfilled)
+        cursor.execute(f'''
+            SELECT COALESCE(SUM(entries), 0) AS total_entries,
+                   COALESCE(SUM(words), 0) AS total_words,
+                   SUM(sentiment_sum) / NULLIF(SUM(positive + negative), 0) AS avg_sentiment
+            FROM {days}
+        ''', params)
+        return dict(cursor.fetchone())
+    
+    @timed()
     def get_statistics(self) -> Dict:
         """Get overall statistics"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        # One snapshot, so a backfill batch cannot land between the two reads
+        cursor.execute('BEGIN')
+        try:
+            stats = self._totals(cursor, self._backfill_cursors(cursor).get(self.daily.name))
+        finally:
+            conn.rollback()
+            conn.close()
+        
+        stats['current_streak'] = self.get_streak_info()['current']
+        return stats
+    
+    @timed()
+    def get_dashboard(self, recent: int = 3, year: Optional[int] = None) -> Dict:
+        """Everything the home page shows, read in a single transaction.
+
+        Totals come from the daily rollup, streaks and the ``year`` activity
+        array (default: this year) from the in-memory calendar, which is
+        reloaded from the same snapshot if the data changed, and the
+        ``recent`` newest entries from the timestamp index.
+        """
+        year = year or datetime.now().year
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            version = self._read_version(cursor)
+            backfilled = self._backfill_cursors(cursor).get(self.daily.name)
+            dashboard = self._totals(cursor, backfilled)
+            
+            cursor.execute('SELECT * FROM entries ORDER BY timestamp DESC LIMIT ?', (recent,))
+            recent_entries = []
+            for row in cursor.fetchall():
+                entry = dict(row)
+                entry['themes'] = json.loads(entry['themes']) if entry['themes'] else []
+                recent_entries.append(entry)
+            
+            with self._lock:
+                if self.daily.version != version:
+                    self.daily.load(conn, version, backfilled)
+                calendar = self.daily.calendar
+        finally:
+            conn.rollback()
+            conn.close()
+        
+        streak = calendar.summary()
+        dashboard.update({
+            'version': version,
+            'current_streak': streak['current'],
+            'streak': streak,
+            'recent_entries': recent_entries,
+            'year': year,
+            'year_activity': calendar.year(year)
+        })
+        return dashboard
+    
+    def _activity_calendar(self):
+        """Return the daily activity calendar, (re)loading it if the data changed"""
+        return self._fresh(self.daily).calendar
+    
+    @timed()
+    def get_streak_info(self) -> Dict:
+        """Current streak, longest streak and total days journaled"""
+        return self._activity_calendar().summary()
+    
+    @timed()
+    def get_year_activity(self, year: int, metric: str = 'entries'):
+        """Per-day ``metric`` for every day of ``year`` (NumPy array, Jan 1 first).
+
+        ``metric`` is 'entries', 'words' or 'mood' (mean signed sentiment,
+        NaN where nothing was analyzed).
+        """
+        return self._activity_calendar().year(year, metric)
+    
+    def get_activity_years(self) -> List[int]:
+        """Years spanned by the journal, oldest first"""
+        return self._activity_calendar().years()
+    
+    @timed()
+    def get_period_summary(self, start_date: date, end_date: date, theme_limit: Optional[int] = None) -> Dict:
+        """Entries, words, sentiment split and top themes for a date range.
+
+        Served from the day/week/month rollups, so the cost depends on the
+        length of the range, not the number of entries in it.
+        """
+        conn = self.get_connection()
+        summary = PeriodRollupStore.summarize(conn.cursor(), start_date, end_date, theme_limit)
+        conn.close()
+        return summary
+    
+    @timed()
+    def get_period_comparison(self, grain: str = 'week', day: Optional[date] = None) -> Dict:
+        """Summary of the week/month containing ``day`` next to the previous one"""
+        day = day or datetime.now().date()
+        start, end = period_bounds(grain, day)
+        previous_start, previous_end = period_bounds(grain, start - timedelta(days=1))
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        current = PeriodRollupStore.summarize(cursor, start, end, theme_limit=5)
+        previous = PeriodRollupStore.summarize(cursor, previous_start, previous_end, theme_limit=5)
+        conn.close()
         
-        # Total entries
-        cursor.execute('SELECT COUNT(*) as count FROM entries')
-        total_entries = cursor.fetchone()['count']
+        return {'grain': grain, 'current': current, 'previous': previous}
+    
+    @timed()
+    def get_theme_cooccurrence(self, top_n: int = 12) -> Dict:
+        """How often the most common themes appear in the same entry.
+
+        Returns ``themes`` (most common first) and a symmetric ``matrix``
+        whose diagonal is the number of entries with each theme.
+        """
+        conn = self.get_connection()
+        result = ThemeStatsStore.cooccurrence(conn.cursor(), top_n)
+        conn.close()
+        return result
+    
+    @timed()
+    def get_theme_sentiment(self) -> List[Dict]:
+        """Mean sentiment and sentiment correlation for each theme"""
+        conn = self.get_connection()
+        stats = ThemeStatsStore.sentiment(conn.cursor())
+        conn.close()
+        return stats
+    
+    @timed()
+    def get_theme_weekly_series(self, weeks: int = 26, themes: Optional[List[str]] = None) -> List[Tuple[str, str, int]]:
+        """(week_start, theme, entries) rows for the last ``weeks`` weeks"""
+        first_week = week_start(datetime.now().date()) - timedelta(weeks=weeks - 1)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        query = "SELECT start, theme, entries FROM theme_rollup WHERE grain = 'week' AND start >= ?"
+        params = [first_week.isoformat()]
+        if themes:
+            query += f" AND theme IN ({','.join('?' * len(themes))})"
+            params += list(themes)
+        cursor.execute(query + ' ORDER BY start', params)
+        rows = [tuple(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return rows
+    
+    @timed()
+    def get_top_terms(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                      limit: int = 20) -> List[Tuple[str, int, int]]:
+        """Most used words as (term, count, entries), all time or in a date range"""
+        conn = self.get_connection()
+        rows = TermIndexStore.top_terms(conn.cursor(), start_date, end_date, limit)
+        conn.close()
+        return rows
+    
+    @timed()
+    def get_new_terms(self, start_date: date, end_date: date, limit: int = 20) -> List[Tuple[str, int, str]]:
+        """Words first used in a date range as (term, count, first_day)"""
+        conn = self.get_connection()
+        rows = TermIndexStore.new_terms(conn.cursor(), start_date, end_date, limit)
+        conn.close()
+        return rows
+    
+    @timed()
+    def get_vocabulary_growth(self) -> List[Tuple[str, int]]:
+        """(day, new words) for each day that added to the vocabulary"""
+        conn = self.get_connection()
+        rows = TermIndexStore.vocabulary_growth(conn.cursor())
+        conn.close()
+        return rows
+    
+    @timed()
+    def get_term_timeline(self, term: str) -> List[Tuple[str, int]]:
+        """(day, uses) of a single word"""
+        conn = self.get_connection()
+        rows = TermIndexStore.term_timeline(conn.cursor(), term)
+        conn.close()
+        return rows
+    
+    @timed()
+    def get_vocabulary_summary(self) -> Dict:
+        """Distinct words and total indexed (non-stopword) words"""
+        conn = self.get_connection()
+        summary = TermIndexStore.summary(conn.cursor())
+        conn.close()
+        return summary
+    
+    @timed()
+    def clear_all_entries(self, reclaim: bool = True):
+        """Delete all entries (use with caution!)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Unfiltered DELETEs on tables without triggers take SQLite's
+        # truncate path: whole B-trees are dropped without visiting rows,
+        # so this is quick however large the journal is
+        cursor.execute('DELETE FROM entries')
+        for store in self.derived_stores:
+            store.reset(cursor)
+        self._bump_version(cursor)
+        conn.commit()
+        conn.close()
         
-        # Total words
-        cursor.execute('SELECT SUM(word_count) as total FROM entries')
-        total_words = cursor.fetchone()['total'] or 0
+        self._invalidate_stores()
+        if reclaim:
+            reclaim_space(self)
+    
+    @timed()
+    def get_analytics_rows(self) -> List[tuple]:
+        """Lightweight per-entry columns for analytics (no content)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
-        # Average sentiment
         cursor.execute('''
-            SELECT AVG(CASE 
-                WHEN sentiment_label = 'POSITIVE' THEN sentiment_score 
-                ELSE -sentiment_score 
-            END) as avg_sentiment
+            SELECT id, timestamp, word_count, sentiment_label, sentiment_score 
             FROM entries 
-            WHERE sentiment_label IS NOT NULL
+            ORDER BY timestamp DESC
         ''')
-        avg_sentiment = cursor.fetchone()['avg_sentiment']
+        rows = [tuple(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return rows
+    
+    @timed()
+    def get_theme_rows(self) -> List[tuple]:
+        """One (entry_id, theme, score) row per detected theme, exploded in SQL"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
-        # Current streak
         cursor.execute('''
-            SELECT DISTINCT DATE(timestamp) as date 
-            FROM entries 
-            ORDER BY date DESC
+            SELECT e.id,
+                   CASE WHEN t.type = 'array' THEN json_extract(t.value, '$[0]') ELSE t.value END,
+                   CASE WHEN t.type = 'array' THEN json_extract(t.value, '$[1]') END
+            FROM entries e, json_each(e.themes) t 
+            WHERE e.themes IS NOT NULL
         ''')
-        dates = [row['date'] for row in cursor.fetchall()]
-        
-        streak = 0
-        if dates:
-            streak = 1
-            for i in range(len(dates) - 1):
-                date1 = datetime.fromisoformat(dates[i])
-                date2 = datetime.fromisoformat(dates[i + 1])
-                if (date1 - date2).days == 1:
-                    streak += 1
-                else:
-                    break
-        
+        rows = [tuple(row) for row in cursor.fetchall()]
         conn.close()
         
-        return {
-            'total_entries': total_entries,
-            'total_words': total_words,
-            'avg_sentiment': avg_sentiment,
-            'current_streak': streak
-        }
+        return rows
     
-    def clear_all_entries(self):
-        """Delete all entries (use with caution!)"""
+    def _vector_index(self):
+        """Return the embedding index, (re)loading it if the data changed"""
+        return self._fresh(self.embeddings).index
+    
+    @timed()
+    def semantic_search(self, query_vector, k: int = 10) -> List[Tuple[int, float]]:
+        """Find the entries closest in meaning to a query embedding"""
+        return self._vector_index().search(query_vector, k)
+    
+    @timed()
+    def get_related_entries(self, entry_id: int, k: int = 5) -> List[Tuple[int, float]]:
+        """Find the entries most similar to an existing entry"""
+        index = self._vector_index()
+        vector = index.get(entry_id)
+        if vector is None:
+            return []
+        return index.search(vector, k, exclude=entry_id)
+    
+    def count_missing_embeddings(self) -> int:
+        """Number of entries that are not yet in the semantic index.
+        
+        The count scans every entry, so it is cached until the data
+        version changes (pages call this on every rerun).
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM entries')
-        conn.commit()
-        conn.close()
+        cursor.execute('BEGIN')
+        try:
+            version = self._read_version(cursor)
+            cached = self._missing_embeddings
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            
+            cursor.execute('''
+                SELECT COUNT(*) as count FROM entries 
+                WHERE id NOT IN (SELECT entry_id FROM entry_embeddings)
+            ''')
+            count = cursor.fetchone()['count']
+        finally:
+            conn.rollback()
+            conn.close()
+        
+        self._missing_embeddings = (version, count)
+        return count
+    
+    @timed()
+    def backfill_embeddings(self, embed_fn, batch_size: int = 32) -> int:
+        """Embed entries missing from the semantic index.
+        
+        ``embed_fn`` takes a list of texts and returns one vector per text.
+        Each batch is committed separately so the write lock is held briefly.
+        """
+        indexed = 0
+        while True:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, content FROM entries 
+                WHERE id NOT IN (SELECT entry_id FROM entry_embeddings)
+                LIMIT ?
+            ''', (batch_size,))
+            rows = cursor.fetchall()
+            conn.close()
+            
+            if not rows:
+                break
+            
+            vectors = embed_fn([row['content'] for row in rows])
+            if vectors is None:
+                break
+            
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO entry_embeddings (entry_id, dim, vector)
+                VALUES (?, ?, ?)
+            ''', [
+                (row['id'], len(vector), encode_vector(vector))
+                for row, vector in zip(rows, vectors)
+            ])
+            self._bump_version(cursor)
+            conn.commit()
+            conn.close()
+            
+            indexed += len(rows)
+        
+        return indexed
     
     def get_preference(self, key: str, default=None):
         """Get a user preference"""
@@ -0,0 +1,66 @@
+import json
+from typing import Dict, List, Optional
+
+# Temporary table (id, day) of the entries a bulk delete is removing
+DELETED_ENTRIES = 'temp.deleted_entries'
+
+
+def deleted_entries(cursor) -> List[Dict]:
+    """Rows of the entries listed in ``DELETED_ENTRIES``, as ``apply`` receives them"""
+    cursor.execute(f'SELECT * FROM entries WHERE id IN (SELECT id FROM {DELETED_ENTRIES})')
+    entries = []
+    for row in cursor.fetchall():
+        entry = dict(row)
+        entry['themes'] = json.loads(entry['themes']) if entry['themes'] else []
+        entries.append(entry)
+    return entries
+
+
+class DerivedStore:
+    """Base class for data derived from the entries table.
+
+    DatabaseManager calls ``apply`` inside the same transaction as every
+    entry write, with the row before (``old``) and after (``new``) the
+    change. Inserts have ``old=None`` and deletes have ``new=None``.
+    Bulk deletes call ``remove_entries`` once per batch instead.
+    Stores that also keep an in-memory structure override ``on_committed``,
+    which runs once the transaction has been committed.
+    """
+
+    name = 'derived'
+    # Whether the store can be filled from existing entries by feeding each
+    # one to ``apply`` (see DatabaseManager.run_backfills)
+    backfillable = False
+
+    def create_schema(self, cursor):
+        """Create the tables and indexes backing this store (run by its migration)"""
+
+    def apply(self, cursor, old: Optional[Dict], new: Optional[Dict]):
+        """Update derived rows for a single entry change"""
+
+    def remove_entries(self, cursor):
+        """Remove derived rows for every entry in ``DELETED_ENTRIES``.
+
+        Runs before the entries themselves are deleted, so their rows can
+        still be read. The default applies each deletion in turn; stores
+        override it with a few set-based statements per batch.
+        """
+        for entry in deleted_entries(cursor):
+            self.apply(cursor, entry, None)
+
+    def reset(self, cursor):
+        """Remove all derived rows (used when every entry is deleted)"""
+
+    def on_committed(self, old: Optional[Dict], new: Optional[Dict],
+                     version_before: int, version_after: int):
+        """Sync in-memory state after a committed write"""
+
+    def invalidate(self):
+        """Drop in-memory state so it is reloaded on next use"""
+
+    def load(self, conn, version: int, backfilled: Optional[int] = None):
+        """Load in-memory state as of data ``version`` (stores that keep one).
+
+        ``backfilled`` is the cursor of the store's running backfill, if any:
+        entries past it are not in the store's tables yet.
+        """
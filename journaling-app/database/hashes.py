@@ -0,0 +1,48 @@
+import hashlib
+
+from .derived import DELETED_ENTRIES, DerivedStore
+
+
+def content_hash(content: str) -> str:
+    """Stable fingerprint of an entry's text, ignoring surrounding whitespace"""
+    return hashlib.sha256(content.strip().encode('utf-8')).hexdigest()
+
+
+class ContentHashStore(DerivedStore):
+    """Content hash of every entry, indexed for duplicate detection.
+
+    Lets importers skip entries that already exist with one indexed lookup
+    instead of comparing against the full text of the journal.
+    """
+
+    name = 'content_hashes'
+    backfillable = True
+
+    def create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS content_hashes (
+                entry_id INTEGER PRIMARY KEY,
+                hash TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_content_hashes_hash ON content_hashes(hash)')
+
+    def apply(self, cursor, old, new):
+        if new is None:
+            cursor.execute('DELETE FROM content_hashes WHERE entry_id = ?', (old['id'],))
+        elif old is None or old.get('content') != new.get('content'):
+            cursor.execute(
+                'INSERT OR REPLACE INTO content_hashes (entry_id, hash) VALUES (?, ?)',
+                (new['id'], content_hash(new['content']))
+            )
+
+    def remove_entries(self, cursor):
+        cursor.execute(f'DELETE FROM content_hashes WHERE entry_id IN (SELECT id FROM {DELETED_ENTRIES})')
+
+    def reset(self, cursor):
+        cursor.execute('DELETE FROM content_hashes')
+
+    @staticmethod
+    def exists(cursor, digest: str) -> bool:
+        cursor.execute('SELECT 1 FROM content_hashes WHERE hash = ? LIMIT 1', (digest,))
+        return cursor.fetchone() is not None
@@ -0,0 +1,276 @@
+"""Background SQLite housekeeping for a journal database.
+
+A run does, in order:
+
+- ``ANALYZE`` on the first run, then ``PRAGMA optimize``, which refreshes
+  planner statistics for tables that changed a lot since (both with a
+  bounded ``analysis_limit``, so they sample rather than read every row).
+- Full ``VACUUM``, once, on journals migration 4 switched to
+  ``auto_vacuum=INCREMENTAL``: the setting only takes effect once the file
+  is rebuilt. Unlike everything else here this is not bounded by the
+  budget, which is why it waits for an idle run instead of startup.
+- Incremental vacuum: returns free pages (left by deletes) to the file
+  system, a few hundred at a time until the freelist is empty or the run's
+  time budget is spent.
+- WAL checkpoint: ``PASSIVE`` normally, ``TRUNCATE`` once the write-ahead
+  log has grown past ``wal_limit`` bytes.
+- ``PRAGMA quick_check`` every ``integrity_interval`` seconds.
+
+The scheduler only starts a run when no page has rerun for ``idle``
+seconds (it watches ``utils.perf`` records), and at most every
+``interval`` seconds unless woken early by ``reclaim_space`` after a bulk
+delete. Configured from the environment:
+
+- ``JOURNAL_MAINTENANCE_INTERVAL``: seconds between runs (default 600;
+  0 disables the scheduler).
+- ``JOURNAL_MAINTENANCE_IDLE``: seconds without page activity before a
+  run starts (default 30).
+- ``JOURNAL_MAINTENANCE_BUDGET``: seconds a run may spend vacuuming
+  (default 2).
+- ``JOURNAL_INTEGRITY_INTERVAL``: seconds between integrity checks
+  (default 86400).
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.metrics import DB_FILE_BYTES, DB_FREELIST_PAGES, DB_INTEGRITY_OK
+from utils.perf import BACKGROUND, recorder, span
+
+from .migrations import VACUUM_PENDING
+
+WAL_LIMIT = 64 * 1024 * 1024
+
+
+def file_stats(conn, db_path: str) -> Dict:
+    """Size of the database file and its write-ahead log, and free pages"""
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    wal_path = db_path + '-wal'
+    return {
+        'file_bytes': os.path.getsize(db_path) if os.path.exists(db_path) else 0,
+        'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_pages': conn.execute('PRAGMA freelist_count').fetchone()[0]
+    }
+
+
+def optimize(conn):
+    """Refresh query planner statistics (sampling at most ~400 rows per index)"""
+    conn.execute('PRAGMA analysis_limit = 400')
+    analyzed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+    # optimize only re-analyzes tables that already have statistics
+    # (0x10000: every table, not just the ones this connection queried)
+    conn.execute('PRAGMA optimize(0x10002)' if analyzed else 'ANALYZE')
+
+
+class DatabaseMaintenance:
+    """Runs the housekeeping tasks above for one DatabaseManager.
+
+    ``run`` can be called directly (it ignores idleness); ``start`` runs it
+    from a daemon thread on the configured schedule, and ``request_run``
+    moves the next scheduled run up to the next idle moment. Reports of
+    recent runs are kept in ``reports`` (newest last).
+    """
+
+    def __init__(self, db, interval: float = 600.0, idle: float = 30.0, budget: float = 2.0,
+                 integrity_interval: float = 86400.0, vacuum_step: int = 256,
+                 wal_limit: int = WAL_LIMIT):
+        self.db = db
+        self.interval = interval
+        self.idle = idle
+        self.budget = budget
+        self.integrity_interval = integrity_interval
+        self.vacuum_step = vacuum_step
+        self.wal_limit = wal_limit
+        self.reports = deque(maxlen=20)
+        self.last_activity = 0.0
+        self._last_integrity: Optional[float] = None
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _on_record(self, op: str, seconds: float, page: str):
+        if page != BACKGROUND:
+            self.last_activity = time.monotonic()
+
+    def is_idle(self) -> bool:
+        return time.monotonic() - self.last_activity >= self.idle
+
+    def _vacuum(self, conn, deadline: float) -> int:
+        """Free pages returned to the file system before ``deadline``"""
+        freed = 0
+        while time.monotonic() < deadline:
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if not free:
+                break
+            # Each step is its own short write transaction
+            conn.execute(f'PRAGMA incremental_vacuum({int(self.vacuum_step)})').fetchall()
+            step = free - conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if step <= 0:
+                # auto_vacuum is not INCREMENTAL yet (full VACUUM pending)
+                break
+            freed += step
+        return freed
+
+    def _full_vacuum(self, conn) -> bool:
+        """Rebuild the file if migration 4 asked for it; True if it ran"""
+        if not conn.execute('SELECT 1 FROM meta WHERE key = ?', (VACUUM_PENDING,)).fetchone():
+            return False
+        # The mode set by the migration belongs to its connection; VACUUM
+        # applies the one set on this one
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        with conn:
+            conn.execute('DELETE FROM meta WHERE key = ?', (VACUUM_PENDING,))
+        return True
+
+    def reclaim(self, budget: Optional[float] = None) -> int:
+        """Incremental vacuum only, until the freelist is empty or ``budget`` runs out"""
+        with self._run_lock:
+            conn = self.db.get_connection()
+            try:
+                with span('db.maintenance.vacuum'):
+                    freed = self._vacuum(conn, time.monotonic() + (float('inf') if budget is None else budget))
+                stats = file_stats(conn, self.db.db_path)
+            finally:
+                conn.close()
+            DB_FILE_BYTES.set(stats['file_bytes'], 'main')
+            DB_FREELIST_PAGES.set(stats['freelist_pages'])
+            return freed
+
+    def run(self, integrity: Optional[bool] = None) -> Dict:
+        """Run every task once; ``integrity`` forces (or skips) the check"""
+        with self._run_lock:
+            started = time.monotonic()
+            conn = self.db.get_connection()
+            report = {'time': datetime.now().isoformat(timespec='seconds'), 'seconds': {}}
+            try:
+                report['before'] = file_stats(conn, self.db.db_path)
+
+                with span('db.maintenance.optimize'):
+                    task_start = time.monotonic()
+                    optimize(conn)
+                    report['seconds']['optimize'] = time.monotonic() - task_start
+
+                with span('db.maintenance.full_vacuum'):
+                    task_start = time.monotonic()
+                    if self._full_vacuum(conn):
+                        report['seconds']['full_vacuum'] = time.monotonic() - task_start
+
+                with span('db.maintenance.vacuum'):
+                    task_start = time.monotonic()
+                    report['freed_pages'] = self._vacuum(conn, task_start + self.budget)
+                    report['seconds']['vacuum'] = time.monotonic() - task_start
+
+                with span('db.maintenance.checkpoint'):
+                    task_start = time.monotonic()
+                    mode = 'TRUNCATE' if report['before']['wal_bytes'] > self.wal_limit else 'PASSIVE'
+                    busy, log, done = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+                    report['checkpoint'] = {'mode': mode, 'busy': bool(busy), 'wal_pages': log,
+                                            'checkpointed': done}
+                    report['seconds']['checkpoint'] = time.monotonic() - task_start
+
+                if integrity is None:
+                    integrity = (self._last_integrity is None
+                                 or started - self._last_integrity >= self.integrity_interval)
+                if integrity:
+                    with span('db.maintenance.integrity'):
+                        task_start = time.monotonic()
+                        problems: List[str] = [row[0] for row in conn.execute('PRAGMA quick_check')]
+                        report['integrity'] = 'ok' if problems == ['ok'] else problems
+                        report['seconds']['integrity'] = time.monotonic() - task_start
+                    self._last_integrity = started
+                    DB_INTEGRITY_OK.set(1 if report['integrity'] == 'ok' else 0)
+
+                report['after'] = file_stats(conn, self.db.db_path)
+            finally:
+                conn.close()
+
+            report['seconds']['total'] = time.monotonic() - started
+            DB_FILE_BYTES.set(report['after']['file_bytes'], 'main')
+            DB_FILE_BYTES.set(report['after']['wal_bytes'], 'wal')
+            DB_FREELIST_PAGES.set(report['after']['freelist_pages'])
+            self.reports.append(report)
+            return report
+
+    def _loop(self):
+        next_run = time.monotonic() + min(self.interval, self.idle)
+        while True:
+            if self._wake.wait(max(0.0, next_run - time.monotonic())):
+                self._wake.clear()
+            if not self.is_idle():
+                # Try again once the current burst of activity has died down
+                next_run = self.last_activity + self.idle
+                continue
+            next_run = time.monotonic() + self.interval
+            try:
+                report = self.run()
+                if report['freed_pages'] and report['after']['freelist_pages']:
+                    # Out of budget with pages left (a bulk delete): carry on
+                    # at the next idle moment instead of a full interval later
+                    next_run = time.monotonic() + self.idle
+            except Exception as e:  # the file may be busy or locked; retry next time
+                self.reports.append({'time': datetime.now().isoformat(timespec='seconds'),
+                                     'error': str(e)})
+
+    def request_run(self):
+        """Run at the next idle moment rather than waiting out ``interval``"""
+        self._wake.set()
+
+    def start(self) -> threading.Thread:
+        """Run on the schedule from a daemon thread (once)"""
+        if self._thread is None:
+            recorder.listeners.append(self._on_record)
+            self._thread = threading.Thread(target=self._loop, name='db-maintenance', daemon=True)
+            self._thread.start()
+        return self._thread
+
+
+_schedulers: Dict[str, DatabaseMaintenance] = {}
+_schedulers_lock = threading.Lock()
+
+
+def start_maintenance(db) -> Optional[DatabaseMaintenance]:
+    """Start the scheduler for ``db`` as configured in the environment (once per file)"""
+    interval = float(os.environ.get('JOURNAL_MAINTENANCE_INTERVAL', '600'))
+    if interval <= 0:
+        return None
+    with _schedulers_lock:
+        path = os.path.abspath(db.db_path)
+        if path not in _schedulers:
+            _schedulers[path] = DatabaseMaintenance(
+                db,
+                interval=interval,
+                idle=float(os.environ.get('JOURNAL_MAINTENANCE_IDLE', '30')),
+                budget=float(os.environ.get('JOURNAL_MAINTENANCE_BUDGET', '2')),
+                integrity_interval=float(os.environ.get('JOURNAL_INTEGRITY_INTERVAL', '86400'))
+            )
+            _schedulers[path].start()
+        return _schedulers[path]
+
+
+def maintenance_for(db) -> Optional[DatabaseMaintenance]:
+    """The running scheduler for ``db``'s file, if any"""
+    return _schedulers.get(os.path.abspath(db.db_path))
+
+
+def reclaim_space(db) -> Optional[threading.Thread]:
+    """Return pages freed by a bulk delete to the file system, in the background.
+
+    With a scheduler running this only wakes it, so the vacuum still waits
+    for an idle moment and keeps to its budget. Otherwise a one-off daemon
+    thread vacuums until the freelist is empty (each step is a short
+    transaction of its own) and is returned.
+    """
+    scheduler = maintenance_for(db)
+    if scheduler is not None:
+        scheduler.request_run()
+        return None
+    thread = threading.Thread(target=DatabaseMaintenance(db).reclaim, name='db-reclaim', daemon=True)
+    thread.start()
+    return thread
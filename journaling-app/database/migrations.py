@@ -0,0 +1,206 @@
+"""Versioned schema migrations and batched backfills.
+
+The schema version lives in ``PRAGMA user_version``. Each migration has a
+version number and runs once, in its own transaction, in version order;
+the transaction also stores the new version, so a crash leaves the file
+at the last completed step (the few steps SQLite will not run inside a
+transaction run just before it). Journals created before migrations existed
+are at version 0 and replay every step, which is why migrations use
+``IF NOT EXISTS``.
+
+Derived tables (see ``database.derived``) are created by migrations too,
+one per store (``derived_store``); a later change to a store's format is
+a new migration that resets it. Work that touches every entry (filling a
+new derived table, recomputing one after a format change) is not done
+inside the migration, since that would hold the write lock for the whole
+run. The migration schedules a backfill instead: a named cursor (the last
+entry id done) kept in ``meta``. The backfill then runs in short batches,
+each in its own transaction that also advances the cursor, so it can stop
+and resume at any point (see ``DatabaseManager.run_backfills``).
+"""
+from typing import Callable, Dict, List, Tuple
+
+from .activity import DailyRollupStore
+from .hashes import ContentHashStore
+from .rollups import PeriodRollupStore
+from .terms import TermIndexStore
+from .themes import ThemeStatsStore
+from .vectors import EmbeddingStore
+
+# (version, description, upgrade(cursor), transactional), in version order
+MIGRATIONS: List[Tuple[int, str, Callable, bool]] = []
+
+BACKFILL_PREFIX = 'backfill:'
+# Set while the file still needs the full VACUUM that switches on auto_vacuum
+VACUUM_PENDING = 'vacuum:pending'
+
+
+def migration(version: int, description: str, transactional: bool = True):
+    """Register ``upgrade(cursor)`` as schema version ``version``.
+
+    Steps that SQLite refuses inside a transaction (changing the journal
+    mode) pass ``transactional=False``; they run on their own and must be
+    safe to repeat, since the version is stored afterwards.
+    """
+    def register(upgrade):
+        if MIGRATIONS and version <= MIGRATIONS[-1][0]:
+            raise ValueError(f"Migration {version} registered after {MIGRATIONS[-1][0]}")
+        MIGRATIONS.append((version, description, upgrade, transactional))
+        return upgrade
+    return register
+
+
+@migration(1, "entries, preferences and meta tables")
+def _baseline(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            content TEXT NOT NULL,
+            prompt TEXT,
+            word_count INTEGER,
+            token_count INTEGER,
+            unique_words INTEGER,
+            sentiment_label TEXT,
+            sentiment_score REAL,
+            themes TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS preferences (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+    # Internal bookkeeping (data version, derived store builds, backfills)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+    ''')
+
+
+@migration(2, "timestamp index for newest-first listings and date ranges")
+def _timestamp_index(cursor):
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_timestamp ON entries(timestamp)')
+
+
+@migration(3, "partial index for entries awaiting theme detection")
+def _pending_themes_index(cursor):
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_entries_pending_themes
+        ON entries(id) WHERE themes IS NULL
+    ''')
+
+
+@migration(4, "incremental auto-vacuum, so maintenance can return freed pages")
+def _incremental_vacuum(cursor):
+    cursor.execute('PRAGMA auto_vacuum')
+    if cursor.fetchone()[0] != 2:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        # Only takes effect once the file is rebuilt. That full VACUUM
+        # rewrites the whole file, so it is left to the maintenance
+        # scheduler's next idle run rather than done at startup
+        cursor.execute(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (VACUUM_PENDING, '1')
+        )
+
+
+@migration(5, "write-ahead log, so page reads do not wait on writes", transactional=False)
+def _wal(cursor):
+    cursor.execute('PRAGMA journal_mode = WAL')
+
+
+def derived_store(version: int, store_class, description: str):
+    """Register creating ``store_class``'s tables as schema version ``version``.
+
+    Journals that already have entries get a backfill for the store, if it
+    can be filled from them (``backfillable``); the embeddings are filled
+    by ``DatabaseManager.backfill_embeddings`` instead, since that needs
+    the model.
+    """
+    def upgrade(cursor):
+        store = store_class()
+        store.create_schema(cursor)
+        # Journals at version 5 built their stores on startup instead,
+        # flagging each one (dropped by migration 12)
+        cursor.execute('SELECT 1 FROM meta WHERE key = ?', ('built:' + store.name,))
+        if cursor.fetchone():
+            return
+        cursor.execute('SELECT 1 FROM entries LIMIT 1')
+        if cursor.fetchone() and store.backfillable:
+            store.reset(cursor)
+            schedule_backfill(cursor, store.name)
+    migration(version, description)(upgrade)
+
+
+derived_store(6, EmbeddingStore, "entry embeddings for semantic search")
+derived_store(7, DailyRollupStore, "daily activity rollup")
+derived_store(8, ContentHashStore, "content hashes for import deduplication")
+derived_store(9, PeriodRollupStore, "weekly and monthly rollups")
+derived_store(10, ThemeStatsStore, "theme co-occurrence and sentiment stats")
+derived_store(11, TermIndexStore, "term index")
+
+
+@migration(12, "drop the per-store build flags the derived store migrations replace")
+def _drop_built_flags(cursor):
+    cursor.execute("DELETE FROM meta WHERE key > 'built:' AND key < 'built;'")
+
+
+def schema_version(cursor) -> int:
+    cursor.execute('PRAGMA user_version')
+    return cursor.fetchone()[0]
+
+
+def migrate(conn) -> List[int]:
+    """Apply pending migrations in order; returns the versions applied.
+
+    Each step takes the write lock up front (``BEGIN IMMEDIATE``) and
+    re-reads the version, so processes starting together do not run the
+    same step twice.
+    """
+    cursor = conn.cursor()
+    applied = []
+    for version, _, upgrade, transactional in MIGRATIONS:
+        if version <= schema_version(cursor):
+            continue
+        if not transactional:
+            upgrade(cursor)
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            if version > schema_version(cursor):
+                if transactional:
+                    upgrade(cursor)
+                cursor.execute(f'PRAGMA user_version = {int(version)}')
+                applied.append(version)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+
+def schedule_backfill(cursor, name: str):
+    """Start (or restart) backfill ``name`` from the first entry"""
+    cursor.execute(
+        'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (BACKFILL_PREFIX + name, '0')
+    )
+
+
+def pending_backfills(cursor) -> Dict[str, int]:
+    """{name: last entry id done} for every unfinished backfill"""
+    cursor.execute(
+        "SELECT key, value FROM meta WHERE key > ? AND key < ?",
+        (BACKFILL_PREFIX, BACKFILL_PREFIX[:-1] + ';')
+    )
+    return {key[len(BACKFILL_PREFIX):]: int(value) for key, value in cursor.fetchall()}
+
+
+def advance_backfill(cursor, name: str, last_id: int):
+    cursor.execute('UPDATE meta SET value = ? WHERE key = ?', (str(last_id), BACKFILL_PREFIX + name))
+
+
+def finish_backfill(cursor, name: str):
+    cursor.execute('DELETE FROM meta WHERE key = ?', (BACKFILL_PREFIX + name,))
@@ -0,0 +1,303 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .activity import _day, _sentiment
+from .derived import DELETED_ENTRIES, DerivedStore
+
+GRAINS = ('week', 'month')
+
+# SQL for the start of the day, week and month containing column {0}
+_STARTS = {
+    'day': 'DATE({0})',
+    'week': "DATE({0}, 'weekday 0', '-6 days')",
+    'month': "DATE({0}, 'start of month')"
+}
+
+
+def week_start(day: date) -> date:
+    """Monday of the (ISO) week containing ``day``"""
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def period_bounds(grain: str, day: date) -> Tuple[date, date]:
+    """First and last day of the ``grain`` period containing ``day``"""
+    if grain == 'week':
+        start = week_start(day)
+        return start, start + timedelta(days=6)
+    if grain == 'month':
+        start = month_start(day)
+        return start, next_month(start) - timedelta(days=1)
+    raise ValueError(f"Unknown period: {grain}")
+
+
+def cover_range(start: date, end: date) -> List[Tuple[str, date]]:
+    """Split [start, end] into the fewest whole months, weeks and days.
+
+    Each piece maps to one rollup row, so summarizing any range costs
+    roughly one row per month plus a handful of edge weeks and days.
+    """
+    pieces = []
+    day = start
+    while day <= end:
+        if day.day == 1 and next_month(day) - timedelta(days=1) <= end:
+            pieces.append(('month', day))
+            day = next_month(day)
+        elif day.weekday() == 0 and day + timedelta(days=6) <= end:
+            pieces.append(('week', day))
+            day += timedelta(days=7)
+        else:
+            pieces.append(('day', day))
+            day += timedelta(days=1)
+    return pieces
+
+
+def theme_names(themes) -> List[str]:
+    """Distinct theme names of an entry (themes may be pairs or plain names)"""
+    names = []
+    for theme in themes or []:
+        name = theme[0] if isinstance(theme, (list, tuple)) else str(theme)
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _starts(entry: Dict) -> Dict[str, str]:
+    day = date.fromisoformat(_day(entry))
+    return {
+        'day': day.isoformat(),
+        'week': week_start(day).isoformat(),
+        'month': month_start(day).isoformat()
+    }
+
+
+def _keys_cte(count: int) -> str:
+    """``keys(grain, start)`` CTE over ``count`` bound pairs.
+
+    Summaries join it with CROSS JOIN, which keeps the keys as the outer
+    loop so each rollup row is found through the primary key.
+    """
+    return f"WITH keys(grain, start) AS (VALUES {','.join(['(?, ?)'] * count)})"
+
+
+class PeriodRollupStore(DerivedStore):
+    """Weekly and monthly totals plus per-period theme counts.
+
+    ``period_rollup`` mirrors ``daily_rollup`` for weeks (starting Monday)
+    and months. ``theme_rollup`` counts entries per theme for days, weeks
+    and months. Both are updated by delta on every write, so any date range
+    can be summarized from a few rows (see ``cover_range``).
+    """
+
+    name = 'period_rollup'
+    backfillable = True
+
+    def create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS period_rollup (
+                grain TEXT NOT NULL,
+                start TEXT NOT NULL,
+                entries INTEGER NOT NULL DEFAULT 0,
+                words INTEGER NOT NULL DEFAULT 0,
+                positive INTEGER NOT NULL DEFAULT 0,
+                negative INTEGER NOT NULL DEFAULT 0,
+                sentiment_sum REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (grain, start)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS theme_rollup (
+                grain TEXT NOT NULL,
+                start TEXT NOT NULL,
+                theme TEXT NOT NULL,
+                entries INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (grain, start, theme)
+            )
+        ''')
+
+    def _add(self, cursor, entry: Dict, sign: int):
+        starts = _starts(entry)
+        label = entry.get('sentiment_label')
+        for grain in GRAINS:
+            cursor.execute('''
+                INSERT INTO period_rollup (grain, start, entries, words, positive, negative, sentiment_sum)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(grain, start) DO UPDATE SET
+                    entries = entries + excluded.entries,
+                    words = words + excluded.words,
+                    positive = positive + excluded.positive,
+                    negative = negative + excluded.negative,
+                    sentiment_sum = sentiment_sum + excluded.sentiment_sum
+            ''', (
+                grain,
+                starts[grain],
+                sign,
+                sign * (entry.get('word_count') or 0),
+                sign * (label == 'POSITIVE'),
+                sign * (label == 'NEGATIVE'),
+                sign * _sentiment(entry)
+            ))
+
+        cursor.executemany('''
+            INSERT INTO theme_rollup (grain, start, theme, entries)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(grain, start, theme) DO UPDATE SET entries = entries + excluded.entries
+        ''', [
+            (grain, starts[grain], theme, sign)
+            for theme in theme_names(entry.get('themes'))
+            for grain in ('day',) + GRAINS
+        ])
+
+    def apply(self, cursor, old, new):
+        if old is not None:
+            self._add(cursor, old, -1)
+        if new is not None:
+            self._add(cursor, new, 1)
+        if old is not None:
+            starts = _starts(old)
+            for grain in GRAINS:
+                cursor.execute(
+                    'DELETE FROM period_rollup WHERE grain = ? AND start = ? AND entries <= 0',
+                    (grain, starts[grain])
+                )
+            for grain in ('day',) + GRAINS:
+                cursor.execute(
+                    'DELETE FROM theme_rollup WHERE grain = ? AND start = ? AND entries <= 0',
+                    (grain, starts[grain])
+                )
+
+    def remove_entries(self, cursor):
+        # One delta per affected period (and theme), however many entries go
+        for grain in GRAINS:
+            start = _STARTS[grain].format('timestamp')
+            cursor.execute(f'''
+                UPDATE period_rollup SET
+                    entries = period_rollup.entries - gone.entries,
+                    words = period_rollup.words - gone.words,
+                    positive = period_rollup.positive - gone.positive,
+                    negative = period_rollup.negative - gone.negative,
+                    sentiment_sum = period_rollup.sentiment_sum - gone.sentiment_sum
+                FROM (
+                    SELECT {start} AS start, COUNT(*) AS entries,
+                           COALESCE(SUM(word_count), 0) AS words,
+                           COUNT(CASE WHEN sentiment_label = 'POSITIVE' THEN 1 END) AS positive,
+                           COUNT(CASE WHEN sentiment_label = 'NEGATIVE' THEN 1 END) AS negative,
+                           COALESCE(SUM(CASE
+                               WHEN sentiment_label = 'POSITIVE' THEN sentiment_score
+                               WHEN sentiment_label IS NOT NULL THEN -sentiment_score
+                           END), 0) AS sentiment_sum
+                    FROM entries
+                    WHERE id IN (SELECT id FROM {DELETED_ENTRIES})
+                    GROUP BY {start}
+                ) AS gone
+                WHERE period_rollup.grain = ? AND period_rollup.start = gone.start
+            ''', (grain,))
+
+        for grain in ('day',) + GRAINS:
+            start = _STARTS[grain].format('timestamp')
+            cursor.execute(f'''
+                UPDATE theme_rollup SET entries = theme_rollup.entries - gone.entries
+                FROM (
+                    SELECT {start} AS start, theme, COUNT(DISTINCT id) AS entries
+                    FROM (
+                        SELECT e.id, e.timestamp,
+                               CASE WHEN t.type = 'array' THEN json_extract(t.value, '$[0]') ELSE t.value END AS theme
+                        FROM entries e, json_each(e.themes) t
+                        WHERE e.id IN (SELECT id FROM {DELETED_ENTRIES}) AND e.themes IS NOT NULL
+                    )
+                    WHERE theme IS NOT NULL
+                    GROUP BY {start}, theme
+                ) AS gone
+                WHERE theme_rollup.grain = ? AND theme_rollup.start = gone.start
+                  AND theme_rollup.theme = gone.theme
+            ''', (grain,))
+
+        # Only periods the deleted entries fell in can have dropped to zero
+        for table, grains in (('period_rollup', GRAINS), ('theme_rollup', ('day',) + GRAINS)):
+            for grain in grains:
+                cursor.execute(f'''
+                    DELETE FROM {table}
+                    WHERE grain = ? AND entries <= 0
+                      AND start IN (SELECT {_STARTS[grain].format('day')} FROM {DELETED_ENTRIES})
+                ''', (grain,))
+
+    def reset(self, cursor):
+        cursor.execute('DELETE FROM period_rollup')
+        cursor.execute('DELETE FROM theme_rollup')
+
+    @staticmethod
+    def summarize(cursor, start: date, end: date, theme_limit: Optional[int] = None) -> Dict:
+        """Totals, sentiment split and theme counts for [start, end]"""
+        if end < start:
+            start, end = end, start
+        pieces = cover_range(start, end)
+        keys = [(grain, piece.isoformat()) for grain, piece in pieces]
+        days = [key for key in keys if key[0] == 'day']
+        periods = [key for key in keys if key[0] != 'day']
+
+        totals = {'entries': 0, 'words': 0, 'positive': 0, 'negative': 0, 'sentiment_sum': 0.0}
+        queries = []
+        if days:
+            queries.append((
+                f'''SELECT COUNT(*), SUM(entries), SUM(words), SUM(positive), SUM(negative), SUM(sentiment_sum)
+                    FROM daily_rollup WHERE day IN ({','.join('?' * len(days))})''',
+                [start for _, start in days]
+            ))
+        if periods:
+            queries.append((
+                f'''{_keys_cte(len(periods))}
+                    SELECT 0, SUM(p.entries), SUM(p.words), SUM(p.positive), SUM(p.negative),
+                           SUM(p.sentiment_sum)
+                    FROM keys CROSS JOIN period_rollup p ON p.grain = keys.grain AND p.start = keys.start''',
+                [value for key in periods for value in key]
+            ))
+        for query, params in queries:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            for key, value in zip(totals, row[1:]):
+                totals[key] += value or 0
+
+        # A few themes per piece, so they are summed here rather than
+        # grouped and sorted by SQLite in temporary B-trees
+        cursor.execute(f'''
+            {_keys_cte(len(keys))}
+            SELECT t.theme, t.entries
+            FROM keys CROSS JOIN theme_rollup t ON t.grain = keys.grain AND t.start = keys.start
+        ''', [value for key in keys for value in key])
+        counts: Dict[str, int] = {}
+        for theme, count in cursor.fetchall():
+            counts[theme] = counts.get(theme, 0) + count
+        themes = sorted(
+            ((theme, count) for theme, count in counts.items() if count > 0),
+            key=lambda item: (-item[1], item[0])
+        )[:theme_limit or None]
+
+        cursor.execute(
+            'SELECT COUNT(*) FROM daily_rollup WHERE day BETWEEN ? AND ? AND entries > 0',
+            (start.isoformat(), end.isoformat())
+        )
+        active_days = cursor.fetchone()[0]
+
+        analyzed = totals['positive'] + totals['negative']
+        return {
+            'start': start,
+            'end': end,
+            'days': (end - start).days + 1,
+            'entries': totals['entries'],
+            'words': totals['words'],
+            'positive': totals['positive'],
+            'negative': totals['negative'],
+            'analyzed': analyzed,
+            'avg_sentiment': totals['sentiment_sum'] / analyzed if analyzed else None,
+            'positive_pct': totals['positive'] / analyzed * 100 if analyzed else None,
+            'avg_words': totals['words'] / totals['entries'] if totals['entries'] else 0,
+            'active_days': active_days,
+            'themes': themes
+        }
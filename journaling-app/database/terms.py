@@ -0,0 +1,233 @@
+import re
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from .activity import _day
+from .derived import DELETED_ENTRIES, DerivedStore
+
+# Common English function words plus journaling filler ("today", "really")
+# that would otherwise top every list
+STOPWORDS = frozenset('''
+a about above after again against all also am an and any are aren't as at be because been
+before being below between both but by can can't cannot could couldn't did didn't do does
+doesn't doing don't down during each even every few for from further get got had hadn't has
+hasn't have haven't having he he'd he'll he's her here here's hers herself him himself his how
+how's i i'd i'll i'm i've if in into is isn't it it's its itself just let's like me more most
+much mustn't my myself no nor not now of off on once one only or other ought our ours
+ourselves out over own really same shan't she she'd she'll she's should shouldn't so some
+still such than that that's the their theirs them themselves then there there's these they
+they'd they'll they're they've thing things this those through to today too under until up
+us very was wasn't we we'd we'll we're we've were weren't what what's when when's where
+where's which while who who's whom why why's will with won't would wouldn't yet you you'd
+you'll you're you've your yours yourself yourselves
+'''.split())
+
+# Terms per IN (...) lookup, well under SQLite's bound-parameter limit
+_MAX_PARAMS = 500
+
+_WORD = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words of ``text`` with stopwords and single letters removed"""
+    # Curly apostrophes (common from phone keyboards) match the stopword list
+    words = _WORD.findall(text.lower().replace('’', "'"))
+    return [w for w in words if len(w) > 1 and w not in STOPWORDS]
+
+
+def term_counts(text: str) -> Counter:
+    return Counter(tokenize(text or ''))
+
+
+class TermIndexStore(DerivedStore):
+    """Inverted index of normalized terms for vocabulary analytics.
+
+    ``terms`` holds one row per distinct term with its total count, number
+    of entries and first day used. ``term_postings`` holds (term, day,
+    entry, count); its primary key serves per-term timelines and the day
+    index serves per-period top terms. Both are updated by delta on write.
+    """
+
+    name = 'term_index'
+    backfillable = True
+
+    def create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS terms (
+                id INTEGER PRIMARY KEY,
+                term TEXT NOT NULL UNIQUE,
+                total INTEGER NOT NULL DEFAULT 0,
+                entries INTEGER NOT NULL DEFAULT 0,
+                first_day TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_terms_first_day ON terms(first_day)')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS term_postings (
+                term_id INTEGER NOT NULL,
+                day TEXT NOT NULL,
+                entry_id INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (term_id, day, entry_id)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_term_postings_day
+            ON term_postings(day, term_id, count)
+        ''')
+
+    def _add(self, cursor, entry_id: int, day: str, counts: Counter):
+        if not counts:
+            return
+        cursor.executemany('''
+            INSERT INTO terms (term, total, entries, first_day) VALUES (?, ?, 1, ?)
+            ON CONFLICT(term) DO UPDATE SET
+                total = total + excluded.total,
+                entries = entries + 1,
+                first_day = MIN(first_day, excluded.first_day)
+        ''', [(term, count, day) for term, count in counts.items()])
+
+        terms = list(counts)
+        for i in range(0, len(terms), _MAX_PARAMS):
+            chunk = terms[i:i + _MAX_PARAMS]
+            cursor.execute(
+                f"SELECT id, term FROM terms WHERE term IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            cursor.executemany(
+                'INSERT INTO term_postings (term_id, day, entry_id, count) VALUES (?, ?, ?, ?)',
+                [(term_id, day, entry_id, counts[term]) for term_id, term in cursor.fetchall()]
+            )
+
+    def _remove(self, cursor, entry_id: int, day: str, counts: Counter):
+        for term, count in counts.items():
+            cursor.execute('''
+                UPDATE terms SET total = total - ?, entries = entries - 1
+                WHERE term = ?
+                RETURNING id, entries, first_day
+            ''', (count, term))
+            row = cursor.fetchone()
+            if row is None:
+                continue
+            term_id, entries, first_day = row
+            cursor.execute(
+                'DELETE FROM term_postings WHERE term_id = ? AND day = ? AND entry_id = ?',
+                (term_id, day, entry_id)
+            )
+            if entries <= 0:
+                cursor.execute('DELETE FROM terms WHERE id = ?', (term_id,))
+            elif first_day == day:
+                cursor.execute('''
+                    UPDATE terms SET first_day = (SELECT MIN(day) FROM term_postings WHERE term_id = ?)
+                    WHERE id = ?
+                ''', (term_id, term_id))
+
+    def apply(self, cursor, old, new):
+        if old is not None and new is not None and old.get('content') == new.get('content'):
+            return
+        if old is not None:
+            self._remove(cursor, old['id'], _day(old), term_counts(old.get('content')))
+        if new is not None:
+            self._add(cursor, new['id'], _day(new), term_counts(new.get('content')))
+
+    def remove_entries(self, cursor):
+        # Per-term totals of the postings going away, read through the day
+        # index (which also holds entry_id) rather than re-tokenizing content
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS deleted_terms (
+                term_id INTEGER PRIMARY KEY,
+                total INTEGER NOT NULL,
+                entries INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('DELETE FROM temp.deleted_terms')
+        cursor.execute(f'''
+            INSERT INTO temp.deleted_terms (term_id, total, entries)
+            SELECT term_id, SUM(count), COUNT(*) FROM term_postings
+            WHERE day IN (SELECT day FROM {DELETED_ENTRIES})
+              AND entry_id IN (SELECT id FROM {DELETED_ENTRIES})
+            GROUP BY term_id
+        ''')
+        cursor.execute('''
+            UPDATE terms SET (total, entries) = (
+                SELECT terms.total - gone.total, terms.entries - gone.entries
+                FROM temp.deleted_terms gone WHERE gone.term_id = terms.id
+            )
+            WHERE id IN (SELECT term_id FROM temp.deleted_terms)
+        ''')
+        cursor.execute(f'''
+            DELETE FROM term_postings
+            WHERE day IN (SELECT day FROM {DELETED_ENTRIES})
+              AND entry_id IN (SELECT id FROM {DELETED_ENTRIES})
+        ''')
+        cursor.execute('''
+            DELETE FROM terms
+            WHERE id IN (SELECT term_id FROM temp.deleted_terms) AND entries <= 0
+        ''')
+        cursor.execute(f'''
+            UPDATE terms SET first_day = (SELECT MIN(day) FROM term_postings WHERE term_id = terms.id)
+            WHERE id IN (SELECT term_id FROM temp.deleted_terms)
+              AND first_day IN (SELECT day FROM {DELETED_ENTRIES})
+        ''')
+
+    def reset(self, cursor):
+        cursor.execute('DELETE FROM term_postings')
+        cursor.execute('DELETE FROM terms')
+
+    @staticmethod
+    def top_terms(cursor, start: Optional[date] = None, end: Optional[date] = None,
+                  limit: int = 20) -> List[Tuple[str, int, int]]:
+        """(term, count, entries) for the most used terms, optionally in [start, end]"""
+        if start is None and end is None:
+            cursor.execute(
+                'SELECT term, total, entries FROM terms ORDER BY total DESC, term LIMIT ?',
+                (limit,)
+            )
+        else:
+            cursor.execute('''
+                SELECT t.term, p.total, p.entries
+                FROM (
+                    SELECT term_id, SUM(count) AS total, COUNT(*) AS entries
+                    FROM term_postings
+                    WHERE day BETWEEN ? AND ?
+                    GROUP BY term_id
+                ) p JOIN terms t ON t.id = p.term_id
+                ORDER BY p.total DESC, t.term
+                LIMIT ?
+            ''', ((start or date.min).isoformat(), (end or date.max).isoformat(), limit))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def new_terms(cursor, start: date, end: date, limit: int = 20) -> List[Tuple[str, int, str]]:
+        """(term, count, first_day) for terms first used in [start, end]"""
+        cursor.execute('''
+            SELECT term, total, first_day FROM terms
+            WHERE first_day BETWEEN ? AND ?
+            ORDER BY total DESC, term
+            LIMIT ?
+        ''', (start.isoformat(), end.isoformat(), limit))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def vocabulary_growth(cursor) -> List[Tuple[str, int]]:
+        """(day, new terms) for every day a term was first used"""
+        cursor.execute('SELECT first_day, COUNT(*) FROM terms GROUP BY first_day ORDER BY first_day')
+        return [tuple(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def term_timeline(cursor, term: str) -> List[Tuple[str, int]]:
+        """(day, count) for every day ``term`` was used"""
+        cursor.execute('''
+            SELECT p.day, SUM(p.count) FROM term_postings p
+            WHERE p.term_id = (SELECT id FROM terms WHERE term = ?)
+            GROUP BY p.day
+            ORDER BY p.day
+        ''', (term.lower().strip(),))
+        return [tuple(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def summary(cursor) -> Dict:
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(total), 0) FROM terms')
+        vocabulary, words = cursor.fetchone()
+        return {'vocabulary': vocabulary, 'indexed_words': words}
@@ -0,0 +1,186 @@
+import json
+import math
+from itertools import combinations_with_replacement
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .activity import _sentiment
+from .derived import DELETED_ENTRIES, DerivedStore
+from .rollups import theme_names
+
+# theme_sentiment row holding totals over every analyzed entry
+ALL_THEMES = ''
+
+
+class ThemeStatsStore(DerivedStore):
+    """Theme co-occurrence counts and per-theme sentiment moments.
+
+    ``theme_pairs`` stores the upper triangle of the theme x theme matrix
+    (theme_a <= theme_b); the diagonal is the number of entries with each
+    theme. ``theme_sentiment`` keeps count, sum and sum of squares of the
+    signed sentiment of analyzed entries per theme, plus one row for all
+    entries, which is enough to derive means and correlations. Both are
+    updated by delta on every write.
+    """
+
+    name = 'theme_stats'
+    backfillable = True
+
+    def create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS theme_pairs (
+                theme_a TEXT NOT NULL,
+                theme_b TEXT NOT NULL,
+                entries INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (theme_a, theme_b)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS theme_sentiment (
+                theme TEXT PRIMARY KEY,
+                analyzed INTEGER NOT NULL DEFAULT 0,
+                sentiment_sum REAL NOT NULL DEFAULT 0,
+                sentiment_sq_sum REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+
+    def _add(self, cursor, entry: Dict, sign: int):
+        names = sorted(theme_names(entry.get('themes')))
+        cursor.executemany('''
+            INSERT INTO theme_pairs (theme_a, theme_b, entries) VALUES (?, ?, ?)
+            ON CONFLICT(theme_a, theme_b) DO UPDATE SET entries = entries + excluded.entries
+        ''', [(a, b, sign) for a, b in combinations_with_replacement(names, 2)])
+
+        if entry.get('sentiment_label') and entry.get('sentiment_score') is not None:
+            value = _sentiment(entry)
+            cursor.executemany('''
+                INSERT INTO theme_sentiment (theme, analyzed, sentiment_sum, sentiment_sq_sum)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(theme) DO UPDATE SET
+                    analyzed = analyzed + excluded.analyzed,
+                    sentiment_sum = sentiment_sum + excluded.sentiment_sum,
+                    sentiment_sq_sum = sentiment_sq_sum + excluded.sentiment_sq_sum
+            ''', [(theme, sign, sign * value, sign * value * value) for theme in [ALL_THEMES] + names])
+
+    def _affects(self, old, new) -> bool:
+        keys = ('themes', 'sentiment_label', 'sentiment_score')
+        return old is None or new is None or any(old.get(k) != new.get(k) for k in keys)
+
+    def apply(self, cursor, old, new):
+        if not self._affects(old, new):
+            return
+        if old is not None:
+            self._add(cursor, old, -1)
+        if new is not None:
+            self._add(cursor, new, 1)
+        if old is not None:
+            # Only rows the old entry counted towards can have dropped to zero
+            names = sorted(theme_names(old.get('themes')))
+            cursor.executemany(
+                'DELETE FROM theme_pairs WHERE theme_a = ? AND theme_b = ? AND entries <= 0',
+                list(combinations_with_replacement(names, 2))
+            )
+            cursor.executemany(
+                'DELETE FROM theme_sentiment WHERE theme = ? AND analyzed <= 0',
+                [(theme,) for theme in [ALL_THEMES] + names]
+            )
+
+    def reset(self, cursor):
+        cursor.execute('DELETE FROM theme_pairs')
+        cursor.execute('DELETE FROM theme_sentiment')
+
+    @staticmethod
+    def _tally(rows: Iterable) -> Tuple[Dict, Dict]:
+        """Pair counts and sentiment moments over (themes, label, score) rows"""
+        pairs, sentiment = {}, {}
+        for row in rows:
+            names = sorted(theme_names(json.loads(row[0]) if row[0] else []))
+            for pair in combinations_with_replacement(names, 2):
+                pairs[pair] = pairs.get(pair, 0) + 1
+            entry = {'sentiment_label': row[1], 'sentiment_score': row[2]}
+            if row[1] and row[2] is not None:
+                value = _sentiment(entry)
+                for theme in [ALL_THEMES] + names:
+                    n, s, sq = sentiment.get(theme, (0, 0.0, 0.0))
+                    sentiment[theme] = (n + 1, s + value, sq + value * value)
+        return pairs, sentiment
+
+    def remove_entries(self, cursor):
+        # Tallied in one pass, then one update per affected pair and theme
+        cursor.execute(f'''
+            SELECT themes, sentiment_label, sentiment_score FROM entries
+            WHERE id IN (SELECT id FROM {DELETED_ENTRIES})
+              AND (themes IS NOT NULL OR sentiment_label IS NOT NULL)
+        ''')
+        pairs, sentiment = self._tally(cursor.fetchall())
+        cursor.executemany(
+            'UPDATE theme_pairs SET entries = entries - ? WHERE theme_a = ? AND theme_b = ?',
+            [(n, a, b) for (a, b), n in pairs.items()]
+        )
+        cursor.executemany('''
+            UPDATE theme_sentiment SET
+                analyzed = analyzed - ?,
+                sentiment_sum = sentiment_sum - ?,
+                sentiment_sq_sum = sentiment_sq_sum - ?
+            WHERE theme = ?
+        ''', [moments + (theme,) for theme, moments in sentiment.items()])
+        cursor.executemany(
+            'DELETE FROM theme_pairs WHERE theme_a = ? AND theme_b = ? AND entries <= 0',
+            list(pairs)
+        )
+        cursor.executemany(
+            'DELETE FROM theme_sentiment WHERE theme = ? AND analyzed <= 0',
+            [(theme,) for theme in sentiment]
+        )
+
+    @staticmethod
+    def cooccurrence(cursor, top_n: int = 12) -> Dict:
+        """Symmetric count matrix for the ``top_n`` most common themes"""
+        cursor.execute('''
+            SELECT theme_a FROM theme_pairs WHERE theme_a = theme_b
+            ORDER BY entries DESC, theme_a LIMIT ?
+        ''', (top_n,))
+        themes = [row[0] for row in cursor.fetchall()]
+        matrix = np.zeros((len(themes), len(themes)), dtype=np.int64)
+        if themes:
+            index = {theme: i for i, theme in enumerate(themes)}
+            marks = ','.join('?' * len(themes))
+            cursor.execute(f'''
+                SELECT theme_a, theme_b, entries FROM theme_pairs
+                WHERE theme_a IN ({marks}) AND theme_b IN ({marks})
+            ''', themes + themes)
+            for a, b, n in cursor.fetchall():
+                matrix[index[a], index[b]] = matrix[index[b], index[a]] = n
+        return {'themes': themes, 'matrix': matrix}
+
+    @staticmethod
+    def sentiment(cursor) -> List[Dict]:
+        """Mean sentiment per theme and its point-biserial correlation.
+
+        The correlation is between "entry has this theme" (0/1) and the
+        entry's signed sentiment, over all analyzed entries.
+        """
+        cursor.execute('SELECT theme, analyzed, sentiment_sum, sentiment_sq_sum FROM theme_sentiment')
+        rows = {row[0]: row[1:] for row in cursor.fetchall()}
+        total_n, total_sum, total_sq = rows.pop(ALL_THEMES, (0, 0.0, 0.0))
+        if total_n == 0:
+            return []
+
+        mean = total_sum / total_n
+        std = math.sqrt(max(total_sq / total_n - mean * mean, 0.0))
+        stats = []
+        for theme, (n, s, _) in rows.items():
+            correlation = None
+            if std > 0 and 0 < n < total_n:
+                mean_with = s / n
+                mean_without = (total_sum - s) / (total_n - n)
+                p = n / total_n
+                correlation = (mean_with - mean_without) / std * math.sqrt(p * (1 - p))
+            stats.append({
+                'theme': theme,
+                'entries': n,
+                'mean_sentiment': s / n,
+                'correlation': correlation
+            })
+        return sorted(stats, key=lambda item: -item['entries'])
@@ -0,0 +1,226 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .derived import DELETED_ENTRIES, DerivedStore
+
+# Embeddings are stored as float16 BLOBs (half the size of float32, and
+# plenty of precision for cosine similarity on normalized vectors)
+STORAGE_DTYPE = np.float16
+
+
+def encode_vector(vector) -> bytes:
+    """Serialize an embedding to a compact float16 BLOB"""
+    return np.asarray(vector, dtype=STORAGE_DTYPE).tobytes()
+
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    """Deserialize a float16 BLOB back to a float32 vector"""
+    return np.frombuffer(blob, dtype=STORAGE_DTYPE).astype(np.float32)
+
+
+def _normalize(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class VectorIndex:
+    """Exact in-memory nearest-neighbour index over normalized embeddings.
+
+    Vectors live in one contiguous float32 matrix so a query is a single
+    matrix-vector product plus ``argpartition``; at 100k x 384 that is a
+    few milliseconds. Rows are added in place (with amortized growth) and
+    removed by swapping in the last row, so updates are O(dim).
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim
+        self._matrix = np.empty((0, dim or 0), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, entry_id):
+        return entry_id in self._rows
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._ids):
+            return
+        capacity = max(capacity, 2 * len(self._ids), 64)
+        matrix = np.empty((capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self._size] = self._ids[:self._size]
+        self._matrix, self._ids = matrix, ids
+
+    def add(self, entry_id: int, vector):
+        """Insert or replace the vector for an entry"""
+        vector = _normalize(vector)
+        with self._lock:
+            if self.dim is None:
+                self.dim = len(vector)
+                self._matrix = np.empty((0, self.dim), dtype=np.float32)
+            if len(vector) != self.dim:
+                raise ValueError(f"Expected {self.dim}-dim vector, got {len(vector)}")
+
+            row = self._rows.get(entry_id)
+            if row is None:
+                self._reserve(self._size + 1)
+                row = self._size
+                self._size += 1
+                self._rows[entry_id] = row
+                self._ids[row] = entry_id
+            self._matrix[row] = vector
+
+    def add_many(self, entry_ids: List[int], vectors: np.ndarray):
+        """Bulk-load vectors (used when building the index from the database)"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            return
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._matrix = np.empty((0, self.dim), dtype=np.float32)
+            for entry_id, vector in zip(entry_ids, vectors):
+                if entry_id in self._rows:
+                    self._matrix[self._rows[entry_id]] = vector
+                    continue
+                self._reserve(self._size + 1)
+                self._rows[entry_id] = self._size
+                self._ids[self._size] = entry_id
+                self._matrix[self._size] = vector
+                self._size += 1
+
+    def remove(self, entry_id: int) -> bool:
+        """Remove an entry's vector by swapping the last row into its slot"""
+        with self._lock:
+            row = self._rows.pop(entry_id, None)
+            if row is None:
+                return False
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._ids[last])
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._size = last
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._size = 0
+
+    def get(self, entry_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(entry_id)
+            return None if row is None else self._matrix[row].copy()
+
+    def search(self, query, k: int = 10, exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Return the ``k`` most similar entries as (entry_id, cosine similarity)"""
+        with self._lock:
+            if self._size == 0 or self.dim is None:
+                return []
+            query = _normalize(query)
+            if len(query) != self.dim:
+                return []
+
+            scores = self._matrix[:self._size] @ query
+            if exclude is not None and exclude in self._rows:
+                scores[self._rows[exclude]] = -np.inf
+
+            k = min(k, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (int(self._ids[i]), float(scores[i]))
+                for i in top if np.isfinite(scores[i])
+            ]
+
+
+class EmbeddingStore(DerivedStore):
+    """Entry embeddings persisted as float16 BLOBs plus an in-memory index.
+
+    The index is loaded lazily on first query and kept in step with writes
+    made through this process. Writes from elsewhere bump the database's
+    data version, which makes the index reload itself.
+    """
+
+    name = 'embeddings'
+
+    def __init__(self):
+        self.index = VectorIndex()
+        self.version = None
+
+    def create_schema(self, cursor):
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS entry_embeddings (
+                entry_id INTEGER PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL
+            )
+        ''')
+
+    def apply(self, cursor, old, new):
+        if new is None:
+            cursor.execute('DELETE FROM entry_embeddings WHERE entry_id = ?', (old['id'],))
+            return
+
+        embedding = new.get('embedding')
+        if embedding is not None:
+            cursor.execute('''
+                INSERT OR REPLACE INTO entry_embeddings (entry_id, dim, vector)
+                VALUES (?, ?, ?)
+            ''', (new['id'], len(embedding), encode_vector(embedding)))
+        elif old is not None and old.get('content') != new.get('content'):
+            # Content changed without a fresh embedding: the old one is stale
+            cursor.execute('DELETE FROM entry_embeddings WHERE entry_id = ?', (new['id'],))
+
+    def remove_entries(self, cursor):
+        cursor.execute(f'DELETE FROM entry_embeddings WHERE entry_id IN (SELECT id FROM {DELETED_ENTRIES})')
+
+    def reset(self, cursor):
+        cursor.execute('DELETE FROM entry_embeddings')
+
+    def on_committed(self, old, new, version_before, version_after):
+        if self.version != version_before:
+            # Someone else wrote in between; reload lazily instead of patching
+            self.invalidate()
+            return
+
+        if new is None:
+            self.index.remove(old['id'])
+        elif new.get('embedding') is not None:
+            self.index.add(new['id'], new['embedding'])
+        elif old is not None and old.get('content') != new.get('content'):
+            self.index.remove(new['id'])
+        self.version = version_after
+
+    def invalidate(self):
+        self.index = VectorIndex()
+        self.version = None
+
+    def load(self, conn, version: int, backfilled: Optional[int] = None):
+        """Build the in-memory index from the entry_embeddings table"""
+        index = VectorIndex()
+        cursor = conn.cursor()
+        cursor.execute('SELECT entry_id, vector FROM entry_embeddings')
+        while True:
+            rows = cursor.fetchmany(5000)
+            if not rows:
+                break
+            index.add_many(
+                [row['entry_id'] for row in rows],
+                np.stack([decode_vector(row['vector']) for row in rows])
+            )
+        self.index = index
+        self.version = version
@@ -0,0 +1,163 @@
+"""Sweep inference thread settings on this machine and save the best profiles.
+
+Usage (from the journaling-app directory):
+
+    python -m models.autotune [--models sentiment zero_shot embedding] [--runs 8]
+
+Writes ``models/inference_config.json`` (or ``--out``) with two profiles:
+
+- ``latency``: per-model thread count with the lowest median single-request
+  latency, and a concurrency limit that keeps threads * concurrency <= cores.
+- ``throughput``: the (threads, concurrency) pair per model with the most
+  requests per second when requests run concurrently.
+
+Select one at runtime with ``JOURNAL_INFERENCE_PROFILE=latency|throughput``.
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .sentimentpipeline import (
+    AIAnalyzer,
+    INFERENCE_CONFIG_PATH,
+    MODEL_NAMES,
+    THEME_CATEGORIES,
+    configure_inference_threads,
+    default_inference_config,
+    inference_slot
+)
+
+SAMPLE_TEXTS = [
+    "Work was stressful today, the deadline moved up and I felt overwhelmed.",
+    "Had a lovely dinner with my family and we laughed about old holidays.",
+    "I finally finished the painting I started last month and I'm proud of it.",
+    "Couldn't sleep again. My mind keeps racing about everything I need to do, "
+    "and I worry that I'm letting people down at work and at home."
+]
+
+
+def _runner(analyzer: AIAnalyzer, model: str):
+    if model == "sentiment":
+        def run(text):
+            with inference_slot("sentiment"):
+                analyzer.sentiment_analyzer(text[:512])
+    elif model == "zero_shot":
+        def run(text):
+            with inference_slot("zero_shot"):
+                analyzer.theme_classifier(text[:512], THEME_CATEGORIES, multi_label=True)
+    else:
+        def run(text):
+            analyzer.embed_batch([text])
+    return run
+
+
+def _thread_candidates(cores: int):
+    candidates, n = [], 1
+    while n < cores:
+        candidates.append(n)
+        n *= 2
+    candidates.append(cores)
+    return candidates
+
+
+def _trial_config(model: str, threads: int, concurrency: int):
+    config = default_inference_config()
+    config["intra_op_threads"] = threads
+    config["models"][model] = {"threads": threads, "max_concurrency": concurrency}
+    return config
+
+
+def measure_latency(run, runs: int):
+    run(SAMPLE_TEXTS[0])  # warm-up
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        run(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure_throughput(run, runs: int, concurrency: int):
+    texts = [SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)] for i in range(runs * concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, texts))
+    return len(texts) / (time.perf_counter() - start)
+
+
+def autotune(models, runs: int):
+    cores = os.cpu_count() or 1
+    analyzer = AIAnalyzer()
+    results = {"latency": {}, "throughput": {}}
+    measurements = []
+
+    for model in models:
+        run = _runner(analyzer, model)
+        best_latency = best_throughput = None
+
+        for threads in _thread_candidates(cores):
+            configure_inference_threads(_trial_config(model, threads, 1))
+            p50 = measure_latency(run, runs)
+            measurements.append({"model": model, "threads": threads, "concurrency": 1,
+                                 "p50_ms": round(p50, 2)})
+            print(f"{model:10s} threads={threads:<3d} p50={p50:8.1f} ms")
+            if best_latency is None or p50 < best_latency[1]:
+                best_latency = (threads, p50)
+
+            concurrency = max(1, cores // threads)
+            configure_inference_threads(_trial_config(model, threads, concurrency))
+            rps = measure_throughput(run, runs, concurrency)
+            measurements.append({"model": model, "threads": threads, "concurrency": concurrency,
+                                 "requests_per_s": round(rps, 2)})
+            print(f"{model:10s} threads={threads:<3d} concurrency={concurrency:<3d} {rps:8.2f} req/s")
+            if best_throughput is None or rps > best_throughput[2]:
+                best_throughput = (threads, concurrency, rps)
+
+        results["latency"][model] = {
+            "threads": best_latency[0],
+            "max_concurrency": max(1, cores // best_latency[0])
+        }
+        results["throughput"][model] = {
+            "threads": best_throughput[0],
+            "max_concurrency": best_throughput[1]
+        }
+
+    profiles = {}
+    for profile, budgets in results.items():
+        profiles[profile] = {
+            "intra_op_threads": max(b["threads"] for b in budgets.values()),
+            "inter_op_threads": 1,
+            "models": budgets
+        }
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "cpu_count": cores,
+        "default_profile": "latency",
+        "profiles": profiles,
+        "measurements": measurements
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Autotune inference thread settings")
+    parser.add_argument("--models", nargs="+", choices=MODEL_NAMES, default=MODEL_NAMES)
+    parser.add_argument("--runs", type=int, default=8, help="requests per measurement")
+    parser.add_argument("--out", default=INFERENCE_CONFIG_PATH)
+    args = parser.parse_args(argv)
+
+    config = autotune(args.models, args.runs)
+    with open(args.out, "w") as f:
+        json.dump(config, f, indent=2)
+
+    for profile, settings in config["profiles"].items():
+        print(f"{profile}: {json.dumps(settings['models'])}")
+    print(f"Saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
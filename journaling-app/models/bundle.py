@@ -0,0 +1,111 @@
+"""Build an offline model bundle and measure per-process load cost.
+
+Usage (from the journaling-app directory):
+
+    python -m models.bundle build [--out models/bundle]
+    python -m models.bundle report [--workers 4] [--mode mmap|hub]
+
+``build`` downloads every model in MODEL_SPECS once and saves it as
+safetensors plus tokenizer files. With ``JOURNAL_MODEL_LOAD=mmap`` the app
+then loads from that directory with ``local_files_only`` (no hub lookups)
+and maps weights read-only, so the page cache is shared between workers.
+
+``report`` starts several worker processes that each construct an
+AIAnalyzer and prints their startup time and resident memory, split into
+anonymous (private) and file-backed (shareable) pages.
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+
+def build_bundle(out_dir: str):
+    from transformers import AutoTokenizer
+    from .sentimentpipeline import MODEL_SPECS
+
+    for name, spec in MODEL_SPECS.items():
+        path = os.path.join(out_dir, name)
+        os.makedirs(path, exist_ok=True)
+        print(f"Bundling {spec['repo']} -> {path}")
+
+        AutoTokenizer.from_pretrained(spec["repo"]).save_pretrained(path)
+        if "auto_class" in spec:
+            model = spec["auto_class"].from_pretrained(spec["repo"])
+            model.save_pretrained(path, safe_serialization=True)
+
+
+def _worker(mode: str, bundle_dir: str, barrier, results):
+    os.environ["JOURNAL_MODEL_LOAD"] = mode
+    os.environ["JOURNAL_MODEL_BUNDLE"] = bundle_dir
+
+    start = time.perf_counter()
+    from .sentimentpipeline import AIAnalyzer, MODEL_LOAD_TIMES
+    from .mmap_loader import process_memory
+
+    analyzer = AIAnalyzer()
+    startup = time.perf_counter() - start
+    # Touch every weight once so resident memory reflects real use
+    analyzer.analyze_entry("Measuring how much memory the journaling models use today.")
+
+    # Measure while all workers are alive so shared pages are shared
+    barrier.wait()
+    results.put({
+        "pid": os.getpid(),
+        "startup_s": round(startup, 2),
+        "load_s": {name: round(t, 2) for name, t in MODEL_LOAD_TIMES.items()},
+        **process_memory()
+    })
+    barrier.wait()
+
+
+def report(workers: int, mode: str, bundle_dir: str):
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker, args=(mode, bundle_dir, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    print(f"{'pid':>8} {'startup s':>10} {'RSS MiB':>9} {'anon MiB':>9} {'file MiB':>9}")
+    for row in rows:
+        print(f"{row['pid']:>8} {row['startup_s']:>10} "
+              f"{row.get('rss_kb', 0) / 1024:>9.0f} "
+              f"{row.get('rss_anon_kb', 0) / 1024:>9.0f} "
+              f"{row.get('rss_file_kb', 0) / 1024:>9.0f}")
+
+    total_anon = sum(row.get('rss_anon_kb', 0) for row in rows) / 1024
+    print(f"Total private (anonymous) memory across {workers} workers: {total_anon:.0f} MiB")
+    return rows
+
+
+def main(argv=None):
+    from .sentimentpipeline import MODEL_BUNDLE_DIR
+
+    parser = argparse.ArgumentParser(description="Offline model bundle tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="download models and save them as safetensors")
+    build.add_argument("--out", default=MODEL_BUNDLE_DIR)
+
+    rep = sub.add_parser("report", help="per-process startup time and RSS")
+    rep.add_argument("--workers", type=int, default=2)
+    rep.add_argument("--mode", choices=["mmap", "hub"], default="mmap")
+    rep.add_argument("--bundle", default=MODEL_BUNDLE_DIR)
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        build_bundle(args.out)
+    else:
+        report(args.workers, args.mode, args.bundle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Load transformer weights straight from memory-mapped safetensors files.
+
+``from_pretrained`` copies every tensor into anonymous memory, so each
+process holds its own copy of the weights. Here tensors are views over a
+private (copy-on-write) mapping of the file: pages come from the OS page
+cache and are shared by every process that maps the same file, so
+resident memory no longer grows with the number of workers.
+"""
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Dict, Tuple
+
+import torch
+from transformers import AutoConfig
+from transformers.modeling_utils import no_init_weights
+
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool
+}
+
+# Mappings must outlive the tensors that view them
+_MAPPINGS = []
+
+
+def read_safetensors_header(path: str) -> Tuple[Dict, int]:
+    """Return the JSON header of a safetensors file and where its data starts"""
+    with open(path, "rb") as f:
+        (length,) = struct.unpack("<Q", f.read(8))
+        return json.loads(f.read(length)), 8 + length
+
+
+def mmap_state_dict(path: str) -> Dict[str, torch.Tensor]:
+    """Map a safetensors file and return zero-copy tensors over it"""
+    header, data_start = read_safetensors_header(path)
+
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    _MAPPINGS.append(mapping)
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // torch.tensor([], dtype=dtype).element_size()
+        if count == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensor = torch.frombuffer(mapping, dtype=dtype, count=count, offset=data_start + start)
+        tensors[name] = tensor.reshape(info["shape"])
+    return tensors
+
+
+def _weight_files(model_dir: str):
+    index_path = os.path.join(model_dir, "model.safetensors.index.json")
+    if os.path.exists(index_path):
+        with open(index_path) as f:
+            shards = sorted(set(json.load(f)["weight_map"].values()))
+        return [os.path.join(model_dir, shard) for shard in shards]
+    return [os.path.join(model_dir, "model.safetensors")]
+
+
+def load_model_mmap(model_class, model_dir: str):
+    """Build ``model_class`` from a local bundle with mmap-backed weights"""
+    config = AutoConfig.from_pretrained(model_dir, local_files_only=True)
+    with no_init_weights():
+        model = model_class.from_config(config)
+
+    state_dict = {}
+    for path in _weight_files(model_dir):
+        state_dict.update(mmap_state_dict(path))
+
+    # assign=True swaps the parameters for the mapped tensors instead of
+    # copying into the freshly allocated ones (which are then freed)
+    result = model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+    _check_loaded(model, state_dict, result.missing_keys, result.unexpected_keys, model_dir)
+    model.eval()
+    return model
+
+
+def _check_loaded(model, state_dict: Dict[str, torch.Tensor], missing, unexpected, model_dir: str):
+    """Raise unless every weight came from the files (or is tied to one that did).
+
+    The model is built without initializing its weights, so anything the
+    files did not supply would be left as uninitialized memory.
+    """
+    def ignored(key: str, patterns) -> bool:
+        return any(re.search(pattern, key) for pattern in patterns or [])
+
+    mapped = {tensor.data_ptr() for tensor in state_dict.values() if tensor.numel()}
+    current = model.state_dict()
+    missing = [
+        key for key in missing
+        if current[key].data_ptr() not in mapped
+        and not ignored(key, model._keys_to_ignore_on_load_missing)
+    ]
+    unexpected = [
+        key for key in unexpected if not ignored(key, model._keys_to_ignore_on_load_unexpected)
+    ]
+    if missing or unexpected:
+        raise ValueError(
+            f"Weights in {model_dir} do not match {type(model).__name__}: "
+            f"missing {missing[:5]}{'...' if len(missing) > 5 else ''}, "
+            f"unexpected {unexpected[:5]}{'...' if len(unexpected) > 5 else ''}"
+        )
+
+
+def process_memory() -> Dict[str, int]:
+    """Resident memory of this process in KiB (Linux /proc), split anon/file"""
+    fields = {"VmRSS": "rss_kb", "RssAnon": "rss_anon_kb", "RssFile": "rss_file_kb"}
+    memory = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    memory[fields[key]] = int(value.split()[0])
+    except OSError:
+        pass
+    return memory
@@ -1,7 +1,21 @@
 import streamlit as st
-from transformers import pipeline, DistilBertTokenizer
-from typing import Dict, List, Tuple
+from transformers import (
+    pipeline, DistilBertTokenizer, AutoTokenizer, AutoModel, AutoModelForSequenceClassification
+)
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import json
+import logging
+import os
 import random
+import threading
+import time
+import numpy as np
+import torch
+
+from utils.metrics import DEFERRED_FAILURES, DEFERRED_QUEUE
+from utils.perf import recorder, timed
 
 # Define theme categories
 THEME_CATEGORIES = [
@@ -10,11 +24,187 @@ THEME_CATEGORIES = [
     "accomplishments", "challenges", "hobbies", "social life"
 ]
 
+# Models used by the analyzer. "auto_class" is what the offline bundle is
+# loaded with; the tokenizer entry has no weights.
+MODEL_SPECS = {
+    "sentiment": {
+        "repo": "distilbert-base-uncased-finetuned-sst-2-english",
+        "task": "sentiment-analysis",
+        "auto_class": AutoModelForSequenceClassification
+    },
+    "zero_shot": {
+        "repo": "facebook/bart-large-mnli",
+        "task": "zero-shot-classification",
+        "auto_class": AutoModelForSequenceClassification
+    },
+    "embedding": {
+        "repo": "sentence-transformers/all-MiniLM-L6-v2",
+        "auto_class": AutoModel
+    },
+    "tokenizer": {
+        "repo": "distilbert-base-uncased"
+    }
+}
+
+# "hub" loads through from_pretrained (downloading if needed); "mmap" maps
+# weights read-only from the local bundle built by `python -m models.bundle`
+MODEL_LOAD_MODE = os.environ.get("JOURNAL_MODEL_LOAD", "hub")
+MODEL_BUNDLE_DIR = os.environ.get(
+    "JOURNAL_MODEL_BUNDLE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "bundle")
+)
+
+if MODEL_LOAD_MODE == "mmap":
+    # Cold start must not touch the network
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+# Seconds spent loading each model in this process
+MODEL_LOAD_TIMES = {}
+
+def _bundle_path(name: str) -> str:
+    return os.path.join(MODEL_BUNDLE_DIR, name)
+
+def _load_bundled(name: str):
+    """Load a model (and tokenizer) from the offline bundle with mmap weights"""
+    from .mmap_loader import load_model_mmap
+    
+    spec = MODEL_SPECS[name]
+    path = _bundle_path(name)
+    tokenizer = AutoTokenizer.from_pretrained(path, local_files_only=True)
+    if "auto_class" not in spec:
+        return tokenizer
+    
+    model = load_model_mmap(spec["auto_class"], path)
+    if "task" in spec:
+        return pipeline(spec["task"], model=model, tokenizer=tokenizer)
+    return tokenizer, model
+
+def _timed_load(name: str, load_from_hub):
+    start = time.perf_counter()
+    loaded = _load_bundled(name) if MODEL_LOAD_MODE == "mmap" else load_from_hub()
+    MODEL_LOAD_TIMES[name] = time.perf_counter() - start
+    recorder.record(f"ai.load.{name}", MODEL_LOAD_TIMES[name])
+    return loaded
+
+# Inference thread configuration. `python -m models.autotune` writes tuned
+# profiles to this file; JOURNAL_INFERENCE_PROFILE picks one of them.
+INFERENCE_CONFIG_PATH = os.environ.get(
+    "JOURNAL_INFERENCE_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "inference_config.json")
+)
+
+MODEL_NAMES = ["sentiment", "zero_shot", "embedding"]
+
+def default_inference_config() -> Dict:
+    """Conservative defaults: small per-model budgets that never oversubscribe"""
+    cores = os.cpu_count() or 1
+    return {
+        "intra_op_threads": max(1, cores // 2),
+        "inter_op_threads": 1,
+        "models": {
+            "sentiment": {"threads": 1, "max_concurrency": max(1, cores // 2)},
+            "zero_shot": {"threads": max(1, cores // 2), "max_concurrency": 1},
+            "embedding": {"threads": 1, "max_concurrency": max(1, cores // 2)}
+        }
+    }
+
+def load_inference_config(path: str = None, profile: str = None) -> Dict:
+    """Load a thread profile from the config file, falling back to defaults"""
+    config = default_inference_config()
+    path = path or INFERENCE_CONFIG_PATH
+    profile = profile or os.environ.get("JOURNAL_INFERENCE_PROFILE")
+    
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return config
+    
+    profile = profile or saved.get("default_profile", "latency")
+    chosen = saved.get("profiles", {}).get(profile, {})
+    config["intra_op_threads"] = chosen.get("intra_op_threads", config["intra_op_threads"])
+    config["inter_op_threads"] = chosen.get("inter_op_threads", config["inter_op_threads"])
+    for name, budget in chosen.get("models", {}).items():
+        config["models"].setdefault(name, {}).update(budget)
+    return config
+
+_thread_config = None
+_model_slots = {}
+_config_lock = threading.Lock()
+
+# torch's intra-op thread count is one setting for the whole process, so
+# calls only run together when they want the same count: a call with a
+# different budget waits for the running ones to finish, then switches it
+_budget_changed = threading.Condition()
+_budget_threads = None
+_budget_calls = 0
+
+def configure_inference_threads(config: Dict = None) -> Dict:
+    """Apply process-wide torch thread settings (once) and set up per-model slots.
+    
+    Each model gets a thread budget and a concurrency limit, so that
+    concurrent sessions running one model use at most
+    threads * max_concurrency cores instead of each grabbing all of them.
+    """
+    global _thread_config, _budget_threads
+    with _config_lock:
+        if _thread_config is not None and config is None:
+            return _thread_config
+        
+        config = config or load_inference_config()
+        with _budget_changed:
+            torch.set_num_threads(config["intra_op_threads"])
+            _budget_threads = config["intra_op_threads"]
+        try:
+            torch.set_num_interop_threads(config["inter_op_threads"])
+        except RuntimeError:
+            # Can only be set before the first inter-op parallel work starts
+            pass
+        
+        for name, budget in config["models"].items():
+            _model_slots[name] = (
+                threading.BoundedSemaphore(budget.get("max_concurrency", 1)),
+                budget.get("threads", 1)
+            )
+        _thread_config = config
+        return config
+
+@contextmanager
+def inference_slot(model: str):
+    """Run a model call within its concurrency limit and thread budget.
+    
+    Calls to models with different budgets do not overlap (see
+    ``_budget_changed``), so no call runs with another model's count.
+    """
+    global _budget_threads, _budget_calls
+    configure_inference_threads()
+    slot = _model_slots.get(model)
+    if slot is None:
+        yield
+        return
+    
+    semaphore, threads = slot
+    with semaphore:
+        with _budget_changed:
+            _budget_changed.wait_for(lambda: _budget_calls == 0 or _budget_threads == threads)
+            if _budget_threads != threads:
+                torch.set_num_threads(threads)
+                _budget_threads = threads
+            _budget_calls += 1
+        try:
+            yield
+        finally:
+            with _budget_changed:
+                _budget_calls -= 1
+                _budget_changed.notify_all()
+
 @st.cache_resource
 def load_sentiment_analyzer():
     """Load sentiment analysis model"""
     try:
-        return pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+        spec = MODEL_SPECS["sentiment"]
+        return _timed_load("sentiment", lambda: pipeline(spec["task"], model=spec["repo"]))
     except Exception as e:
         st.error(f"Error loading sentiment model: {e}")
         return None
@@ -23,7 +213,8 @@ def load_sentiment_analyzer():
 def load_tokenizer():
     """Load DistilBERT tokenizer for advanced text analysis"""
     try:
-        return DistilBertTokenizer.from_pretrained('distilbert-base-uncased')
+        spec = MODEL_SPECS["tokenizer"]
+        return _timed_load("tokenizer", lambda: DistilBertTokenizer.from_pretrained(spec["repo"]))
     except Exception as e:
         st.error(f"Error loading tokenizer: {e}")
         return None
@@ -32,29 +223,99 @@ def load_tokenizer():
 def load_zero_shot_classifier():
     """Load zero-shot classification for theme detection"""
     try:
-        return pipeline("zero-shot-classification", model="facebook/bart-large-mnli")
+        spec = MODEL_SPECS["zero_shot"]
+        return _timed_load("zero_shot", lambda: pipeline(spec["task"], model=spec["repo"]))
     except Exception as e:
         st.error(f"Error loading classifier: {e}")
         return None
 
+@st.cache_resource
+def load_embedding_model():
+    """Load sentence embedding model for semantic search"""
+    def load_from_hub():
+        name = MODEL_SPECS["embedding"]["repo"]
+        model = AutoModel.from_pretrained(name)
+        model.eval()
+        return AutoTokenizer.from_pretrained(name), model
+    
+    try:
+        return _timed_load("embedding", load_from_hub)
+    except Exception as e:
+        st.error(f"Error loading embedding model: {e}")
+        return None
+
+# Running estimates (EWMA, seconds) of slow stage durations, used to decide
+# whether a stage fits in a latency budget
+_stage_estimates = {'themes': 1.0}
+_stage_lock = threading.Lock()
+
+def _stage_estimate(stage: str) -> float:
+    with _stage_lock:
+        return _stage_estimates.get(stage, 0.0)
+
+def _record_stage(stage: str, seconds: float, alpha: float = 0.3):
+    with _stage_lock:
+        previous = _stage_estimates.get(stage)
+        _stage_estimates[stage] = seconds if previous is None else (1 - alpha) * previous + alpha * seconds
+
+# Deferred stages run one at a time so they never compete with interactive
+# requests for more than one model slot
+_deferred_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="deferred-analysis")
+# Entry id -> its queued or running job, so an entry is only classified once
+_deferred_jobs: Dict[int, Future] = {}
+_deferred_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
 class AIAnalyzer:
     """Main class for AI-powered text analysis"""
     
     def __init__(self):
+        configure_inference_threads()
         self.sentiment_analyzer = load_sentiment_analyzer()
         self.tokenizer = load_tokenizer()
         self.theme_classifier = load_zero_shot_classifier()
+        self.embedder = load_embedding_model()
     
-    def analyze_entry(self, content: str) -> Dict:
-        """Analyze a journal entry for sentiment, themes, and metrics"""
-        analysis = {
-            'sentiment': None,
-            'themes': [],
-            'word_count': len(content.split()),
-            'token_count': 0,
-            'unique_words': 0
-        }
+    @timed("ai.embedding")
+    def embed_batch(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Embed texts as L2-normalized float32 vectors (mean-pooled)"""
+        if not self.embedder or not texts:
+            return None
+        
+        tokenizer, model = self.embedder
+        encoded = tokenizer(texts, padding=True, truncation=True, max_length=256, return_tensors="pt")
+        with inference_slot("embedding"), torch.no_grad():
+            hidden = model(**encoded).last_hidden_state
+        
+        mask = encoded['attention_mask'].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        pooled = torch.nn.functional.normalize(pooled, dim=1)
+        return pooled.numpy().astype(np.float32)
+    
+    def embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed a single text for semantic search"""
+        try:
+            vectors = self.embed_batch([text])
+            return vectors[0] if vectors is not None else None
+        except Exception as e:
+            st.warning(f"Embedding error: {e}")
+            return None
+    
+    @timed("ai.themes", rows=None)
+    def detect_themes(self, content: str) -> List[Tuple[str, float]]:
+        """Zero-shot theme classification (the slowest analysis stage)"""
+        if not self.theme_classifier or len(content) <= 20:
+            return []
         
+        with inference_slot("zero_shot"):
+            result = self.theme_classifier(content[:512], THEME_CATEGORIES, multi_label=True)
+        # Get themes with score > 0.3
+        themes = [(label, score) for label, score in zip(result['labels'], result['scores']) if score > 0.3]
+        return themes[:3]  # Top 3 themes
+    
+    @timed("ai.metrics", rows=None)
+    def _analyze_metrics(self, content: str, analysis: Dict):
         # Token count using DistilBERT tokenizer
         if self.tokenizer:
             try:
@@ -66,30 +327,124 @@ class AIAnalyzer:
                 analysis['unique_words'] = len(set(words))
             except Exception as e:
                 st.warning(f"Tokenization error: {e}")
-        
-        # Sentiment analysis
+    
+    @timed("ai.sentiment", rows=None)
+    def _analyze_sentiment(self, content: str, analysis: Dict):
         if self.sentiment_analyzer:
             try:
-                sentiment = self.sentiment_analyzer(content[:512])[0]
+                with inference_slot("sentiment"):
+                    sentiment = self.sentiment_analyzer(content[:512])[0]
                 analysis['sentiment'] = {
                     'label': sentiment['label'],
                     'score': sentiment['score']
                 }
             except Exception as e:
                 st.warning(f"Sentiment analysis error: {e}")
+    
+    def _analyze_embedding(self, content: str, analysis: Dict):
+        # Embedding for semantic search / related entries
+        if content.strip():
+            analysis['embedding'] = self.embed(content)
+    
+    def analyze_entry_stages(self, content: str, latency_budget: Optional[float] = None):
+        """Analyze a journal entry stage by stage, yielding ``(stage, analysis)``
+        as each stage completes: metrics, sentiment, embedding, then themes.
+        
+        The same analysis dict is updated in place and yielded every time, so
+        callers can render partial results as soon as they are available.
+        With a ``latency_budget`` (seconds), theme detection only runs if its
+        expected duration still fits; otherwise ``themes`` is left as None
+        and listed in ``deferred`` so the caller can hand it to
+        ``defer_themes``. ``stages`` maps each stage that ran to its
+        duration in seconds.
+        """
+        start = time.perf_counter()
+        analysis = {
+            'sentiment': None,
+            'themes': [],
+            'word_count': len(content.split()),
+            'token_count': 0,
+            'unique_words': 0,
+            'embedding': None,
+            'stages': {},
+            'deferred': []
+        }
+        
+        for stage, run in (('metrics', self._analyze_metrics),
+                           ('sentiment', self._analyze_sentiment),
+                           ('embedding', self._analyze_embedding)):
+            stage_start = time.perf_counter()
+            run(content, analysis)
+            analysis['stages'][stage] = time.perf_counter() - stage_start
+            yield stage, analysis
         
-        # Theme classification
-        if self.theme_classifier and len(content) > 20:
+        # Theme classification, only if it is expected to fit in the budget
+        remaining = None if latency_budget is None else latency_budget - (time.perf_counter() - start)
+        if remaining is not None and remaining < _stage_estimate('themes'):
+            analysis['themes'] = None
+            analysis['deferred'].append('themes')
+        else:
+            stage_start = time.perf_counter()
             try:
-                result = self.theme_classifier(content[:512], THEME_CATEGORIES, multi_label=True)
-                # Get themes with score > 0.3
-                themes = [(label, score) for label, score in zip(result['labels'], result['scores']) if score > 0.3]
-                analysis['themes'] = themes[:3]  # Top 3 themes
+                analysis['themes'] = self.detect_themes(content)
             except Exception as e:
                 st.warning(f"Theme classification error: {e}")
+            _record_stage('themes', time.perf_counter() - stage_start)
+            analysis['stages']['themes'] = time.perf_counter() - stage_start
+        yield 'themes', analysis
+    
+    def analyze_entry(self, content: str, latency_budget: Optional[float] = None) -> Dict:
+        """Analyze a journal entry for sentiment, themes, and metrics
         
+        See ``analyze_entry_stages`` for the latency budget semantics.
+        """
+        for _, analysis in self.analyze_entry_stages(content, latency_budget):
+            pass
         return analysis
     
+    def defer_themes(self, entry_id: int, content: str, on_complete) -> Future:
+        """Detect themes in the background and pass them to ``on_complete(entry_id, themes)``.
+        
+        If the entry is already queued or running, its existing job is
+        returned instead. Failures are logged and counted
+        (``DEFERRED_FAILURES``); the entry stays pending and is picked up
+        again by ``process_pending_themes``.
+        """
+        def run():
+            try:
+                stage_start = time.perf_counter()
+                themes = self.detect_themes(content)
+                _record_stage('themes', time.perf_counter() - stage_start)
+                on_complete(entry_id, themes)
+                return themes
+            except Exception:
+                DEFERRED_FAILURES.inc()
+                logger.exception("Deferred theme detection failed for entry %s", entry_id)
+                raise
+            finally:
+                with _deferred_lock:
+                    _deferred_jobs.pop(entry_id, None)
+                DEFERRED_QUEUE.dec()
+        
+        with _deferred_lock:
+            job = _deferred_jobs.get(entry_id)
+            if job is None:
+                DEFERRED_QUEUE.inc()
+                job = _deferred_jobs[entry_id] = _deferred_executor.submit(run)
+            return job
+    
+    def process_pending_themes(self, db, limit: int = 50) -> int:
+        """Queue theme detection for entries whose themes were deferred earlier
+        (e.g. the process restarted before the background job ran); returns
+        how many were queued, leaving out entries already queued or running"""
+        pending = db.get_entries_pending_themes(limit)
+        with _deferred_lock:
+            pending = [entry for entry in pending if entry['id'] not in _deferred_jobs]
+        for entry in pending:
+            self.defer_themes(entry['id'], entry['content'], db.set_entry_themes)
+        return len(pending)
+    
+    @timed("ai.prompt", rows=None)
     def generate_contextual_prompt(self, recent_entries: List[Dict]) -> str:
         """Generate context-aware prompts based on recent entries"""
         prompts = {
@@ -141,7 +496,8 @@ class AIAnalyzer:
         
         if self.sentiment_analyzer and recent_text:
             try:
-                sentiment = self.sentiment_analyzer(recent_text[:512])[0]
+                with inference_slot("sentiment"):
+                    sentiment = self.sentiment_analyzer(recent_text[:512])[0]
                 if sentiment['label'] == 'NEGATIVE' and sentiment['score'] > 0.6:
                     return random.choice(prompts["stress"])
                 elif sentiment['label'] == 'POSITIVE' and sentiment['score'] > 0.7:
@@ -6,20 +6,30 @@ from datetime import datetime, timedelta
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db import DatabaseManager
+from utils.perf import begin_rerun, end_rerun
+from utils.session import init_session
+from utils.analytics import load_analytics
+from utils.figcache import figure_cache
 from utils.helper import (
     create_sentiment_timeline, 
     create_theme_distribution,
     create_writing_volume_chart,
-    get_streak_info
+    create_theme_cooccurrence_heatmap,
+    create_theme_trend_heatmap,
+    create_theme_sentiment_chart,
+    create_top_terms_chart,
+    create_vocabulary_growth_chart,
+    create_term_timeline,
+    create_calendar_heatmap,
+    CALENDAR_METRICS
 )
 from utils.styles import get_custom_css, create_stat_card
 
 st.set_page_config(page_title="Insights", page_icon="📊", layout="wide")
 
 # Initialize
-if 'db' not in st.session_state:
-    st.session_state.db = DatabaseManager()
+begin_rerun("Insights")
+init_session()
 
 # Apply custom CSS
 st.markdown(get_custom_css(), unsafe_allow_html=True)
@@ -32,10 +42,10 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Get all entries
-entries = st.session_state.db.get_all_entries()
+# Columnar view of all entries (shared across sessions until the next write)
+analytics = load_analytics(st.session_state.db)
 
-if not entries:
+if analytics.empty:
     st.info(" Start journaling to see your insights! Write your first entry to begin tracking your emotional journey.")
     
     st.markdown("""
@@ -53,18 +63,32 @@ else:
         ["Last 7 days", "Last 30 days", "Last 90 days", "All time"]
     )
     
+    timeline_modes = {
+        "Auto": "auto",
+        "Every entry": "raw",
+        "Trend with range": "buckets",
+        "Downsampled": "lttb"
+    }
+    timeline_style = st.sidebar.selectbox(
+        "Timeline detail:",
+        list(timeline_modes),
+        help="Long histories are aggregated automatically to keep the chart responsive"
+    )
+    
     # Filter entries based on time range
     if time_range != "All time":
         days = int(time_range.split()[1])
-        cutoff_date = datetime.now() - timedelta(days=days)
-        filtered_entries = [
-            e for e in entries 
-            if datetime.fromisoformat(e['timestamp']) > cutoff_date
-        ]
+        filtered = analytics.since(days)
     else:
-        filtered_entries = entries
+        filtered = analytics
+    
+    filtered_df = filtered.entries
+    
+    # Figures only change with the data, the filter, or (for relative
+    # ranges) the day, so they are shared across reruns and sessions
+    cache_scope = (st.session_state.db.db_path, analytics.version, time_range, datetime.now().date())
     
-    if not filtered_entries:
+    if filtered.empty:
         st.warning(f"No entries found in {time_range.lower()}. Try selecting a longer time range.")
     else:
         # Key metrics
@@ -73,32 +97,36 @@ else:
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Entries", len(filtered_entries))
+            st.metric("Entries", len(filtered))
         
         with col2:
-            total_words = sum(e.get('word_count', 0) for e in filtered_entries)
+            total_words = int(filtered_df['word_count'].sum())
             st.metric("Words Written", f"{total_words:,}")
         
         with col3:
-            avg_words = total_words / len(filtered_entries) if filtered_entries else 0
+            avg_words = total_words / len(filtered)
             st.metric("Avg Words/Entry", f"{avg_words:.0f}")
         
         with col4:
-            streak_info = get_streak_info(entries)
+            streak_info = st.session_state.db.get_streak_info()
             st.metric("Current Streak", f"{streak_info['current']} days 🔥")
         
         st.divider()
         
         # Sentiment timeline
         st.subheader("Emotional Journey")
-        sentiment_fig = create_sentiment_timeline(filtered_entries)
+        timeline_mode = timeline_modes[timeline_style]
+        sentiment_fig = figure_cache.get_or_build(
+            ('sentiment_timeline', timeline_mode) + cache_scope,
+            lambda: create_sentiment_timeline(filtered, mode=timeline_mode)
+        )
         
         if sentiment_fig:
             st.plotly_chart(sentiment_fig, use_container_width=True)
             
             # Sentiment insights
-            positive_entries = sum(1 for e in filtered_entries if e.get('sentiment_label') == 'POSITIVE')
-            total_sentiment_entries = sum(1 for e in filtered_entries if e.get('sentiment_label'))
+            positive_entries = int((filtered_df['sentiment_label'] == 'POSITIVE').sum())
+            total_sentiment_entries = int(filtered_df['sentiment_label'].notna().sum())
             
             if total_sentiment_entries > 0:
                 positive_pct = (positive_entries / total_sentiment_entries) * 100
@@ -117,10 +145,7 @@ else:
                 
                 with col2:
                     # Average sentiment score
-                    avg_sentiment = sum(
-                        e['sentiment_score'] if e['sentiment_label'] == 'POSITIVE' else -e['sentiment_score']
-                        for e in filtered_entries if e.get('sentiment_score')
-                    ) / total_sentiment_entries
+                    avg_sentiment = filtered_df['sentiment'].mean()
                     
                     st.metric("Average Sentiment", f"{avg_sentiment:.2f}", 
                              delta="Positive" if avg_sentiment > 0 else "Negative")
@@ -134,37 +159,37 @@ else:
         
         with col1:
             st.subheader("Theme Distribution")
-            theme_fig = create_theme_distribution(filtered_entries)
+            theme_fig = figure_cache.get_or_build(
+                ('theme_distribution',) + cache_scope,
+                lambda: create_theme_distribution(filtered)
+            )
             
             if theme_fig:
                 st.plotly_chart(theme_fig, use_container_width=True)
                 
                 # Theme insights
-                from collections import Counter
-                all_themes = []
-                for entry in filtered_entries:
-                    if entry.get('themes'):
-                        for theme_data in entry['themes']:
-                            if isinstance(theme_data, (list, tuple)) and len(theme_data) >= 1:
-                                all_themes.append(theme_data[0])
+                theme_counts = filtered.theme_counts()
                 
-                if all_themes:
-                    top_theme = Counter(all_themes).most_common(1)[0][0]
+                if not theme_counts.empty:
+                    top_theme = theme_counts.index[0]
                     st.info(f"💡 Your dominant theme is **{top_theme}**. This is what occupies your mind most.")
             else:
                 st.info("Not enough theme data available.")
         
         with col2:
             st.subheader("Writing Volume")
-            volume_fig = create_writing_volume_chart(filtered_entries)
+            volume_fig = figure_cache.get_or_build(
+                ('writing_volume',) + cache_scope,
+                lambda: create_writing_volume_chart(filtered)
+            )
             
             if volume_fig:
                 st.plotly_chart(volume_fig, use_container_width=True)
                 
                 # Writing insights
-                max_words_entry = max(filtered_entries, key=lambda x: x.get('word_count', 0))
-                max_words = max_words_entry.get('word_count', 0)
-                max_date = datetime.fromisoformat(max_words_entry['timestamp']).strftime('%B %d')
+                max_words_entry = filtered_df.loc[filtered_df['word_count'].idxmax()]
+                max_words = max_words_entry['word_count']
+                max_date = max_words_entry['timestamp'].strftime('%B %d')
                 
                 st.info(f"Your longest entry was **{max_words} words** on {max_date}.")
             else:
@@ -172,11 +197,107 @@ else:
         
         st.divider()
         
+        # Theme relationships (maintained incrementally, so always all-time)
+        st.subheader("Theme Relationships")
+        st.caption("Based on all of your entries")
+        
+        data_scope = (st.session_state.db.db_path, analytics.version)
+        pairs_tab, trends_tab, mood_tab = st.tabs(["Together", "Week by week", "Mood"])
+        
+        with pairs_tab:
+            cooccurrence_fig = figure_cache.get_or_build(
+                ('theme_cooccurrence',) + data_scope,
+                lambda: create_theme_cooccurrence_heatmap(st.session_state.db.get_theme_cooccurrence())
+            )
+            if cooccurrence_fig:
+                st.plotly_chart(cooccurrence_fig, use_container_width=True)
+            else:
+                st.info("Themes will be compared once your entries cover at least two of them.")
+        
+        with trends_tab:
+            trend_fig = figure_cache.get_or_build(
+                ('theme_trends',) + data_scope + (datetime.now().date(),),
+                lambda: create_theme_trend_heatmap(st.session_state.db.get_theme_weekly_series(weeks=26))
+            )
+            if trend_fig:
+                st.plotly_chart(trend_fig, use_container_width=True)
+            else:
+                st.info("No themes detected in the last 26 weeks.")
+        
+        with mood_tab:
+            theme_sentiment = st.session_state.db.get_theme_sentiment()
+            mood_fig = figure_cache.get_or_build(
+                ('theme_sentiment',) + data_scope,
+                lambda: create_theme_sentiment_chart(theme_sentiment)
+            )
+            if mood_fig:
+                st.plotly_chart(mood_fig, use_container_width=True)
+                
+                correlated = [s for s in theme_sentiment if s['correlation'] is not None]
+                if correlated:
+                    brightest = max(correlated, key=lambda s: s['correlation'])
+                    if brightest['correlation'] > 0.1:
+                        st.info(f"💡 Entries about **{brightest['theme']}** tend to be your most positive.")
+            else:
+                st.info("Not enough analyzed entries to relate themes to your mood.")
+        
+        st.divider()
+        
+        # Word frequency (served from the term index)
+        st.subheader("Your Words")
+        
+        vocabulary = st.session_state.db.get_vocabulary_summary()
+        if vocabulary['vocabulary'] == 0:
+            st.info("Word statistics will appear once your entries have some text.")
+        else:
+            today = datetime.now().date()
+            range_start = today - timedelta(days=int(time_range.split()[1])) if time_range != "All time" else None
+            
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                terms_fig = figure_cache.get_or_build(
+                    ('top_terms',) + cache_scope,
+                    lambda: create_top_terms_chart(
+                        st.session_state.db.get_top_terms(range_start, today if range_start else None, limit=15),
+                        title=f"Most Used Words ({time_range.lower()})"
+                    )
+                )
+                if terms_fig:
+                    st.plotly_chart(terms_fig, use_container_width=True)
+                else:
+                    st.info("No words to show for this period.")
+            
+            with col2:
+                growth_fig = figure_cache.get_or_build(
+                    ('vocabulary_growth',) + data_scope,
+                    lambda: create_vocabulary_growth_chart(st.session_state.db.get_vocabulary_growth())
+                )
+                st.plotly_chart(growth_fig, use_container_width=True)
+                st.caption(
+                    f"{vocabulary['vocabulary']:,} distinct words across "
+                    f"{vocabulary['indexed_words']:,} meaningful words written"
+                )
+                
+                new_words = st.session_state.db.get_new_terms(today - timedelta(days=6), today, limit=10)
+                if new_words:
+                    st.markdown("**New this week:** " + ", ".join(term for term, _, _ in new_words))
+            
+            top_words = [term for term, _, _ in st.session_state.db.get_top_terms(limit=50)]
+            selected_word = st.selectbox("Follow a word over time", top_words)
+            if selected_word:
+                word_fig = figure_cache.get_or_build(
+                    ('term_timeline', selected_word) + data_scope,
+                    lambda: create_term_timeline(st.session_state.db.get_term_timeline(selected_word), selected_word)
+                )
+                if word_fig:
+                    st.plotly_chart(word_fig, use_container_width=True)
+        
+        st.divider()
+        
         # Streak and consistency
         st.subheader("Consistency & Streaks")
         
-        streak_info = get_streak_info(entries)
-        
         col1, col2, col3 = st.columns(3)
         
         with col1:
@@ -195,22 +316,39 @@ else:
             st.metric("Total Days Journaled", streak_info['total_days'])
         
         # Consistency percentage
-        if len(entries) > 1:
-            first_entry = min(entries, key=lambda x: x['timestamp'])
-            first_date = datetime.fromisoformat(first_entry['timestamp'])
+        if len(analytics) > 1:
+            first_date = analytics.entries['timestamp'].min().to_pydatetime()
             days_since_start = (datetime.now() - first_date).days + 1
             consistency_pct = (streak_info['total_days'] / days_since_start) * 100
             
             st.progress(consistency_pct / 100)
             st.caption(f"You've journaled on {consistency_pct:.0f}% of days since you started")
         
+        # Year calendars straight from the per-day activity arrays
+        st.markdown("#### Activity Calendar")
+        calendar_metric = st.radio(
+            "Color days by",
+            list(CALENDAR_METRICS),
+            format_func=lambda m: CALENDAR_METRICS[m]['label'],
+            horizontal=True
+        )
+        
+        for year in reversed(st.session_state.db.get_activity_years()):
+            calendar_fig = figure_cache.get_or_build(
+                ('calendar', year, calendar_metric) + data_scope,
+                lambda: create_calendar_heatmap(
+                    st.session_state.db.get_year_activity(year, calendar_metric), year, calendar_metric
+                )
+            )
+            st.plotly_chart(calendar_fig, use_container_width=True)
+        
         st.divider()
         
         # Recommendations
         st.subheader(" Personalized Recommendations")
         
         # Calculate average entry length
-        avg_length = sum(e.get('word_count', 0) for e in filtered_entries) / len(filtered_entries)
+        avg_length = avg_words
         
         recommendations = []
         
@@ -223,8 +361,8 @@ else:
             recommendations.append("**Write more**: Try to write at least 100-150 words per entry for deeper reflection.")
         
         # Check sentiment trends
-        recent_entries = filtered_entries[:5]
-        recent_negative = sum(1 for e in recent_entries if e.get('sentiment_label') == 'NEGATIVE')
+        recent_labels = filtered_df.nlargest(5, 'timestamp')['sentiment_label']
+        recent_negative = int((recent_labels == 'NEGATIVE').sum())
         if recent_negative >= 4:
             recommendations.append("**Self-care reminder**: Your recent entries show some stress. Remember to take care of yourself.")
         
@@ -248,7 +386,16 @@ with st.sidebar:
     
     st.divider()
     
-    if entries:
+    if not analytics.empty:
         st.markdown("### Quick Stats")
-        st.metric("Oldest Entry", datetime.fromisoformat(entries[-1]['timestamp']).strftime('%b %d, %Y'))
-        st.metric("Most Recent", datetime.fromisoformat(entries[0]['timestamp']).strftime('%b %d, %Y'))
\ No newline at end of file
+        st.metric("Oldest Entry", analytics.entries['timestamp'].min().strftime('%b %d, %Y'))
+        st.metric("Most Recent", analytics.entries['timestamp'].max().strftime('%b %d, %Y'))
+    
+    cache_stats = figure_cache.stats()
+    if cache_stats['hits'] + cache_stats['misses']:
+        st.caption(
+            f"Chart cache: {cache_stats['hit_rate']:.0%} hit rate, "
+            f"{cache_stats['saved_seconds']:.2f}s of chart building saved"
+        )
+
+end_rerun()
@@ -1,26 +1,33 @@
 import streamlit as st
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db import DatabaseManager
-from models.sentimentpipeline import AIAnalyzer
+from utils.perf import begin_rerun, end_rerun
+from utils.session import init_session
 from utils.styles import get_custom_css, get_sentiment_badge, get_theme_badges
 
 st.set_page_config(page_title="New Entry", page_icon="📝", layout="wide")
 
-# Initialize if not already done
-if 'db' not in st.session_state:
-    st.session_state.db = DatabaseManager()
+# Seconds we are willing to make the user wait on save; slower stages
+# (theme detection) are finished in the background
+ANALYSIS_LATENCY_BUDGET = 2.0
 
-if 'ai_analyzer' not in st.session_state:
-    st.session_state.ai_analyzer = AIAnalyzer()
+# Initialize if not already done
+begin_rerun("New Entry")
+init_session(analyzer=True)
 
 if 'current_prompt' not in st.session_state:
     st.session_state.current_prompt = None
 
+# Pick up theme detection that was deferred by an earlier session
+if 'pending_themes_checked' not in st.session_state:
+    st.session_state.ai_analyzer.process_pending_themes(st.session_state.db)
+    st.session_state.pending_themes_checked = True
+
 # Apply custom CSS
 st.markdown(get_custom_css(), unsafe_allow_html=True)
 
@@ -90,57 +97,94 @@ col1, col2, col3 = st.columns([2, 1, 1])
 with col1:
     if st.button("Save Entry", type="primary", use_container_width=True):
         if entry_content.strip():
-            with st.spinner("✨ Analyzing your entry with AI..."):
-                # Analyze the entry
-                analysis = st.session_state.ai_analyzer.analyze_entry(entry_content)
-                
-                # Save to database
-                entry_id = st.session_state.db.add_entry(
-                    content=entry_content,
-                    prompt=st.session_state.current_prompt,
-                    analysis=analysis
-                )
-                
-                st.success("Entry saved successfully!")
-                
-                # Show analysis results in styled cards
-                st.markdown("<br>", unsafe_allow_html=True)
-                st.markdown("<h3 style='color: #1e3a8a;'>🔍 Quick Analysis</h3>", unsafe_allow_html=True)
-                
-                col_a, col_b = st.columns(2)
-                
-                with col_a:
-                    if analysis['sentiment']:
-                        sentiment_badge = get_sentiment_badge(
-                            analysis['sentiment']['label'],
-                            analysis['sentiment']['score']
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.markdown("<h3 style='color: #1e3a8a;'>🔍 Quick Analysis</h3>", unsafe_allow_html=True)
+            
+            col_a, col_b = st.columns(2)
+            with col_a:
+                sentiment_card = st.empty()
+            with col_b:
+                themes_card = st.empty()
+            timing_caption = st.empty()
+            
+            sentiment_card.caption("✨ Reading the emotional tone...")
+            themes_card.caption("✨ Looking for themes...")
+            
+            # Render each card as soon as its stage finishes
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                for stage, analysis in st.session_state.ai_analyzer.analyze_entry_stages(
+                    entry_content, latency_budget=ANALYSIS_LATENCY_BUDGET
+                ):
+                    if stage == 'embedding':
+                        # Everything but the themes is known: insert the entry
+                        # now so the write overlaps with theme detection
+                        pending_save = pool.submit(
+                            st.session_state.db.add_entry,
+                            content=entry_content,
+                            prompt=st.session_state.current_prompt,
+                            analysis=dict(analysis, themes=None)
                         )
                         
-                        st.markdown(f"""
-                        <div class="custom-card">
-                            <h4 style='color: #667eea; margin-bottom: 0.5rem;'>Emotional Tone</h4>
-                            {sentiment_badge}
-                        </div>
-                        """, unsafe_allow_html=True)
-                
-                with col_b:
-                    if analysis['themes']:
-                        theme_badges = get_theme_badges(analysis['themes'])
-                        st.markdown(f"""
-                        <div class="custom-card">
-                            <h4 style='color: #667eea; margin-bottom: 0.5rem;'>Main Themes</h4>
-                            {theme_badges}
-                        </div>
-                        """, unsafe_allow_html=True)
-                
-                st.balloons()
+                    elif stage == 'sentiment':
+                        if analysis['sentiment']:
+                            sentiment_badge = get_sentiment_badge(
+                                analysis['sentiment']['label'],
+                                analysis['sentiment']['score']
+                            )
+                            
+                            sentiment_card.markdown(f"""
+                            <div class="custom-card">
+                                <h4 style='color: #667eea; margin-bottom: 0.5rem;'>Emotional Tone</h4>
+                                {sentiment_badge}
+                            </div>
+                            """, unsafe_allow_html=True)
+                        else:
+                            sentiment_card.empty()
+                    
+                    elif stage == 'themes':
+                        if 'themes' in analysis['deferred']:
+                            themes_card.markdown("""
+                            <div class="custom-card">
+                                <h4 style='color: #667eea; margin-bottom: 0.5rem;'>Main Themes</h4>
+                                <p style="color: #64748b;">Still detecting themes in the background. They will appear in Past Entries shortly.</p>
+                            </div>
+                            """, unsafe_allow_html=True)
+                        elif analysis['themes']:
+                            theme_badges = get_theme_badges(analysis['themes'])
+                            themes_card.markdown(f"""
+                            <div class="custom-card">
+                                <h4 style='color: #667eea; margin-bottom: 0.5rem;'>Main Themes</h4>
+                                {theme_badges}
+                            </div>
+                            """, unsafe_allow_html=True)
+                        else:
+                            themes_card.empty()
+                    
+                    timing_caption.caption("Analysis: " + ", ".join(
+                        f"{name} {seconds * 1000:.0f} ms" for name, seconds in analysis['stages'].items()
+                    ))
                 
-                # Reset for next entry
-                st.session_state.current_prompt = None
+                entry_id = pending_save.result()
                 
-                # Offer to write another
-                if st.button("Write Another Entry"):
-                    st.rerun()
+            # The entry was stored with themes pending (NULL); fill them in
+            # now, or from the background if detection was deferred
+            if 'themes' in analysis['deferred']:
+                st.session_state.ai_analyzer.defer_themes(
+                    entry_id, entry_content, st.session_state.db.set_entry_themes
+                )
+            else:
+                st.session_state.db.set_entry_themes(entry_id, analysis['themes'] or [])
+            
+            st.success("Entry saved successfully!")
+            
+            st.balloons()
+            
+            # Reset for next entry
+            st.session_state.current_prompt = None
+            
+            # Offer to write another
+            if st.button("Write Another Entry"):
+                st.rerun()
         else:
             st.warning("Please write something before saving.")
 
@@ -180,4 +224,6 @@ with st.sidebar:
     st.markdown("""
     Remember: Your journal is a judgment-free zone. 
     Write what you feel, not what you think you should feel.
-    """)
\ No newline at end of file
+    """)
+
+end_rerun()
@@ -6,14 +6,16 @@ from datetime import datetime
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db import DatabaseManager
+from utils.perf import begin_rerun, end_rerun
+from utils.session import init_session
+from utils.analytics import load_analytics
 from utils.helper import format_date
 
 st.set_page_config(page_title="Past Entries", page_icon="", layout="wide")
 
 # Initialize
-if 'db' not in st.session_state:
-    st.session_state.db = DatabaseManager()
+begin_rerun("Past Entries")
+init_session(analyzer=True)
 
 # Header
 st.title("Your Journal History")
@@ -34,6 +36,18 @@ else:
         
         # Search
         search_query = st.text_input("Search entries", placeholder="Search by content...")
+        semantic_search = st.toggle(
+            "Semantic search",
+            help="Find entries by meaning rather than exact words"
+        )
+        
+        missing_embeddings = st.session_state.db.count_missing_embeddings()
+        if missing_embeddings:
+            st.caption(f"{missing_embeddings} entries are not in the semantic index yet.")
+            if st.button("Index older entries"):
+                with st.spinner("Building semantic index..."):
+                    st.session_state.db.backfill_embeddings(st.session_state.ai_analyzer.embed_batch)
+                st.rerun()
         
         # Filter by sentiment
         sentiment_filter = st.multiselect(
@@ -56,16 +70,23 @@ else:
             )
         
         # Sort options
-        sort_by = st.selectbox(
-            "Sort by",
-            ["Newest first", "Oldest first", "Longest first", "Shortest first"]
-        )
+        sort_options = ["Newest first", "Oldest first", "Longest first", "Shortest first"]
+        if search_query and semantic_search:
+            sort_options.insert(0, "Most relevant")
+        sort_by = st.selectbox("Sort by", sort_options)
     
     # Apply filters
     filtered_entries = entries.copy()
+    entries_by_id = {e['id']: e for e in entries}
     
     # Search filter
-    if search_query:
+    relevance = {}
+    if search_query and semantic_search:
+        query_vector = st.session_state.ai_analyzer.embed(search_query)
+        if query_vector is not None:
+            relevance = dict(st.session_state.db.semantic_search(query_vector, k=50))
+            filtered_entries = [entries_by_id[i] for i in relevance if i in entries_by_id]
+    elif search_query:
         filtered_entries = [
             e for e in filtered_entries 
             if search_query.lower() in e['content'].lower()
@@ -86,7 +107,9 @@ else:
         ]
     
     # Apply sorting
-    if sort_by == "Newest first":
+    if sort_by == "Most relevant":
+        filtered_entries = sorted(filtered_entries, key=lambda x: relevance.get(x['id'], 0), reverse=True)
+    elif sort_by == "Newest first":
         filtered_entries = sorted(filtered_entries, key=lambda x: x['timestamp'], reverse=True)
     elif sort_by == "Oldest first":
         filtered_entries = sorted(filtered_entries, key=lambda x: x['timestamp'])
@@ -141,6 +164,8 @@ else:
                 
                 with col1:
                     st.markdown(f"###  {format_date(entry['timestamp'])}")
+                    if entry['id'] in relevance:
+                        st.caption(f"Relevance: {relevance[entry['id']]:.0%}")
                 
                 with col2:
                     if entry.get('sentiment_label'):
@@ -196,6 +221,19 @@ else:
                     with metric_col3:
                         st.metric("Unique Words", entry.get('unique_words', 0))
                     
+                    # Related entries from the semantic index
+                    related = st.session_state.db.get_related_entries(entry['id'], k=3)
+                    if related:
+                        st.markdown("**Related Entries:**")
+                        for related_id, similarity in related:
+                            related_entry = entries_by_id.get(related_id)
+                            if not related_entry:
+                                continue
+                            st.markdown(
+                                f"- *{format_date(related_entry['timestamp'])}* "
+                                f"({similarity:.0%} similar): {related_entry['content'][:80]}..."
+                            )
+                    
                     # Action buttons
                     st.divider()
                     
@@ -252,19 +290,14 @@ with st.sidebar:
         st.metric("Total Words", f"{stats['total_words']:,}")
         
         # Most common theme
-        from collections import Counter
-        all_themes = []
-        for entry in entries:
-            if entry.get('themes'):
-                for theme_data in entry['themes']:
-                    if isinstance(theme_data, (list, tuple)) and len(theme_data) >= 1:
-                        all_themes.append(theme_data[0])
+        theme_counts = load_analytics(st.session_state.db).theme_counts()
         
-        if all_themes:
-            top_theme = Counter(all_themes).most_common(1)[0]
-            st.metric("Top Theme", top_theme[0])
+        if not theme_counts.empty:
+            st.metric("Top Theme", str(theme_counts.index[0]))
     
     st.divider()
     
     st.markdown("###  Tip")
-    st.info("Use the search and filters to find specific entries or reflect on particular time periods.")
\ No newline at end of file
+    st.info("Use the search and filters to find specific entries or reflect on particular time periods.")
+
+end_rerun()
@@ -2,28 +2,29 @@ import streamlit as st
 import sys
 import os
 from datetime import datetime, timedelta
-from collections import Counter
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.db import DatabaseManager
-from utils.helper import generate_weekly_summary
+from utils.perf import begin_rerun, end_rerun
+from utils.session import init_session
+from utils.analytics import load_analytics
+from utils.helper import format_period_summary
 
 st.set_page_config(page_title="Weekly Summary", page_icon="🔍", layout="wide")
 
 # Initialize
-if 'db' not in st.session_state:
-    st.session_state.db = DatabaseManager()
+begin_rerun("Weekly Summary")
+init_session()
 
 # Header
 st.title("🔍 Weekly Reflection & Summary")
 st.markdown("*AI-powered insights from your week of journaling*")
 
-# Get entries
-entries = st.session_state.db.get_all_entries()
+# Columnar view of all entries
+analytics = load_analytics(st.session_state.db)
 
-if not entries:
+if analytics.empty:
     st.info("📝 Start journaling to receive weekly insights! Write at least a few entries to see patterns.")
 else:
     # Time period selector
@@ -46,22 +47,29 @@ else:
         start_date = (datetime.now() - timedelta(days=days)).date()
         end_date = datetime.now().date()
     
-    # Filter entries by date range
-    period_entries = [
-        e for e in entries
-        if start_date <= datetime.fromisoformat(e['timestamp']).date() <= end_date
-    ]
+    if end_date < start_date:
+        start_date, end_date = end_date, start_date
     
-    if not period_entries:
+    # Totals come from the period rollups; the previous range of the same
+    # length is used for the deltas
+    summary = st.session_state.db.get_period_summary(start_date, end_date)
+    previous_end = start_date - timedelta(days=1)
+    previous = st.session_state.db.get_period_summary(previous_end - timedelta(days=summary['days'] - 1), previous_end)
+    
+    # Entries in the range (for the highlighted entries)
+    period = analytics.between(start_date, end_date)
+    period_df = period.entries
+    
+    if summary['entries'] == 0:
         st.warning(f"No entries found between {start_date} and {end_date}. Try selecting a different time period.")
     else:
         # Generate summary
-        summary = generate_weekly_summary(period_entries)
+        summary_text = format_period_summary(summary, f"Reflection ({summary['entries']} entries, {start_date} to {end_date})")
         
         # Display summary in a nice card
         st.markdown(f"""
         <div style='background-color: #f0f9ff; padding: 2rem; border-radius: 10px; border-left: 5px solid #0ea5e9;'>
-            {summary.replace('**', '<strong>').replace('*', '</strong>')}
+            {summary_text.replace('**', '<strong>').replace('*', '</strong>')}
         </div>
         """, unsafe_allow_html=True)
         
@@ -69,28 +77,26 @@ else:
         
         # Detailed breakdown
         st.subheader(" Detailed Breakdown")
+        st.caption(f"Changes are compared with the previous {summary['days']} days.")
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
             st.markdown("### 📝 Writing Activity")
-            st.metric("Total Entries", len(period_entries))
+            st.metric("Total Entries", summary['entries'], delta=summary['entries'] - previous['entries'])
             
-            total_words = sum(e.get('word_count', 0) for e in period_entries)
-            st.metric("Total Words", f"{total_words:,}")
+            total_words = summary['words']
+            st.metric("Total Words", f"{total_words:,}", delta=f"{total_words - previous['words']:,}")
             
-            avg_words = total_words / len(period_entries) if period_entries else 0
-            st.metric("Avg Words/Entry", f"{avg_words:.0f}")
+            avg_words = summary['avg_words']
+            st.metric("Avg Words/Entry", f"{avg_words:.0f}", delta=f"{avg_words - previous['avg_words']:.0f}")
             
             # Days with entries
-            unique_days = len(set([
-                datetime.fromisoformat(e['timestamp']).date() 
-                for e in period_entries
-            ]))
-            total_days = (end_date - start_date).days + 1
+            unique_days = summary['active_days']
+            total_days = summary['days']
             consistency = (unique_days / total_days) * 100
             
-            st.metric("Days Journaled", f"{unique_days}/{total_days}")
+            st.metric("Days Journaled", f"{unique_days}/{total_days}", delta=unique_days - previous['active_days'])
             st.progress(consistency / 100)
             st.caption(f"{consistency:.0f}% consistency")
         
@@ -98,15 +104,15 @@ else:
             st.markdown("### 💭 Emotional Overview")
             
             # Sentiment breakdown
-            sentiments = [e.get('sentiment_label') for e in period_entries if e.get('sentiment_label')]
-            
-            if sentiments:
-                positive_count = sentiments.count('POSITIVE')
-                negative_count = sentiments.count('NEGATIVE')
-                total = len(sentiments)
+            if summary['analyzed']:
+                positive_count = summary['positive']
+                negative_count = summary['negative']
+                total = summary['analyzed']
                 
                 st.metric("Positive Entries", f"{positive_count}/{total}")
                 st.metric("Negative Entries", f"{negative_count}/{total}")
+                if previous['positive_pct'] is not None:
+                    st.caption(f"Positive share {summary['positive_pct'] - previous['positive_pct']:+.0f} pts vs previous period")
                 
                 # Sentiment pie chart
                 import plotly.graph_objects as go
@@ -131,17 +137,10 @@ else:
         with col3:
             st.markdown("### Top Themes")
             
-            # Collect all themes
-            all_themes = []
-            for entry in period_entries:
-                if entry.get('themes'):
-                    for theme_data in entry['themes']:
-                        if isinstance(theme_data, (list, tuple)) and len(theme_data) >= 1:
-                            all_themes.append(theme_data[0])
+            # Entries per theme
+            theme_counts = summary['themes'][:5]
             
-            if all_themes:
-                theme_counts = Counter(all_themes).most_common(5)
-                
+            if theme_counts:
                 for theme, count in theme_counts:
                     st.markdown(f"**{theme}**: {count} entries")
                 
@@ -173,12 +172,48 @@ else:
         
         st.divider()
         
+        # Calendar week/month against the one before, straight from the rollups
+        st.subheader("Period over Period")
+        
+        col1, col2 = st.columns(2)
+        
+        for col, grain, label in [(col1, 'week', 'Week'), (col2, 'month', 'Month')]:
+            comparison = st.session_state.db.get_period_comparison(grain, end_date)
+            current, before = comparison['current'], comparison['previous']
+            
+            with col:
+                st.markdown(f"### {label} over {label.lower()}")
+                st.caption(f"{current['start']} to {current['end']} vs {before['start']} to {before['end']}")
+                
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Entries", current['entries'], delta=current['entries'] - before['entries'])
+                m2.metric("Words", f"{current['words']:,}", delta=f"{current['words'] - before['words']:,}")
+                if current['positive_pct'] is not None and before['positive_pct'] is not None:
+                    m3.metric(
+                        "Positive",
+                        f"{current['positive_pct']:.0f}%",
+                        delta=f"{current['positive_pct'] - before['positive_pct']:+.0f} pts"
+                    )
+                else:
+                    m3.metric("Positive", f"{current['positive_pct']:.0f}%" if current['positive_pct'] is not None else "N/A")
+                
+                if current['themes']:
+                    before_counts = dict(before['themes'])
+                    st.markdown(" · ".join(
+                        f"**{theme}** {count} ({count - before_counts.get(theme, 0):+d})"
+                        for theme, count in current['themes']
+                    ))
+        
+        st.divider()
+        
         # Most significant entries
         st.subheader(" Highlighted Entries")
         
         # Find longest entry
-        if period_entries:
-            longest_entry = max(period_entries, key=lambda x: x.get('word_count', 0))
+        if not period.empty:
+            longest_entry = st.session_state.db.get_entry_by_id(
+                int(period_df.loc[period_df['word_count'].idxmax(), 'id'])
+            )
             
             with st.expander(f"Longest Entry ({longest_entry.get('word_count', 0)} words)"):
                 st.markdown(f"**Date:** {datetime.fromisoformat(longest_entry['timestamp']).strftime('%B %d, %Y')}")
@@ -186,9 +221,11 @@ else:
                 st.write(longest_entry['content'])
             
             # Find most positive entry
-            positive_entries = [e for e in period_entries if e.get('sentiment_label') == 'POSITIVE']
-            if positive_entries:
-                most_positive = max(positive_entries, key=lambda x: x.get('sentiment_score', 0))
+            positive_df = period_df[period_df['sentiment_label'] == 'POSITIVE']
+            if not positive_df.empty:
+                most_positive = st.session_state.db.get_entry_by_id(
+                    int(positive_df.loc[positive_df['sentiment'].idxmax(), 'id'])
+                )
                 
                 with st.expander("Most Positive Entry"):
                     st.markdown(f"**Date:** {datetime.fromisoformat(most_positive['timestamp']).strftime('%B %d, %Y')}")
@@ -243,19 +280,8 @@ else:
         st.divider()
         
         if st.button("Export This Summary"):
-            # Create markdown export
-            export_content = f"""# Weekly Journal Summary
-            
-**Period:** {start_date} to {end_date}
-
-{summary}
-
-## Your Notes
-{notes if notes else "No notes added"}
-
----
-*Generated by AI Journaling Companion*
-"""
+            from utils.exporter import summary_markdown
+            export_content = summary_markdown(start_date, end_date, summary_text, notes)
             
             st.download_button(
                 label="Download Summary",
@@ -287,4 +313,6 @@ with st.sidebar:
     - Compare summaries month-to-month
     - Use insights to set intentions
     - Celebrate your progress!
-    """)
\ No newline at end of file
+    """)
+
+end_rerun()
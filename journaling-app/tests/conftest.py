@@ -0,0 +1,93 @@
+"""Shared fixtures: small synthetic journals (``bench.synthetic``) in temporary files."""
+import sqlite3
+from datetime import date
+
+import pytest
+
+from bench.synthetic import generate_entries
+from database.db import DatabaseManager
+from database.migrations import schedule_backfill
+
+JOURNAL_END = date(2025, 6, 30)
+JOURNAL_ENTRIES = 300
+
+# Compared as sorted rows; term ids depend on insertion order, so postings
+# are keyed by the term itself
+DERIVED_TABLES = {
+    'daily_rollup': 'SELECT * FROM daily_rollup',
+    'period_rollup': 'SELECT * FROM period_rollup',
+    'theme_pairs': 'SELECT * FROM theme_pairs',
+    'term_postings': '''
+        SELECT t.term, p.day, p.entry_id, p.count
+        FROM term_postings p JOIN terms t ON t.id = p.term_id
+    ''',
+    'content_hashes': 'SELECT * FROM content_hashes'
+}
+
+
+def copy_database(source: str, target: str):
+    """Copy a journal through the backup API (it may still have a write-ahead log)"""
+    source_conn, target_conn = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        source_conn.backup(target_conn)
+    finally:
+        source_conn.close()
+        target_conn.close()
+
+
+def table_rows(db: DatabaseManager, sql: str) -> list:
+    conn = db.get_connection()
+    try:
+        # Sums of the same scores in another order differ in the last bits
+        return sorted(
+            tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+            for row in conn.execute(sql)
+        )
+    finally:
+        conn.close()
+
+
+@pytest.fixture(scope='session')
+def journal_template(tmp_path_factory) -> str:
+    path = str(tmp_path_factory.mktemp('journal') / 'template.db')
+    db = DatabaseManager(path)
+    db.import_entries(generate_entries(JOURNAL_ENTRIES, years=1, seed=11, end=JOURNAL_END))
+    return path
+
+
+@pytest.fixture
+def journal(journal_template, tmp_path) -> DatabaseManager:
+    """A DatabaseManager over a fresh copy of the synthetic journal (entries oldest first)"""
+    path = str(tmp_path / 'journal.db')
+    copy_database(journal_template, path)
+    return DatabaseManager(path)
+
+
+@pytest.fixture
+def restart_backfills():
+    """``restart(db)``: empty every backfillable store, schedule its backfill
+    and return a new DatabaseManager for the file"""
+    def restart(db: DatabaseManager) -> DatabaseManager:
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        for store in db.derived_stores:
+            if store.backfillable:
+                store.reset(cursor)
+                schedule_backfill(cursor, store.name)
+        conn.commit()
+        conn.close()
+        return DatabaseManager(db.db_path)
+    return restart
+
+
+@pytest.fixture
+def rebuilt(tmp_path, restart_backfills):
+    """``rebuild(db)``: a copy of ``db``'s journal with every backfillable
+    store recomputed from its entries"""
+    def rebuild(db: DatabaseManager) -> DatabaseManager:
+        path = str(tmp_path / 'rebuilt.db')
+        copy_database(db.db_path, path)
+        copy = restart_backfills(DatabaseManager(path))
+        copy.run_backfills(pause=0)
+        return copy
+    return rebuild
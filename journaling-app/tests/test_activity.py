@@ -0,0 +1,79 @@
+"""ActivityCalendar streaks against a day-by-day count, across gaps and deletes."""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from database.activity import ActivityCalendar
+
+
+def expected_summary(counts):
+    """Streaks from {date: entries}, walking every day in order"""
+    active = sorted(day for day, count in counts.items() if count > 0)
+    if not active:
+        return {'current': 0, 'longest': 0, 'total_days': 0}
+    runs, run = [], 1
+    for previous, day in zip(active, active[1:]):
+        if day - previous == timedelta(days=1):
+            run += 1
+        else:
+            runs.append(run)
+            run = 1
+    runs.append(run)
+    return {'current': runs[-1], 'longest': max(runs), 'total_days': len(active)}
+
+
+def test_streaks_across_gaps():
+    calendar = ActivityCalendar()
+    start = date(2024, 12, 20)
+    # Runs of 3, 5 (over the new year) and 2 days, with one-day and longer gaps
+    for offset in [0, 1, 2, 4, 5, 6, 7, 8, 30, 31]:
+        calendar.add((start + timedelta(days=offset)).isoformat())
+    calendar.add(start.isoformat())  # a second entry on a day adds no day
+    assert calendar.summary() == {'current': 2, 'longest': 5, 'total_days': 10}
+    assert calendar.years() == [2024, 2025]
+
+
+def test_deletes_split_and_end_streaks():
+    calendar = ActivityCalendar()
+    start = date(2025, 3, 1)
+    days = [(start + timedelta(days=offset)).isoformat() for offset in range(10)]
+    for day in days:
+        calendar.add(day)
+    calendar.add(days[4])
+    assert calendar.summary() == {'current': 10, 'longest': 10, 'total_days': 10}
+
+    calendar.add(days[4], -1)  # one of the two entries that day
+    assert calendar.summary()['longest'] == 10
+    calendar.add(days[4], -1)
+    assert calendar.summary() == {'current': 5, 'longest': 5, 'total_days': 9}
+    calendar.add(days[9], -1)
+    assert calendar.summary() == {'current': 4, 'longest': 4, 'total_days': 8}
+    calendar.add(days[9], -1)  # counts never go below zero
+    calendar.add(days[9])
+    assert calendar.summary() == {'current': 5, 'longest': 5, 'total_days': 9}
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_adds_and_deletes(seed):
+    rng = np.random.default_rng(seed)
+    calendar = ActivityCalendar()
+    counts = {}
+    start = date(2023, 1, 1)
+    for _ in range(600):
+        day = start + timedelta(days=int(rng.integers(0, 400)))
+        change = 1 if rng.random() < 0.7 or not counts.get(day) else -1
+        counts[day] = counts.get(day, 0) + change
+        calendar.add(day.isoformat(), change)
+        if rng.random() < 0.1:
+            assert calendar.summary() == expected_summary(counts)
+    assert calendar.summary() == expected_summary(counts)
+
+
+def test_empty_calendar():
+    calendar = ActivityCalendar()
+    assert calendar.summary() == {'current': 0, 'longest': 0, 'total_days': 0}
+    calendar.add('2025-01-01')
+    calendar.add('2025-01-01', -1)
+    assert calendar.summary() == {'current': 0, 'longest': 0, 'total_days': 0}
+    assert calendar.years() == []
@@ -0,0 +1,89 @@
+"""Upgrading a journal created by the first release to the current schema."""
+import json
+import os
+import sqlite3
+
+import pytest
+
+from bench.synthetic import generate_entries
+from conftest import DERIVED_TABLES, JOURNAL_END, copy_database, table_rows
+from database.db import DatabaseManager
+from database.migrations import MIGRATIONS, VACUUM_PENDING, migrate, pending_backfills, schema_version
+
+# The journal shipped with the app has the baseline schema (user_version 0)
+BASELINE_DB = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database.db')
+
+ENTRY_COLUMNS = ('timestamp', 'content', 'prompt', 'word_count', 'token_count',
+                 'unique_words', 'sentiment_label', 'sentiment_score', 'themes')
+
+
+def baseline_journal(path: str, count: int = 200):
+    """A copy of the baseline journal with ``count`` entries written as the first release did"""
+    copy_database(BASELINE_DB, path)
+    conn = sqlite3.connect(path)
+    assert schema_version(conn.cursor()) == 0
+    conn.executemany(
+        f"INSERT INTO entries ({', '.join(ENTRY_COLUMNS)}) VALUES ({', '.join('?' * len(ENTRY_COLUMNS))})",
+        [
+            tuple(json.dumps(entry[column]) if column == 'themes' else entry[column] for column in ENTRY_COLUMNS)
+            for entry in generate_entries(count, years=1, seed=3, end=JOURNAL_END)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+
+def meta(db: DatabaseManager) -> dict:
+    conn = db.get_connection()
+    try:
+        return dict(conn.execute('SELECT key, value FROM meta').fetchall())
+    finally:
+        conn.close()
+
+
+def test_upgrade_from_baseline(tmp_path, rebuilt):
+    path = str(tmp_path / 'journal.db')
+    baseline_journal(path)
+    db = DatabaseManager(path)
+
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    assert schema_version(cursor) == MIGRATIONS[-1][0]
+    tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert set(DERIVED_TABLES) <= tables
+    backfills = pending_backfills(cursor)
+    conn.close()
+    assert set(backfills) == {store.name for store in db.derived_stores if store.backfillable}
+    assert meta(db).get(VACUUM_PENDING)
+    assert not any(key.startswith('built:') for key in meta(db))
+
+    # Reads fall back to entries for the part a backfill has not reached
+    for name in backfills:
+        db._backfill_batch(name, 80)
+    expected = rebuilt(db)
+    assert db.get_statistics() == pytest.approx(expected.get_statistics())
+    assert db.get_streak_info() == expected.get_streak_info()
+    assert db.import_entries(generate_entries(200, years=1, seed=3, end=JOURNAL_END)) == \
+        {'inserted': 0, 'skipped': 200}
+
+    db.run_backfills(pause=0)
+    assert not db._backfilling
+    for table, sql in DERIVED_TABLES.items():
+        assert table_rows(db, sql) == table_rows(expected, sql), table
+
+    conn = db.get_connection()
+    assert migrate(conn) == []
+    conn.close()
+
+
+def test_empty_baseline_needs_no_backfill(tmp_path):
+    path = str(tmp_path / 'journal.db')
+    baseline_journal(path, count=0)
+    conn = sqlite3.connect(path)
+    conn.execute('DELETE FROM entries')
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+    assert not db._backfilling
+    assert db.get_statistics()['total_entries'] == 0
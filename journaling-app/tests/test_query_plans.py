@@ -0,0 +1,51 @@
+"""Query plans of DatabaseManager statements against bench/query_plans.txt.
+
+After an intended schema or query change, regenerate the golden file with
+``python -m bench.plans`` and review its diff.
+"""
+import difflib
+
+import pytest
+
+from bench.plans import HOT_PATHS, build_plans, plan_violations, read_golden, render
+
+HOT_CASES = sorted({case for cases in HOT_PATHS.values() for case in cases})
+
+
+@pytest.fixture(scope='module')
+def plans():
+    return build_plans()
+
+
+@pytest.fixture(scope='module')
+def golden():
+    return read_golden()
+
+
+def _golden_statements(golden):
+    return {(sql, tuple(plan)) for entries in golden.values() for sql, plan in entries}
+
+
+@pytest.mark.parametrize('case', HOT_CASES)
+def test_hot_path_plan_matches_golden(plans, golden, case):
+    known = _golden_statements(golden)
+    changed = [
+        '\n'.join([sql] + ['    ' + line for line in plan])
+        for sql, plan in plans.get(case, []) if (sql, tuple(plan)) not in known
+    ]
+    assert not changed, f"{case} plans differ from bench/query_plans.txt:\n" + '\n'.join(changed)
+
+
+@pytest.mark.parametrize('case', HOT_CASES)
+def test_hot_path_uses_indexes(plans, case):
+    problems = [
+        f"{detail}\n    {sql}" for sql, plan in plans.get(case, []) for detail in plan_violations(plan)
+    ]
+    assert not problems, f"{case} scans or sorts without an index:\n" + '\n'.join(problems)
+
+
+def test_all_plans_match_golden(plans, golden):
+    expected, current = render(golden), render(plans)
+    diff = '\n'.join(difflib.unified_diff(expected, current, 'bench/query_plans.txt', 'current plans',
+                                          lineterm=''))
+    assert expected == current, diff
@@ -0,0 +1,108 @@
+"""Period summaries from the rollups against a direct aggregate over entries."""
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import JOURNAL_END
+from database.rollups import PeriodRollupStore, cover_range, theme_names
+
+RANGES = [
+    (date(2024, 7, 1), JOURNAL_END),  # the whole journal
+    (date(2025, 1, 15), date(2025, 3, 3)),  # partial months around whole ones
+    (date(2024, 12, 30), date(2025, 1, 5)),  # one week across a year
+    (date(2025, 2, 3), date(2025, 2, 3)),
+    (date(2025, 5, 20), date(2025, 4, 11)),  # reversed
+    (date(2026, 1, 1), date(2026, 2, 1))  # after the last entry
+]
+
+
+@pytest.mark.parametrize('start, end', [
+    (date(2025, 1, 1), date(2025, 1, 31)),
+    (date(2024, 2, 10), date(2024, 4, 2)),
+    (date(2024, 12, 28), date(2025, 3, 9)),
+    (date(2025, 6, 5), date(2025, 6, 5))
+])
+def test_cover_range_tiles_the_range(start, end):
+    pieces = cover_range(start, end)
+    day = start
+    for grain, piece in pieces:
+        assert piece == day
+        if grain == 'month':
+            assert piece.day == 1
+            day = (piece.replace(day=28) + timedelta(days=4)).replace(day=1)
+        elif grain == 'week':
+            assert piece.weekday() == 0
+            day = piece + timedelta(days=7)
+        else:
+            day = piece + timedelta(days=1)
+    assert day == end + timedelta(days=1)
+
+
+def expected_summary(db, start, end):
+    if end < start:
+        start, end = end, start
+    conn = db.get_connection()
+    try:
+        row = conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(word_count), 0),
+                   COALESCE(SUM(sentiment_label = 'POSITIVE'), 0),
+                   COALESCE(SUM(sentiment_label = 'NEGATIVE'), 0),
+                   SUM(CASE sentiment_label WHEN 'POSITIVE' THEN sentiment_score
+                                            WHEN 'NEGATIVE' THEN -sentiment_score END),
+                   COUNT(DISTINCT DATE(timestamp))
+            FROM entries WHERE DATE(timestamp) BETWEEN ? AND ?
+        ''', (start.isoformat(), end.isoformat())).fetchone()
+        counts = {}
+        for (themes,) in conn.execute(
+            'SELECT themes FROM entries WHERE DATE(timestamp) BETWEEN ? AND ?',
+            (start.isoformat(), end.isoformat())
+        ):
+            for theme in theme_names(json.loads(themes) if themes else []):
+                counts[theme] = counts.get(theme, 0) + 1
+    finally:
+        conn.close()
+    entries, words, positive, negative, sentiment_sum, active_days = row
+    analyzed = positive + negative
+    return {
+        'entries': entries,
+        'words': words,
+        'positive': positive,
+        'negative': negative,
+        'avg_sentiment': sentiment_sum / analyzed if analyzed else None,
+        'active_days': active_days,
+        'themes': sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    }
+
+
+def assert_matches_entries(db, start, end):
+    conn = db.get_connection()
+    try:
+        summary = PeriodRollupStore.summarize(conn.cursor(), start, end)
+    finally:
+        conn.close()
+    expected = expected_summary(db, start, end)
+    assert summary['avg_sentiment'] == pytest.approx(expected.pop('avg_sentiment'))
+    assert {key: summary[key] for key in expected} == expected
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_summary_matches_entries(journal, start, end):
+    assert_matches_entries(journal, start, end)
+
+
+def test_summary_matches_entries_after_writes(journal):
+    entries = journal.get_all_entries()
+    journal.delete_entries(ids=[entry['id'] for entry in entries[::9]], reclaim=False)
+    journal.delete_entries(start_date='2025-02-10', end_date='2025-02-16T23:59:59', reclaim=False)
+    journal.import_entries([{
+        'timestamp': '2025-02-12T21:30:00',
+        'content': 'A late entry about work and sleep.',
+        'word_count': 7,
+        'sentiment_label': 'NEGATIVE',
+        'sentiment_score': 0.75,
+        'themes': [['work stress', 0.9], ['sleep', 0.5]]
+    }])
+    for start, end in RANGES:
+        assert_matches_entries(journal, start, end)
+
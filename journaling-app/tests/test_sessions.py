@@ -0,0 +1,92 @@
+"""Streamlit sessions share one DatabaseManager and analyzer (``utils.session``)."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import models.sentimentpipeline
+from bench.synthetic import FastAnalyzer
+from conftest import copy_database
+from database.db import DatabaseManager
+from utils.session import get_analyzer, get_database
+
+APP = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app.py')
+
+
+def _page():
+    # Runs as a Streamlit script, like the pages that need the models
+    import streamlit as st
+
+    from utils.session import init_session
+
+    init_session(analyzer=True)
+    st.session_state.dashboard = st.session_state.db.get_dashboard(recent=3)
+
+
+@pytest.fixture
+def app_db(journal_template, tmp_path, monkeypatch):
+    """Path of the journal the app opens by default, with the models replaced"""
+    copy_database(journal_template, str(tmp_path / 'database.db'))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('JOURNAL_MAINTENANCE_INTERVAL', '0')
+    monkeypatch.setattr(models.sentimentpipeline, 'AIAnalyzer', FastAnalyzer)
+    get_database.clear()
+    get_analyzer.clear()
+    yield os.path.abspath('database.db')
+    get_database.clear()
+    get_analyzer.clear()
+
+
+def run_session() -> AppTest:
+    at = AppTest.from_function(_page, default_timeout=60)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_sessions_share_resources(app_db):
+    # AppTest drives one script run at a time (it has a single runtime)
+    sessions = [run_session() for _ in range(4)]
+    db = sessions[0].session_state.db
+    analyzer = sessions[0].session_state.ai_analyzer
+    assert db.db_path == 'database.db'
+    assert isinstance(analyzer, FastAnalyzer)
+    for at in sessions[1:]:
+        assert at.session_state.db is db
+        assert at.session_state.ai_analyzer is analyzer
+
+    # The home page attaches the same manager and loads no models
+    home = AppTest.from_file(APP, default_timeout=60)
+    home.run()
+    assert not home.exception
+    assert home.session_state.db is db
+    assert 'ai_analyzer' not in home.session_state
+
+
+def test_calendar_consistent_after_interleaved_writes(app_db):
+    db = run_session().session_state.db
+    analyzer = FastAnalyzer()
+
+    def write(worker):
+        for i in range(15):
+            text = f"Session {worker} note {i} about work and sleep"
+            entry_id = db.add_entry(text, "", analyzer.analyze_entry(text))
+            if i % 3 == 0:
+                db.delete_entry(entry_id)
+
+    # New sessions read the shared calendar while the writers change it
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        writes = [pool.submit(write, worker) for worker in range(4)]
+        while not all(future.done() for future in writes):
+            assert run_session().session_state.db is db
+    for future in writes:
+        future.result()
+
+    fresh = DatabaseManager(app_db)
+    expected = fresh.get_dashboard(recent=3)
+    dashboard = run_session().session_state.dashboard
+    assert dashboard['streak'] == expected['streak']
+    assert (dashboard['year_activity'] == expected['year_activity']).all()
+    assert dashboard['total_entries'] == expected['total_entries']
+    assert db.get_streak_info() == fresh.get_streak_info()
@@ -0,0 +1,78 @@
+"""VectorIndex search against brute-force cosine similarity."""
+import numpy as np
+import pytest
+
+from database.vectors import VectorIndex, decode_vector, encode_vector
+
+DIM = 32
+
+
+def brute_force(vectors, query, k, exclude=None):
+    """(entry_id, cosine) for the ``k`` most similar vectors, best first"""
+    query = query / np.linalg.norm(query)
+    scores = {
+        entry_id: float(vector @ query / np.linalg.norm(vector))
+        for entry_id, vector in vectors.items() if entry_id != exclude
+    }
+    return sorted(scores.items(), key=lambda item: -item[1])[:k]
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(5)
+    return {entry_id: rng.normal(size=DIM).astype(np.float32) for entry_id in range(1, 401)}
+
+
+def assert_same_results(got, expected):
+    assert [entry_id for entry_id, _ in got] == [entry_id for entry_id, _ in expected]
+    np.testing.assert_allclose([score for _, score in got], [score for _, score in expected], atol=1e-5)
+
+
+@pytest.mark.parametrize('k', [1, 10, 400, 1000])
+def test_search_matches_brute_force(vectors, k):
+    index = VectorIndex()
+    ids = list(vectors)
+    index.add_many(ids[:300], np.stack([vectors[i] for i in ids[:300]]))
+    for entry_id in ids[300:]:
+        index.add(entry_id, vectors[entry_id])
+
+    rng = np.random.default_rng(k)
+    for _ in range(5):
+        query = rng.normal(size=DIM).astype(np.float32)
+        assert_same_results(index.search(query, k), brute_force(vectors, query, k))
+
+
+def test_search_after_replace_and_remove(vectors):
+    index = VectorIndex()
+    index.add_many(list(vectors), np.stack(list(vectors.values())))
+    rng = np.random.default_rng(9)
+    for entry_id in range(1, 401, 3):
+        assert index.remove(entry_id)
+        del vectors[entry_id]
+    for entry_id in range(2, 401, 7):
+        vectors[entry_id] = rng.normal(size=DIM).astype(np.float32)
+        index.add(entry_id, vectors[entry_id])
+
+    assert len(index) == len(vectors)
+    assert not index.remove(1)
+    for entry_id in (2, 5, 200):
+        query = vectors[entry_id]
+        assert_same_results(index.search(query, 10, exclude=entry_id),
+                            brute_force(vectors, query, 10, exclude=entry_id))
+
+
+def test_search_edge_cases():
+    index = VectorIndex()
+    assert index.search(np.ones(DIM), 5) == []
+    index.add(1, np.ones(DIM))
+    assert index.search(np.ones(DIM + 1), 5) == []
+    assert index.search(np.ones(DIM), 5, exclude=1) == []
+    with pytest.raises(ValueError):
+        index.add(2, np.ones(DIM + 1))
+
+
+def test_storage_round_trip(vectors):
+    vector = vectors[1] / np.linalg.norm(vectors[1])
+    decoded = decode_vector(encode_vector(vector))
+    assert decoded.dtype == np.float32
+    np.testing.assert_allclose(decoded, vector, atol=1e-3)
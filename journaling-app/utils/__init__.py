@@ -1,8 +1,10 @@
+from .analytics import AnalyticsFrame, load_analytics
 from .helper import (
     create_sentiment_timeline,
     create_theme_distribution,
     create_writing_volume_chart,
     generate_weekly_summary,
+    format_period_summary,
     format_date,
     get_streak_info,
     export_to_markdown
@@ -15,10 +17,13 @@ from .styles import (
 )
 
 __all__ = [
+    'AnalyticsFrame',
+    'load_analytics',
     'create_sentiment_timeline',
     'create_theme_distribution', 
     'create_writing_volume_chart',
     'generate_weekly_summary',
+    'format_period_summary',
     'format_date',
     'get_streak_info',
     'export_to_markdown',
@@ -30,11 +35,13 @@ __all__ = [
 
 
 # utils/__init__.py
+from .analytics import AnalyticsFrame, load_analytics
 from .helper import (
     create_sentiment_timeline,
     create_theme_distribution,
     create_writing_volume_chart,
     generate_weekly_summary,
+    format_period_summary,
     format_date,
     get_streak_info,
     export_to_markdown
@@ -47,10 +54,13 @@ from .styles import (
 )
 
 __all__ = [
+    'AnalyticsFrame',
+    'load_analytics',
     'create_sentiment_timeline',
     'create_theme_distribution', 
     'create_writing_volume_chart',
     'generate_weekly_summary',
+    'format_period_summary',
     'format_date',
     'get_streak_info',
     'export_to_markdown',
@@ -0,0 +1,119 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .metrics import ANALYTICS_CACHE
+from .perf import timed
+
+ENTRY_COLUMNS = ['id', 'timestamp', 'word_count', 'sentiment_label', 'sentiment_score']
+THEME_COLUMNS = ['entry_id', 'theme', 'score']
+
+
+class AnalyticsFrame:
+    """Typed columnar view of the journal used by every chart and summary.
+
+    ``entries`` has one row per entry, newest first: id, timestamp
+    (datetime64), date (midnight of the entry's day), word_count,
+    sentiment_label and signed ``sentiment`` (NaN when not analyzed).
+    ``themes`` has one row per (entry, theme) with the entry's timestamp
+    and date repeated so it can be filtered on its own. ``version`` is the
+    database data version the frame was loaded at (None if built by hand).
+    """
+
+    def __init__(self, entries: pd.DataFrame, themes: pd.DataFrame, version: Optional[int] = None):
+        self.entries = entries
+        self.themes = themes
+        self.version = version
+
+    @classmethod
+    def from_rows(cls, entry_rows: List[tuple], theme_rows: List[tuple]) -> 'AnalyticsFrame':
+        entries = pd.DataFrame.from_records(entry_rows, columns=ENTRY_COLUMNS)
+        entries['id'] = entries['id'].astype('int64')
+        entries['timestamp'] = pd.to_datetime(entries['timestamp'], format='ISO8601')
+        entries['date'] = entries['timestamp'].dt.normalize()
+        entries['word_count'] = entries['word_count'].fillna(0).astype('int64')
+        score = entries.pop('sentiment_score').astype('float64')
+        entries['sentiment'] = np.where(entries['sentiment_label'] == 'POSITIVE', score, -score)
+        entries.loc[entries['sentiment_label'].isna(), 'sentiment'] = np.nan
+
+        themes = pd.DataFrame.from_records(theme_rows, columns=THEME_COLUMNS)
+        themes = themes.dropna(subset=['theme'])
+        themes['score'] = themes['score'].astype('float64')
+        lookup = entries.set_index('id')[['timestamp', 'date']]
+        themes = themes.join(lookup, on='entry_id', how='inner')
+        themes['theme'] = themes['theme'].astype('category')
+
+        return cls(entries.reset_index(drop=True), themes.reset_index(drop=True))
+
+    @classmethod
+    def from_entries(cls, entries: List[Dict]) -> 'AnalyticsFrame':
+        """Build a frame from entry dicts (as returned by DatabaseManager)"""
+        entry_rows = [tuple(e.get(c) for c in ENTRY_COLUMNS) for e in entries]
+        theme_rows = [
+            (e['id'], t[0] if isinstance(t, (list, tuple)) else str(t),
+             t[1] if isinstance(t, (list, tuple)) and len(t) >= 2 else None)
+            for e in entries for t in (e.get('themes') or [])
+        ]
+        frame = cls.from_rows(entry_rows, theme_rows)
+        frame.entries = frame.entries.sort_values('timestamp', ascending=False, ignore_index=True)
+        return frame
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def empty(self) -> bool:
+        return self.entries.empty
+
+    def _filter(self, mask: pd.Series, theme_mask: pd.Series) -> 'AnalyticsFrame':
+        return AnalyticsFrame(self.entries[mask], self.themes[theme_mask], self.version)
+
+    def since(self, days: int, now: Optional[datetime] = None) -> 'AnalyticsFrame':
+        """Entries written in the last ``days`` days"""
+        cutoff = pd.Timestamp((now or datetime.now()) - timedelta(days=days))
+        return self._filter(self.entries['timestamp'] > cutoff, self.themes['timestamp'] > cutoff)
+
+    def between(self, start_date, end_date) -> 'AnalyticsFrame':
+        """Entries whose date falls in [start_date, end_date] (inclusive)"""
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        return self._filter(
+            self.entries['date'].between(start, end),
+            self.themes['date'].between(start, end)
+        )
+
+    def theme_counts(self) -> pd.Series:
+        """Number of entries per theme, most common first"""
+        counts = self.themes['theme'].value_counts()
+        return counts[counts > 0]
+
+
+# Frames are immutable snapshots, so one per data version is shared by every
+# session and page until the next write
+_cache: 'OrderedDict[tuple, AnalyticsFrame]' = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 4
+
+
+@timed(rows=len)
+def load_analytics(db) -> AnalyticsFrame:
+    """Return the analytics frame for the current data version of ``db``"""
+    key = (db.db_path, db.get_data_version())
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            ANALYTICS_CACHE.inc('hit')
+            return _cache[key]
+    ANALYTICS_CACHE.inc('miss')
+
+    frame = AnalyticsFrame.from_rows(db.get_analytics_rows(), db.get_theme_rows())
+    frame.version = key[1]
+
+    with _cache_lock:
+        _cache[key] = frame
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return frame
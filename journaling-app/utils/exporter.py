@@ -0,0 +1,217 @@
+import csv
+import gzip
+import html
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from .helper import format_date
+
+EXPORT_FORMATS = {
+    'markdown': {'extension': 'md', 'mime': 'text/markdown'},
+    'jsonl': {'extension': 'jsonl', 'mime': 'application/x-ndjson'},
+    'csv': {'extension': 'csv', 'mime': 'text/csv'},
+    'html': {'extension': 'html', 'mime': 'text/html'}
+}
+
+CSV_COLUMNS = [
+    'id', 'timestamp', 'prompt', 'content', 'word_count', 'token_count',
+    'unique_words', 'sentiment_label', 'sentiment_score', 'themes'
+]
+
+# Markdown exports carry each entry's raw fields in an HTML comment (hidden
+# when rendered) so they can be imported back without re-analysis
+MARKDOWN_META_PREFIX = '<!-- entry '
+MARKDOWN_META_SUFFIX = ' -->'
+MARKDOWN_META_FIELDS = [
+    'timestamp', 'prompt', 'word_count', 'token_count', 'unique_words',
+    'sentiment_label', 'sentiment_score', 'themes'
+]
+
+
+class ChunkedWriter:
+    """Text sink that buffers small writes and flushes them in large chunks.
+
+    Appending to a list and joining once per chunk keeps export linear in
+    the output size (no repeated string concatenation) while memory stays
+    bounded by ``chunk_size``.
+    """
+
+    def __init__(self, stream, chunk_size: int = 64 * 1024, encoding: str = 'utf-8'):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.bytes_written = 0
+        self._parts = []
+        self._pending = 0
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._parts:
+            return
+        data = ''.join(self._parts)
+        if isinstance(self.stream, io.TextIOBase):
+            self.stream.write(data)
+            self.bytes_written += len(data)
+        else:
+            encoded = data.encode(self.encoding)
+            self.stream.write(encoded)
+            self.bytes_written += len(encoded)
+        self._parts = []
+        self._pending = 0
+
+
+def _theme_names(themes) -> list:
+    return [t[0] if isinstance(t, (list, tuple)) else str(t) for t in themes or []]
+
+
+def markdown_metadata(entry: Dict) -> str:
+    """One-line comment holding the fields needed to re-import ``entry``"""
+    meta = {key: entry.get(key) for key in MARKDOWN_META_FIELDS}
+    meta['chars'] = len(entry['content'])
+    # '>' only appears inside JSON strings; escaping it keeps '-->' out of the comment
+    payload = json.dumps(meta, ensure_ascii=False).replace('>', '\\u003e')
+    return f"{MARKDOWN_META_PREFIX}{payload}{MARKDOWN_META_SUFFIX}\n"
+
+
+def write_markdown(entries: Iterable[Dict], out: ChunkedWriter):
+    out.write("# My Journal Entries\n\n")
+    out.write(f"Exported on {datetime.now().strftime('%B %d, %Y')}\n\n")
+    out.write("---\n\n")
+
+    for entry in entries:
+        out.write(f"## {format_date(entry['timestamp'])}\n\n")
+
+        if entry.get('prompt'):
+            out.write(f"**Prompt:** *{entry['prompt']}*\n\n")
+
+        out.write(markdown_metadata(entry))
+        out.write(f"{entry['content']}\n\n")
+
+        if entry.get('sentiment_label'):
+            out.write(f"**Sentiment:** {entry['sentiment_label']}\n")
+
+        if entry.get('themes'):
+            out.write(f"**Themes:** {', '.join(_theme_names(entry['themes']))}\n")
+
+        out.write("\n---\n\n")
+
+
+def write_jsonl(entries: Iterable[Dict], out: ChunkedWriter):
+    for entry in entries:
+        record = {key: entry.get(key) for key in CSV_COLUMNS}
+        out.write(json.dumps(record, ensure_ascii=False))
+        out.write("\n")
+
+
+def write_csv(entries: Iterable[Dict], out: ChunkedWriter):
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for entry in entries:
+        row = [entry.get(key) for key in CSV_COLUMNS]
+        row[-1] = json.dumps(entry.get('themes') or [])
+        writer.writerow(row)
+
+
+def write_html(entries: Iterable[Dict], out: ChunkedWriter):
+    out.write(
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>My Journal Entries</title>"
+        "<style>body{font-family:sans-serif;max-width:48rem;margin:2rem auto;color:#334155}"
+        "article{border-bottom:1px solid #e2e8f0;padding:1rem 0}.meta{color:#94a3b8}</style>"
+        "</head><body>\n<h1>My Journal Entries</h1>\n"
+    )
+    out.write(f"<p class=\"meta\">Exported on {datetime.now().strftime('%B %d, %Y')}</p>\n")
+
+    for entry in entries:
+        out.write(f"<article>\n<h2>{html.escape(format_date(entry['timestamp']))}</h2>\n")
+        if entry.get('prompt'):
+            out.write(f"<p><em>{html.escape(entry['prompt'])}</em></p>\n")
+        out.write(f"<p>{html.escape(entry['content']).replace(chr(10), '<br>')}</p>\n")
+
+        meta = []
+        if entry.get('sentiment_label'):
+            meta.append(f"Sentiment: {entry['sentiment_label']}")
+        if entry.get('themes'):
+            meta.append(f"Themes: {', '.join(_theme_names(entry['themes']))}")
+        if meta:
+            out.write(f"<p class=\"meta\">{html.escape(' · '.join(meta))}</p>\n")
+        out.write("</article>\n")
+
+    out.write("</body></html>\n")
+
+
+WRITERS = {
+    'markdown': write_markdown,
+    'jsonl': write_jsonl,
+    'csv': write_csv,
+    'html': write_html
+}
+
+
+def export_entries(db, fmt: str = 'markdown', path: Optional[str] = None,
+                   compress: bool = False, newest_first: bool = True) -> Dict:
+    """Stream every entry from ``db`` to a file in ``fmt``.
+
+    Entries are read in batches and written through a ChunkedWriter, so
+    memory stays flat regardless of journal size. Returns the output path
+    (a temp file unless ``path`` is given) with size and throughput.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    extension = EXPORT_FORMATS[fmt]['extension'] + ('.gz' if compress else '')
+    if path is None:
+        fd, path = tempfile.mkstemp(prefix='journal_export_', suffix=f'.{extension}')
+        os.close(fd)
+
+    start = time.perf_counter()
+    entries = 0
+
+    def counted(rows):
+        nonlocal entries
+        for row in rows:
+            entries += 1
+            yield row
+
+    with open(path, 'wb') as raw:
+        stream = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+        out = ChunkedWriter(stream)
+        WRITERS[fmt](counted(db.iter_entries(newest_first=newest_first)), out)
+        out.flush()
+        if compress:
+            stream.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        'path': path,
+        'format': fmt,
+        'file_name': f"journal_export_{entries}_entries.{extension}",
+        'mime': 'application/gzip' if compress else EXPORT_FORMATS[fmt]['mime'],
+        'entries': entries,
+        'bytes': out.bytes_written,
+        'file_bytes': os.path.getsize(path),
+        'seconds': seconds,
+        'mb_per_s': out.bytes_written / (1024 * 1024) / seconds if seconds > 0 else 0.0
+    }
+
+
+def summary_markdown(start_date, end_date, summary: str, notes: str) -> str:
+    """Markdown document for the Weekly Summary export"""
+    return "".join([
+        "# Weekly Journal Summary\n\n",
+        f"**Period:** {start_date} to {end_date}\n\n",
+        f"{summary}\n\n",
+        "## Your Notes\n",
+        f"{notes if notes else 'No notes added'}\n\n",
+        "---\n",
+        "*Generated by AI Journaling Companion*\n"
+    ])
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable
+
+import numpy as np
+
+
+def _value_bytes(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_value_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (str, dict, list, tuple)):
+            return sum(_value_bytes(item) for item in value)
+        return 8 * len(value)
+    return 8
+
+
+def figure_bytes(figure) -> int:
+    """Approximate memory held by a figure's traces (arrays dominate).
+
+    Much cheaper than serializing the figure, which would roughly double
+    the cost of every cache miss.
+    """
+    return sum(_value_bytes(trace.to_plotly_json()) for trace in figure.data)
+
+
+class FigureCache:
+    """Process-wide LRU cache of built Plotly figures.
+
+    Keys should include everything the figure depends on: chart type,
+    filter parameters and the database data version. Entries are evicted
+    least-recently-used once either the entry count or the total estimated
+    size (``figure_bytes``) exceeds its bound. Cached figures are shared
+    between sessions and must not be mutated by callers.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.build_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def get_or_build(self, key: Hashable, builder: Callable):
+        """Return the cached figure for ``key``, building it on a miss"""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += item[1]
+                return item[0]
+            self.misses += 1
+
+        start = time.perf_counter()
+        figure = builder()
+        elapsed = time.perf_counter() - start
+        size = figure_bytes(figure) if figure is not None else 0
+
+        with self._lock:
+            self.build_seconds += elapsed
+            if size > self.max_bytes:
+                return figure
+            if key in self._items:
+                self._bytes -= self._items.pop(key)[2]
+            self._items[key] = (figure, elapsed, size)
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._items.popitem(last=False)
+                self._bytes -= evicted_size
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._items),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'build_seconds': self.build_seconds,
+                'saved_seconds': self.saved_seconds
+            }
+
+
+# Shared by every session in this process
+figure_cache = FigureCache()
@@ -1,60 +1,136 @@
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
-from datetime import datetime, timedelta
-from collections import Counter
-from typing import List, Dict
+import numpy as np
+from datetime import datetime
+from typing import List, Dict, Optional, Union
 
-def create_sentiment_timeline(entries: List[Dict]):
-    """Create a timeline visualization of sentiment"""
-    if not entries:
+from .analytics import AnalyticsFrame
+from .perf import timed
+
+def _as_frame(entries: Union[AnalyticsFrame, List[Dict]]) -> AnalyticsFrame:
+    """Accept either an AnalyticsFrame or a list of entry dicts"""
+    if isinstance(entries, AnalyticsFrame):
+        return entries
+    return AnalyticsFrame.from_entries(entries or [])
+
+# Above this many points the timeline is aggregated/downsampled and drawn
+# with WebGL, so the figure payload stays bounded for long histories
+TIMELINE_MAX_POINTS = 1000
+WEBGL_THRESHOLD = 500
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets downsampling: indices of the ``n_out``
+    points that best preserve the visual shape of the series"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    
+    return selected
+
+def _timeline_bucket(span: pd.Timedelta) -> str:
+    """Pick a bucket size so the number of buckets stays small"""
+    if span <= pd.Timedelta(days=90):
+        return 'D'
+    if span <= pd.Timedelta(days=730):
+        return 'W'
+    return 'MS'
+
+@timed()
+def create_sentiment_timeline(entries: Union[AnalyticsFrame, List[Dict]], mode: str = 'auto',
+                              max_points: int = TIMELINE_MAX_POINTS):
+    """Create a timeline visualization of sentiment
+    
+    ``mode`` is 'raw' (one marker per entry), 'buckets' (daily/weekly/monthly
+    mean with a rolling mean and min/max band), 'lttb' (downsampled to
+    ``max_points``) or 'auto' (raw when small, buckets otherwise).
+    """
+    frame = _as_frame(entries)
+    if frame.empty:
         return None
     
-    df_data = []
-    for entry in entries:
-        if entry.get('sentiment_label'):
-            score = entry['sentiment_score'] if entry['sentiment_label'] == 'POSITIVE' else -entry['sentiment_score']
-            df_data.append({
-                'date': pd.to_datetime(entry['timestamp']),
-                'sentiment': score,
-                'label': entry['sentiment_label']
-            })
-    
-    if not df_data:
+    df = frame.entries.loc[frame.entries['sentiment'].notna(), ['timestamp', 'sentiment', 'sentiment_label']]
+    if df.empty:
         return None
     
-    df = pd.DataFrame(df_data)
+    df = df.rename(columns={'timestamp': 'date', 'sentiment_label': 'label'}).sort_values('date')
+    
+    if mode == 'auto':
+        mode = 'raw' if len(df) <= max_points else 'buckets'
     
-    fig = px.line(df, x='date', y='sentiment', 
-                  title='Your Emotional Journey',
-                  labels={'sentiment': 'Sentiment Score', 'date': 'Date'},
-                  markers=True)
+    if mode == 'buckets':
+        fig = _bucketed_timeline(df)
+    else:
+        if mode == 'lttb' and len(df) > max_points:
+            keep = lttb_indices(df['date'].to_numpy().astype(np.int64), df['sentiment'].to_numpy(), max_points)
+            df = df.iloc[keep]
+        
+        fig = px.line(df, x='date', y='sentiment', 
+                      title='Your Emotional Journey',
+                      labels={'sentiment': 'Sentiment Score', 'date': 'Date'},
+                      markers=len(df) <= WEBGL_THRESHOLD,
+                      render_mode='webgl' if len(df) > WEBGL_THRESHOLD else 'svg')
     
     fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
     fig.update_layout(height=400, hovermode='x unified')
     
     return fig
 
-def create_theme_distribution(entries: List[Dict]):
+def _bucketed_timeline(df: pd.DataFrame):
+    """Mean sentiment per adaptive bucket with a rolling mean and min/max band"""
+    bucket = _timeline_bucket(df['date'].iloc[-1] - df['date'].iloc[0])
+    grouped = df.set_index('date')['sentiment'].resample(bucket).agg(['mean', 'min', 'max']).dropna()
+    grouped['rolling'] = grouped['mean'].rolling(7, min_periods=1).mean()
+    bucket_name = {'D': 'Daily', 'W': 'Weekly', 'MS': 'Monthly'}[bucket]
+    
+    trace = go.Scattergl if len(grouped) > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure([
+        trace(x=grouped.index, y=grouped['max'], mode='lines', line=dict(width=0),
+              showlegend=False, hoverinfo='skip'),
+        trace(x=grouped.index, y=grouped['min'], mode='lines', line=dict(width=0),
+              fill='tonexty', fillcolor='rgba(102, 126, 234, 0.15)', name='Range'),
+        trace(x=grouped.index, y=grouped['mean'], mode='lines+markers', name=f'{bucket_name} mean',
+              line=dict(color='#667eea')),
+        trace(x=grouped.index, y=grouped['rolling'], mode='lines', name='Rolling mean',
+              line=dict(color='#f59e0b', dash='dot'))
+    ])
+    fig.update_layout(title='Your Emotional Journey', xaxis_title='Date', yaxis_title='Sentiment Score')
+    return fig
+
+@timed()
+def create_theme_distribution(entries: Union[AnalyticsFrame, List[Dict]]):
     """Create a visualization of theme distribution"""
-    if not entries:
+    frame = _as_frame(entries)
+    if frame.empty:
         return None
     
-    theme_counts = Counter()
-    for entry in entries:
-        if entry.get('themes'):
-            for theme_data in entry['themes']:
-                if isinstance(theme_data, (list, tuple)) and len(theme_data) >= 2:
-                    theme, score = theme_data[0], theme_data[1]
-                    theme_counts[theme] += score
-    
-    if not theme_counts:
+    theme_scores = frame.themes.dropna(subset=['score']).groupby('theme', observed=True)['score'].sum()
+    if theme_scores.empty:
         return None
     
-    df = pd.DataFrame([
-        {'theme': theme, 'frequency': count} 
-        for theme, count in theme_counts.most_common(8)
-    ])
+    df = theme_scores.nlargest(8).rename('frequency').rename_axis('theme').reset_index()
+    df['theme'] = df['theme'].astype(str)
     
     fig = px.bar(df, x='frequency', y='theme', orientation='h',
                  title='Your Most Common Themes',
@@ -65,20 +141,14 @@ def create_theme_distribution(entries: List[Dict]):
     
     return fig
 
-def create_writing_volume_chart(entries: List[Dict]):
+@timed()
+def create_writing_volume_chart(entries: Union[AnalyticsFrame, List[Dict]]):
     """Create a chart showing writing volume over time"""
-    if not entries:
+    frame = _as_frame(entries)
+    if frame.empty:
         return None
     
-    df_data = []
-    for entry in entries:
-        df_data.append({
-            'date': pd.to_datetime(entry['timestamp']).date(),
-            'word_count': entry.get('word_count', 0)
-        })
-    
-    df = pd.DataFrame(df_data)
-    df_grouped = df.groupby('date')['word_count'].sum().reset_index()
+    df_grouped = frame.entries.groupby('date')['word_count'].sum().reset_index()
     
     fig = px.bar(df_grouped, x='date', y='word_count',
                  title='Writing Volume Over Time',
@@ -89,63 +159,246 @@ def create_writing_volume_chart(entries: List[Dict]):
     
     return fig
 
-def generate_weekly_summary(entries: List[Dict]) -> str:
+@timed()
+def create_theme_cooccurrence_heatmap(cooccurrence: Dict):
+    """Heatmap of how often pairs of themes appear in the same entry"""
+    themes = cooccurrence['themes']
+    if len(themes) < 2:
+        return None
+    
+    # The diagonal (entries per theme) would swamp the pair counts
+    matrix = cooccurrence['matrix'].astype(float)
+    np.fill_diagonal(matrix, np.nan)
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=matrix,
+        x=themes,
+        y=themes,
+        colorscale='Blues',
+        hoverongaps=False,
+        hovertemplate='%{y} + %{x}: %{z:.0f} entries<extra></extra>'
+    ))
+    fig.update_layout(
+        title='Themes That Appear Together',
+        height=450,
+        yaxis={'autorange': 'reversed'}
+    )
+    
+    return fig
+
+@timed()
+def create_theme_trend_heatmap(rows: List[tuple], max_themes: int = 10):
+    """Heatmap of entries per theme per week (rows from get_theme_weekly_series)"""
+    if not rows:
+        return None
+    
+    df = pd.DataFrame(rows, columns=['week', 'theme', 'entries'])
+    grid = df.pivot_table(index='theme', columns='week', values='entries', aggfunc='sum', fill_value=0)
+    grid = grid.loc[grid.sum(axis=1).nlargest(max_themes).index]
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=grid.values,
+        x=pd.to_datetime(grid.columns),
+        y=grid.index,
+        colorscale='Purples',
+        hovertemplate='%{y}, week of %{x|%b %d}: %{z} entries<extra></extra>'
+    ))
+    fig.update_layout(title='Themes Week by Week', height=400)
+    
+    return fig
+
+@timed()
+def create_theme_sentiment_chart(stats: List[Dict], max_themes: int = 12):
+    """Bar chart of how each theme correlates with sentiment"""
+    df = pd.DataFrame([s for s in stats if s['correlation'] is not None][:max_themes])
+    if df.empty:
+        return None
+    
+    df = df.sort_values('correlation')
+    fig = px.bar(df, x='correlation', y='theme', orientation='h',
+                 title='How Themes Relate to Your Mood',
+                 labels={'correlation': 'Correlation with sentiment', 'theme': 'Theme'},
+                 color='correlation',
+                 color_continuous_scale='RdYlGn',
+                 range_color=[-1, 1],
+                 hover_data={'entries': True, 'mean_sentiment': ':.2f'})
+    fig.update_layout(height=400, showlegend=False)
+    
+    return fig
+
+@timed()
+def create_top_terms_chart(rows: List[tuple], title: str = 'Your Most Used Words'):
+    """Horizontal bar chart of (term, count, entries) rows"""
+    if not rows:
+        return None
+    
+    df = pd.DataFrame(rows, columns=['term', 'count', 'entries'])
+    fig = px.bar(df, x='count', y='term', orientation='h',
+                 title=title,
+                 labels={'count': 'Times used', 'term': 'Word', 'entries': 'Entries'},
+                 hover_data={'entries': True},
+                 color='count',
+                 color_continuous_scale='Teal')
+    fig.update_layout(height=max(300, 22 * len(df) + 120), showlegend=False,
+                      yaxis={'categoryorder': 'total ascending'})
+    
+    return fig
+
+@timed()
+def create_vocabulary_growth_chart(rows: List[tuple]):
+    """Cumulative distinct words over time from (day, new_terms) rows"""
+    if not rows:
+        return None
+    
+    df = pd.DataFrame(rows, columns=['day', 'new_terms'])
+    df['day'] = pd.to_datetime(df['day'])
+    df['vocabulary'] = df['new_terms'].cumsum()
+    
+    fig = px.area(df, x='day', y='vocabulary',
+                  title='Vocabulary Growth',
+                  labels={'day': 'Date', 'vocabulary': 'Distinct words'},
+                  hover_data={'new_terms': True})
+    fig.update_traces(line_color='#0d9488')
+    fig.update_layout(height=300)
+    
+    return fig
+
+@timed()
+def create_term_timeline(rows: List[tuple], term: str):
+    """Weekly uses of one word from (day, count) rows"""
+    if not rows:
+        return None
+    
+    df = pd.DataFrame(rows, columns=['day', 'count'])
+    df['day'] = pd.to_datetime(df['day'])
+    weekly = df.set_index('day')['count'].resample('W-MON', label='left', closed='left').sum().reset_index()
+    
+    fig = px.bar(weekly, x='day', y='count',
+                 title=f'"{term}" Week by Week',
+                 labels={'day': 'Week of', 'count': 'Times used'})
+    fig.update_traces(marker_color='#0d9488')
+    fig.update_layout(height=300)
+    
+    return fig
+
+CALENDAR_METRICS = {
+    'entries': {'label': 'Entries', 'colorscale': 'Greens', 'format': '%{z:.0f} entries'},
+    'words': {'label': 'Words', 'colorscale': 'Blues', 'format': '%{z:,.0f} words'},
+    'mood': {'label': 'Mood', 'colorscale': 'RdYlGn', 'format': 'mood %{z:+.2f}'}
+}
+
+@timed()
+def create_calendar_heatmap(values: np.ndarray, year: int, metric: str = 'entries'):
+    """GitHub-style year heatmap from one value per day (index 0 = January 1)"""
+    first = datetime(year, 1, 1)
+    offset = first.weekday()
+    slots = np.arange(len(values)) + offset
+    weeks = (offset + len(values) + 6) // 7
+    
+    # Weekday rows x week columns; empty days stay blank (NaN)
+    values = values.astype(float)
+    if metric != 'mood':
+        values[values == 0] = np.nan
+    grid = np.full((7, weeks), np.nan)
+    grid[slots % 7, slots // 7] = values
+    dates = np.full((7, weeks), '', dtype=object)
+    dates[slots % 7, slots // 7] = pd.date_range(first, periods=len(values)).strftime('%b %d, %Y')
+    
+    settings = CALENDAR_METRICS[metric]
+    heatmap = dict(
+        z=grid,
+        customdata=dates,
+        x=np.arange(weeks),
+        y=['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+        colorscale=settings['colorscale'],
+        xgap=3,
+        ygap=3,
+        hoverongaps=False,
+        hovertemplate=f"%{{customdata}}: {settings['format']}<extra></extra>",
+        colorbar=dict(title=settings['label'], thickness=10)
+    )
+    if metric == 'mood':
+        heatmap.update(zmid=0, zmin=-1, zmax=1)
+    
+    month_starts = pd.date_range(first, periods=12, freq='MS')
+    fig = go.Figure(data=go.Heatmap(**heatmap))
+    fig.update_layout(
+        title=str(year),
+        height=220,
+        margin=dict(t=40, b=20, l=40, r=20),
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis=dict(
+            tickmode='array',
+            tickvals=[(d.dayofyear - 1 + offset) // 7 for d in month_starts],
+            ticktext=[d.strftime('%b') for d in month_starts],
+            showgrid=False,
+            zeroline=False
+        ),
+        yaxis=dict(autorange='reversed', showgrid=False, zeroline=False)
+    )
+    
+    return fig
+
+def generate_weekly_summary(entries: Union[AnalyticsFrame, List[Dict]]) -> str:
     """Generate insights from the past week's entries"""
-    if not entries:
+    frame = _as_frame(entries)
+    if frame.empty:
         return "Start journaling to receive personalized insights!"
     
-    week_ago = datetime.now() - timedelta(days=7)
-    recent_entries = [
-        e for e in entries 
-        if datetime.fromisoformat(e['timestamp']) > week_ago
-    ]
+    recent = frame.since(7)
     
-    if not recent_entries:
+    if recent.empty:
         return "No entries from the past week. Keep journaling to see insights!"
     
-    summary = f"**Weekly Reflection ({len(recent_entries)} entries this week)**\n\n"
+    labels = recent.entries['sentiment_label'].dropna()
+    summary = {
+        'entries': len(recent),
+        'positive_pct': (labels == 'POSITIVE').mean() * 100 if len(labels) else None,
+        'themes': [(str(theme), int(count)) for theme, count in recent.theme_counts().items()],
+        'avg_words': recent.entries['word_count'].mean()
+    }
+    return format_period_summary(summary, f"Weekly Reflection ({len(recent)} entries this week)")
+
+def format_period_summary(summary: Dict, title: Optional[str] = None) -> str:
+    """Render a period summary (see DatabaseManager.get_period_summary) as text"""
+    if not summary['entries']:
+        return "No entries in this period. Keep journaling to see insights!"
+    
+    if title is None:
+        title = f"Reflection ({summary['entries']} entries)"
+    text = f"**{title}**\n\n"
     
     # Sentiment summary
-    sentiments = [e['sentiment_label'] for e in recent_entries 
-                  if e.get('sentiment_label')]
-    if sentiments:
-        positive_count = sentiments.count('POSITIVE')
-        positive_pct = (positive_count / len(sentiments)) * 100
-        summary += f"📊 **Emotional Tone:** {positive_pct:.0f}% of your entries had a positive sentiment.\n\n"
+    positive_pct = summary['positive_pct']
+    if positive_pct is not None:
+        text += f"📊 **Emotional Tone:** {positive_pct:.0f}% of your entries had a positive sentiment.\n\n"
     
     # Theme summary
-    all_themes = []
-    for entry in recent_entries:
-        if entry.get('themes'):
-            for theme_data in entry['themes']:
-                if isinstance(theme_data, (list, tuple)) and len(theme_data) >= 1:
-                    all_themes.append(theme_data[0])
-    
-    if all_themes:
-        top_themes = Counter(all_themes).most_common(3)
-        summary += f"🎯 **Top Themes:** You wrote most about {', '.join([t[0] for t in top_themes])}.\n\n"
+    theme_list = [theme for theme, _ in summary['themes'][:3]]
+    if theme_list:
+        text += f"🎯 **Top Themes:** You wrote most about {', '.join(theme_list)}.\n\n"
     
     # Word count
-    avg_words = sum(e.get('word_count', 0) for e in recent_entries) / len(recent_entries)
-    summary += f"✍️ **Writing Volume:** Average of {avg_words:.0f} words per entry.\n\n"
+    avg_words = summary['avg_words']
+    text += f"✍️ **Writing Volume:** Average of {avg_words:.0f} words per entry.\n\n"
     
     # Pattern recognition
-    summary += "💡 **Insights:**\n"
-    theme_list = [t[0] for t in top_themes] if all_themes else []
+    text += "💡 **Insights:**\n"
     
     if 'work stress' in theme_list:
-        summary += "- You've been processing work-related stress. Remember to schedule breaks.\n"
+        text += "- You've been processing work-related stress. Remember to schedule breaks.\n"
     if 'gratitude' in theme_list:
-        summary += "- You're practicing gratitude! This is linked to improved mental wellbeing.\n"
-    if positive_pct > 70:
-        summary += "- You're experiencing a positive period! What's contributing to this?\n"
-    elif positive_pct < 40:
-        summary += "- You might benefit from self-care activities. What brings you joy?\n"
+        text += "- You're practicing gratitude! This is linked to improved mental wellbeing.\n"
+    if positive_pct is not None:
+        if positive_pct > 70:
+            text += "- You're experiencing a positive period! What's contributing to this?\n"
+        elif positive_pct < 40:
+            text += "- You might benefit from self-care activities. What brings you joy?\n"
     
     if avg_words > 200:
-        summary += "- You're writing detailed entries. This depth can lead to better self-understanding.\n"
+        text += "- You're writing detailed entries. This depth can lead to better self-understanding.\n"
     
-    return summary
+    return text
 
 def format_date(iso_string: str) -> str:
     """Format ISO datetime string to readable format"""
@@ -155,64 +408,32 @@ def format_date(iso_string: str) -> str:
     except:
         return iso_string
 
-def get_streak_info(entries: List[Dict]) -> Dict:
+def get_streak_info(entries: Union[AnalyticsFrame, List[Dict]]) -> Dict:
     """Calculate journaling streak information"""
-    if not entries:
+    frame = _as_frame(entries)
+    if frame.empty:
         return {'current': 0, 'longest': 0, 'total_days': 0}
     
-    dates = sorted(list(set([
-        datetime.fromisoformat(e['timestamp']).date() 
-        for e in entries
-    ])), reverse=True)
-    
-    if not dates:
-        return {'current': 0, 'longest': 0, 'total_days': 0}
+    # Unique active days, newest first, as day ordinals
+    days = np.unique(frame.entries['date'].to_numpy().astype('datetime64[D]').astype(np.int64))[::-1]
     
-    # Current streak
-    current_streak = 1
-    for i in range(len(dates) - 1):
-        if (dates[i] - dates[i+1]).days == 1:
-            current_streak += 1
-        else:
-            break
-    
-    # Longest streak
-    longest_streak = 1
-    temp_streak = 1
-    for i in range(len(dates) - 1):
-        if (dates[i] - dates[i+1]).days == 1:
-            temp_streak += 1
-            longest_streak = max(longest_streak, temp_streak)
-        else:
-            temp_streak = 1
+    # Break points where consecutive active days are more than one day apart
+    breaks = np.flatnonzero(days[:-1] - days[1:] != 1)
+    run_lengths = np.diff(np.concatenate(([0], breaks + 1, [len(days)])))
     
     return {
-        'current': current_streak,
-        'longest': longest_streak,
-        'total_days': len(dates)
+        'current': int(run_lengths[0]),
+        'longest': int(run_lengths.max()),
+        'total_days': len(days)
     }
 
 def export_to_markdown(entries: List[Dict]) -> str:
     """Export entries to markdown format"""
-    md = "# My Journal Entries\n\n"
-    md += f"Exported on {datetime.now().strftime('%B %d, %Y')}\n\n"
-    md += "---\n\n"
-    
-    for entry in sorted(entries, key=lambda x: x['timestamp'], reverse=True):
-        md += f"## {format_date(entry['timestamp'])}\n\n"
-        
-        if entry.get('prompt'):
-            md += f"**Prompt:** *{entry['prompt']}*\n\n"
-        
-        md += f"{entry['content']}\n\n"
-        
-        if entry.get('sentiment_label'):
-            md += f"**Sentiment:** {entry['sentiment_label']}\n"
-        
-        if entry.get('themes'):
-            themes_str = ", ".join([t[0] if isinstance(t, (list, tuple)) else str(t) for t in entry['themes']])
-            md += f"**Themes:** {themes_str}\n"
-        
-        md += "\n---\n\n"
-    
-    return md
\ No newline at end of file
+    import io
+    from .exporter import ChunkedWriter, write_markdown
+
+    buffer = io.StringIO()
+    out = ChunkedWriter(buffer)
+    write_markdown(sorted(entries, key=lambda x: x['timestamp'], reverse=True), out)
+    out.flush()
+    return buffer.getvalue()
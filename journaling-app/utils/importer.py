@@ -0,0 +1,197 @@
+"""Import journals previously written by the exporter.
+
+Usage (from the journaling-app directory):
+
+    python -m utils.importer journal_export.jsonl [--db database.db]
+
+Markdown (``.md``) and JSON Lines (``.jsonl``) exports are supported, plain
+or gzip-compressed. Entries keep their original timestamps, prompts,
+sentiment and themes, so no model is run. Entries whose content is already
+in the journal are skipped.
+"""
+import argparse
+import gzip
+import io
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, Optional
+
+from .exporter import MARKDOWN_META_PREFIX, MARKDOWN_META_SUFFIX
+
+IMPORT_FORMATS = ['markdown', 'jsonl']
+
+
+def iter_jsonl(lines: Iterable[str]) -> Iterator[Optional[Dict]]:
+    """Yield one record per non-empty line, or None for a line that is not JSON"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def iter_markdown(lines: Iterable[str]) -> Iterator[Optional[Dict]]:
+    """Yield entries from a Markdown export using its per-entry metadata.
+
+    Each entry's content follows its metadata comment and is read back by
+    character count, so content containing headings or rules is safe.
+    Exports written before metadata was added carry no entries to import.
+    An unreadable metadata comment yields None (its content is passed over
+    as ordinary text).
+    """
+    lines = iter(lines)
+    for line in lines:
+        if not line.startswith(MARKDOWN_META_PREFIX):
+            continue
+        payload = line.rstrip('\r\n')[len(MARKDOWN_META_PREFIX):]
+        if payload.endswith(MARKDOWN_META_SUFFIX):
+            payload = payload[:-len(MARKDOWN_META_SUFFIX)]
+        try:
+            record = json.loads(payload)
+        except ValueError:
+            yield None
+            continue
+        if not isinstance(record, dict):
+            yield None
+            continue
+
+        chars = record.pop('chars', 0)
+        parts, read = [], 0
+        while read < chars:
+            part = next(lines, None)
+            if part is None:
+                break
+            parts.append(part)
+            read += len(part)
+        record['content'] = ''.join(parts)[:chars]
+        yield record
+
+
+PARSERS = {
+    'markdown': iter_markdown,
+    'jsonl': iter_jsonl
+}
+
+
+def _normalize(record: Optional[Dict]) -> Optional[Dict]:
+    """Entry fields for ``record``, or None if it can't be imported"""
+    if not isinstance(record, dict):
+        return None
+    content = record.get('content')
+    timestamp = record.get('timestamp')
+    if not isinstance(content, str) or not content.strip() or not isinstance(timestamp, str):
+        return None
+    try:
+        datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+
+    themes = record.get('themes')
+    return {
+        'timestamp': timestamp,
+        'content': content,
+        'prompt': record.get('prompt'),
+        'word_count': record.get('word_count') if record.get('word_count') is not None else len(content.split()),
+        'token_count': record.get('token_count'),
+        'unique_words': record.get('unique_words'),
+        'sentiment_label': record.get('sentiment_label'),
+        'sentiment_score': record.get('sentiment_score'),
+        'themes': themes if isinstance(themes, list) else None
+    }
+
+
+def _open_text(source) -> io.TextIOBase:
+    """Text stream over a path or binary file object, decompressing gzip"""
+    raw = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    magic = raw.read(2)
+    raw.seek(0)
+    if magic == b'\x1f\x8b':
+        raw = gzip.GzipFile(fileobj=raw, mode='rb')
+    # newline='' keeps '\r' in content so Markdown character counts line up
+    return io.TextIOWrapper(raw, encoding='utf-8', newline='')
+
+
+def detect_format(name: str, first_line: str) -> str:
+    name = name.lower()
+    if name.endswith(('.jsonl', '.jsonl.gz', '.ndjson')):
+        return 'jsonl'
+    if name.endswith(('.md', '.md.gz', '.markdown')):
+        return 'markdown'
+    return 'jsonl' if first_line.lstrip().startswith('{') else 'markdown'
+
+
+def import_entries(db, source, fmt: Optional[str] = None, batch_size: int = 1000) -> Dict:
+    """Import an exported journal from ``source`` (a path or binary file).
+
+    The file is parsed incrementally and inserted in batches through
+    ``db.import_entries``, so memory use does not grow with file size.
+    Records that cannot be parsed or lack content or a valid timestamp are
+    counted as ``invalid`` and the rest of the file is still imported.
+    """
+    start = time.perf_counter()
+    stream = _open_text(source)
+    try:
+        first_line = stream.readline()
+        if fmt is None:
+            fmt = detect_format(str(getattr(source, 'name', source)), first_line)
+        if fmt not in PARSERS:
+            raise ValueError(f"Unknown import format: {fmt}")
+
+        read = invalid = 0
+
+        def records():
+            nonlocal read, invalid
+            lines = _chain(first_line, stream)
+            for record in PARSERS[fmt](lines):
+                read += 1
+                entry = _normalize(record)
+                if entry is None:
+                    invalid += 1
+                    continue
+                yield entry
+
+        result = db.import_entries(records(), batch_size=batch_size)
+    finally:
+        stream.close()
+
+    seconds = time.perf_counter() - start
+    result.update({
+        'format': fmt,
+        'read': read,
+        'invalid': invalid,
+        'seconds': seconds,
+        'entries_per_s': read / seconds if seconds > 0 else 0.0
+    })
+    return result
+
+
+def _chain(first_line: str, stream) -> Iterator[str]:
+    yield first_line
+    yield from stream
+
+
+def main(argv=None):
+    from database.db import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Import an exported journal")
+    parser.add_argument("path")
+    parser.add_argument("--db", default="database.db")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    result = import_entries(DatabaseManager(args.db), args.path, args.format, args.batch_size)
+    print(
+        f"{result['format']}: read {result['read']}, imported {result['inserted']}, "
+        f"skipped {result['skipped']} duplicates, {result['invalid']} invalid "
+        f"({result['seconds']:.1f}s, {result['entries_per_s']:,.0f} entries/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
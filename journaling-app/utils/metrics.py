@@ -0,0 +1,311 @@
+"""Prometheus metrics for the journaling app.
+
+Metrics live in a process-wide ``registry`` and are rendered in the
+Prometheus text exposition format (0.0.4). Latency histograms are fed from
+the ``utils.perf`` instrumentation, so every ``@timed`` DatabaseManager
+method, AIAnalyzer stage, chart builder and page rerun is observed without
+further wiring; counters and gauges cover the rest.
+
+Exporting is off unless configured:
+
+- ``JOURNAL_METRICS_PORT``: serve ``/metrics`` over HTTP on this port
+  (bound to ``JOURNAL_METRICS_ADDR``, default 127.0.0.1).
+- ``JOURNAL_METRICS_TEXTFILE``: rewrite this file every
+  ``JOURNAL_METRICS_INTERVAL`` seconds (default 15), for node_exporter's
+  textfile collector.
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .perf import recorder
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; spans sub-millisecond rollup reads up to cold model inference
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _child(self, values: Tuple[str, ...]):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic count, optionally per label values or read from ``fn``"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def _new_child(self):
+        return [0.0]
+
+    def inc(self, *labels: str, amount: float = 1):
+        child = self._child(labels)
+        with self._lock:
+            child[0] += amount
+
+    def samples(self) -> List[str]:
+        if self.fn is not None:
+            return [f'{self.name} {_number(self.fn())}']
+        with self._lock:
+            items = [(values, child[0]) for values, child in self._children.items()]
+        return [f'{self.name}{_labels(self.label_names, values)} {_number(value)}' for values, value in items]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, or is read from ``fn`` at scrape time"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, *labels: str):
+        child = self._child(labels)
+        with self._lock:
+            child[0] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        # Per-bucket (non-cumulative) counts, then sum and count
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def observe(self, value: float, *labels: str):
+        child = self._child(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            child[0][index] += 1
+            child[1] += value
+            child[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(values, list(child[0]), child[1], child[2]) for values, child in self._children.items()]
+        lines = []
+        for values, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f'{self.name}_bucket{_labels(self.label_names, values, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.label_names, values)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.label_names, values)} {count}')
+        return lines
+
+
+class Registry:
+    """Named metrics rendered together in the exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = (), fn=None) -> Counter:
+        return self.register(Counter(name, help, labels, fn))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = (), fn=None) -> Gauge:
+        return self.register(Gauge(name, help, labels, fn))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+# Shared by every session in this process
+registry = Registry()
+
+DB_SECONDS = registry.histogram(
+    'journal_db_query_seconds', 'DatabaseManager call latency', ['method'])
+ANALYSIS_SECONDS = registry.histogram(
+    'journal_analysis_seconds', 'AIAnalyzer stage duration (one model per stage)', ['stage'])
+CHART_SECONDS = registry.histogram(
+    'journal_chart_build_seconds', 'Chart and analytics frame build time', ['chart'])
+RERUN_SECONDS = registry.histogram(
+    'journal_page_rerun_seconds', 'Streamlit script run time per page', ['page'])
+ENTRIES_SAVED = registry.counter(
+    'journal_entries_saved_total', 'Entries written to the database', ['source'])
+ANALYTICS_CACHE = registry.counter(
+    'journal_analytics_cache_total', 'Analytics frame cache lookups', ['result'])
+DEFERRED_QUEUE = registry.gauge(
+    'journal_deferred_analysis_queue', 'Background theme detection jobs queued or running')
+DEFERRED_FAILURES = registry.counter(
+    'journal_deferred_analysis_failures_total', 'Background theme detection jobs that raised')
+DB_FILE_BYTES = registry.gauge(
+    'journal_db_file_bytes', 'Database file sizes at the last maintenance run', ['file'])
+DB_FREELIST_PAGES = registry.gauge(
+    'journal_db_freelist_pages', 'Unused pages in the database file at the last maintenance run')
+DB_INTEGRITY_OK = registry.gauge(
+    'journal_db_integrity_ok', '1 if the last integrity check passed, 0 if it found problems')
+
+
+def _figure_cache_stat(key: str) -> Callable[[], float]:
+    def read():
+        from .figcache import figure_cache
+        return figure_cache.stats()[key]
+    return read
+
+
+registry.counter('journal_figure_cache_hits_total', 'Chart cache hits', fn=_figure_cache_stat('hits'))
+registry.counter('journal_figure_cache_misses_total', 'Chart cache misses', fn=_figure_cache_stat('misses'))
+registry.gauge('journal_figure_cache_hit_ratio', 'Chart cache hit ratio since start', fn=_figure_cache_stat('hit_rate'))
+registry.gauge('journal_figure_cache_bytes', 'Estimated size of cached charts', fn=_figure_cache_stat('bytes'))
+
+# utils.perf operation prefixes -> (histogram, label taken from the op name)
+_ROUTES = (
+    ('db.', DB_SECONDS),
+    ('ai.', ANALYSIS_SECONDS),
+    ('helper.', CHART_SECONDS),
+    ('analytics.', CHART_SECONDS)
+)
+
+
+def _observe(op: str, seconds: float, page: str):
+    if op == 'rerun':
+        RERUN_SECONDS.observe(seconds, page)
+        return
+    for prefix, histogram in _ROUTES:
+        if op.startswith(prefix):
+            # 'db.DatabaseManager.get_dashboard' -> 'get_dashboard'
+            histogram.observe(seconds, op[len(prefix):].replace('DatabaseManager.', ''))
+            return
+
+
+recorder.listeners.append(_observe)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port: int, addr: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread"""
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+def write_textfile(path: str):
+    """Write the current metrics to ``path`` atomically"""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def start_textfile_writer(path: str, interval: float = 15.0) -> threading.Thread:
+    """Rewrite ``path`` every ``interval`` seconds from a daemon thread"""
+    def run():
+        while True:
+            try:
+                write_textfile(path)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name='metrics-textfile', daemon=True)
+    thread.start()
+    return thread
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_exporter():
+    """Start the exporters configured in the environment (once per process)"""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+        port = os.environ.get('JOURNAL_METRICS_PORT')
+        if port:
+            start_http_server(int(port), os.environ.get('JOURNAL_METRICS_ADDR', '127.0.0.1'))
+        path = os.environ.get('JOURNAL_METRICS_TEXTFILE')
+        if path:
+            start_textfile_writer(path, float(os.environ.get('JOURNAL_METRICS_INTERVAL', '15')))
@@ -0,0 +1,158 @@
+import cProfile
+import functools
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Operations kept in memory (oldest are dropped first)
+PERF_BUFFER_SIZE = int(os.environ.get("JOURNAL_PERF_BUFFER", "5000"))
+
+RECORD_FIELDS = ('time', 'page', 'rerun', 'op', 'seconds', 'rows')
+
+# Records made outside a page rerun (background threads, CLI tools)
+BACKGROUND = "(background)"
+
+
+def _count_rows(result) -> Optional[int]:
+    """Default row count: the length of list-like results"""
+    if isinstance(result, (list, tuple)) or hasattr(result, 'shape'):
+        return len(result)
+    return None
+
+
+class PerfRecorder:
+    """Process-wide ring buffer of operation timings.
+
+    Each record is a dict with the page and rerun it happened in, the
+    operation name, seconds, and an optional row count. ``begin_rerun`` /
+    ``end_rerun`` bracket a page script run on the current thread; records
+    made in between are attributed to that page. A page can be marked so
+    its next rerun runs under cProfile (see ``request_profile``).
+    """
+
+    def __init__(self, size: int = PERF_BUFFER_SIZE, profiles: int = 5):
+        self.records = deque(maxlen=size)
+        self.profiles = deque(maxlen=profiles)
+        self.enabled = True
+        # Called with (op, seconds, page) for every record, even when the
+        # buffer is disabled (utils.metrics feeds its histograms this way)
+        self.listeners: List[Callable] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._reruns = itertools.count(1)
+        self._profile_pages = set()
+
+    def record(self, op: str, seconds: float, rows: Optional[int] = None):
+        local = self._local
+        page = getattr(local, 'page', None) or BACKGROUND
+        for listener in self.listeners:
+            listener(op, seconds, page)
+        if not self.enabled:
+            return
+        # Stored as tuples (cheaper on the hot path); snapshot() builds dicts
+        record = (time.time(), page, getattr(local, 'rerun', None), op, seconds, rows)
+        with self._lock:
+            self.records.append(record)
+
+    @contextmanager
+    def span(self, op: str):
+        """Time the block; set ``info['rows']`` inside it to record a row count"""
+        info = {'rows': None}
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.record(op, time.perf_counter() - start, info['rows'])
+
+    def timed(self, op: Optional[str] = None, rows: Callable = _count_rows):
+        """Decorator recording each call of the function as ``op``"""
+        def decorate(func):
+            name = op or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                result = func(*args, **kwargs)
+                self.record(name, time.perf_counter() - start, rows(result) if rows else None)
+                return result
+            return wrapper
+        return decorate
+
+    def begin_rerun(self, page: str):
+        """Start attributing this thread's records to a run of ``page``"""
+        local = self._local
+        if getattr(local, 'page', None) is not None:
+            # The previous run ended early (st.rerun, an exception)
+            self.end_rerun()
+        local.page = page
+        local.rerun = next(self._reruns)
+        local.start = time.perf_counter()
+        local.profiler = None
+        with self._lock:
+            profile = page in self._profile_pages
+            self._profile_pages.discard(page)
+        if profile:
+            local.profiler = cProfile.Profile()
+            local.profiler.enable()
+
+    def end_rerun(self):
+        """Record the total time of the current page run"""
+        local = self._local
+        page = getattr(local, 'page', None)
+        if page is None:
+            return
+        seconds = time.perf_counter() - local.start
+        profiler = local.profiler
+        if profiler is not None:
+            profiler.disable()
+        self.record('rerun', seconds)
+        local.page = local.rerun = local.profiler = None
+
+        if profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(40)
+            with self._lock:
+                self.profiles.append({
+                    'page': page,
+                    'at': datetime.now().isoformat(timespec='seconds'),
+                    'seconds': seconds,
+                    'stats': out.getvalue()
+                })
+
+    def request_profile(self, page: str):
+        """Profile the next run of ``page`` (in any session)"""
+        with self._lock:
+            self._profile_pages.add(page)
+
+    def pending_profiles(self) -> List[str]:
+        with self._lock:
+            return sorted(self._profile_pages)
+
+    def captured_profiles(self) -> List[Dict]:
+        with self._lock:
+            return list(self.profiles)
+
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            records = list(self.records)
+        return [dict(zip(RECORD_FIELDS, record)) for record in records]
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.profiles.clear()
+
+
+# Shared by every session in this process
+recorder = PerfRecorder()
+timed = recorder.timed
+span = recorder.span
+begin_rerun = recorder.begin_rerun
+end_rerun = recorder.end_rerun
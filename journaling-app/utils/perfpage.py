@@ -0,0 +1,143 @@
+import pandas as pd
+import streamlit as st
+
+from database.maintenance import maintenance_for
+
+from .perf import recorder
+from .session import get_database
+
+# Names passed to begin_rerun by app.py and the pages
+PAGE_NAMES = ["Home", "New Entry", "Past Entries", "Insights", "Weekly Summary"]
+
+
+def _percentiles(seconds: pd.Series) -> pd.Series:
+    ms = seconds * 1000
+    return pd.Series({
+        'calls': len(ms),
+        'p50 ms': ms.median(),
+        'p95 ms': ms.quantile(0.95),
+        'max ms': ms.max(),
+        'total s': seconds.sum()
+    })
+
+
+def render_performance_page():
+    """Hidden page with per-page rerun breakdowns and cProfile captures"""
+    st.title("Performance")
+    st.caption(
+        f"Last {recorder.records.maxlen:,} timed operations in this process, "
+        "shared by every session. Set JOURNAL_PERF_BUFFER to keep more."
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        recorder.enabled = st.toggle("Record timings", value=recorder.enabled)
+    with col2:
+        if st.button("Clear"):
+            recorder.clear()
+
+    records = pd.DataFrame(recorder.snapshot())
+    if records.empty:
+        st.info("Nothing recorded yet. Open a page of the app to collect timings.")
+    else:
+        reruns = records[records['op'] == 'rerun']
+        ops = records[records['op'] != 'rerun']
+
+        st.subheader("Reruns by page")
+        if reruns.empty:
+            st.caption("No complete page runs yet.")
+        else:
+            st.dataframe(
+                reruns.groupby('page')['seconds'].apply(_percentiles).unstack(),
+                use_container_width=True
+            )
+
+        st.subheader("Page breakdown")
+        pages = sorted(records['page'].unique())
+        page = st.selectbox("Page", pages)
+        page_ops = ops[ops['page'] == page]
+        if page_ops.empty:
+            st.caption("No operations recorded for this page.")
+        else:
+            breakdown = page_ops.groupby('op').agg(
+                calls=('seconds', 'size'),
+                total_s=('seconds', 'sum'),
+                mean_ms=('seconds', lambda s: s.mean() * 1000),
+                max_ms=('seconds', lambda s: s.max() * 1000),
+                rows=('rows', 'sum')
+            )
+            page_runs = reruns[reruns['page'] == page]
+            if not page_runs.empty:
+                # Nested operations (a chart inside a page section) are
+                # counted in both, so shares can add up to more than 100%
+                breakdown['share of rerun'] = breakdown['total_s'] / page_runs['seconds'].sum()
+            st.dataframe(
+                breakdown.sort_values('total_s', ascending=False),
+                use_container_width=True,
+                column_config={'share of rerun': st.column_config.ProgressColumn(min_value=0, max_value=1)}
+            )
+
+        st.subheader("Slowest operations")
+        slowest = ops.nlargest(20, 'seconds').assign(
+            ms=lambda df: df['seconds'] * 1000,
+            at=lambda df: pd.to_datetime(df['time'], unit='s')
+        )
+        st.dataframe(
+            slowest[['at', 'page', 'rerun', 'op', 'ms', 'rows']],
+            use_container_width=True,
+            hide_index=True
+        )
+
+    st.subheader("Profile a rerun")
+    st.caption("Runs the next load of the chosen page (in any session) under cProfile.")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        target = st.selectbox("Page to profile", PAGE_NAMES)
+    with col2:
+        if st.button("Profile next run"):
+            recorder.request_profile(target)
+    pending = recorder.pending_profiles()
+    if pending:
+        st.info(f"Waiting for the next run of: {', '.join(pending)}")
+
+    for profile in reversed(recorder.captured_profiles()):
+        with st.expander(f"{profile['page']} at {profile['at']} ({profile['seconds'] * 1000:.0f} ms)"):
+            st.code(profile['stats'])
+
+    _render_maintenance()
+
+
+def _render_maintenance():
+    st.subheader("Database maintenance")
+    maintenance = maintenance_for(get_database())
+    if maintenance is None:
+        st.caption("The maintenance scheduler is off (JOURNAL_MAINTENANCE_INTERVAL=0).")
+        return
+    st.caption(
+        f"Runs every {maintenance.interval:.0f}s once the app has been idle for "
+        f"{maintenance.idle:.0f}s: optimize, incremental vacuum ({maintenance.budget:g}s budget), "
+        "WAL checkpoint and a periodic integrity check."
+    )
+    if st.button("Run maintenance now"):
+        with st.spinner("Running maintenance..."):
+            maintenance.run()
+
+    reports = [report for report in maintenance.reports if 'after' in report]
+    if reports:
+        latest = reports[-1]['after']
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Database file", f"{latest['file_bytes'] / 2**20:.1f} MiB")
+        col2.metric("Write-ahead log", f"{latest['wal_bytes'] / 2**20:.1f} MiB")
+        col3.metric("Free pages", f"{latest['freelist_pages']:,}")
+    rows = [{
+        'time': report['time'],
+        'total s': report.get('seconds', {}).get('total'),
+        'freed pages': report.get('freed_pages'),
+        'checkpoint': report.get('checkpoint', {}).get('mode'),
+        'integrity': str(report.get('integrity', '')),
+        'error': report.get('error', '')
+    } for report in reversed(maintenance.reports)]
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.caption("No maintenance run yet.")
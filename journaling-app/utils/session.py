@@ -0,0 +1,47 @@
+import os
+
+import streamlit as st
+
+from database.db import DatabaseManager
+from database.maintenance import start_maintenance
+from utils.metrics import start_exporter
+
+DEFAULT_DB_PATH = os.environ.get("JOURNAL_DB_PATH", "database.db")
+
+
+@st.cache_resource
+def get_database(db_path: str = DEFAULT_DB_PATH) -> DatabaseManager:
+    """Process-wide DatabaseManager for ``db_path``.
+
+    Created (and ``init_database`` run) once per process; every session and
+    thread shares it, along with its in-memory indexes and calendars.
+    Backfills left by schema migrations and the maintenance scheduler
+    (see ``database.maintenance``) run on background threads.
+    """
+    db = DatabaseManager(db_path)
+    db.start_backfills()
+    start_maintenance(db)
+    return db
+
+
+@st.cache_resource
+def get_analyzer():
+    """Process-wide AIAnalyzer (models are loaded once and shared)"""
+    from models.sentimentpipeline import AIAnalyzer
+    return AIAnalyzer()
+
+
+def init_session(analyzer: bool = False):
+    """Attach the shared resources to this session.
+
+    Pages keep using ``st.session_state.db`` and
+    ``st.session_state.ai_analyzer``; those are references to the shared
+    instances, so a new session costs two dictionary lookups. Anything
+    already set on the session (e.g. by tests) is left alone. Also starts
+    the metrics exporter if one is configured (see ``utils.metrics``).
+    """
+    start_exporter()
+    if 'db' not in st.session_state:
+        st.session_state.db = get_database()
+    if analyzer and 'ai_analyzer' not in st.session_state:
+        st.session_state.ai_analyzer = get_analyzer()